@@ -1,9 +1,10 @@
 import os
+import time
+import asyncio
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 import pyodbc
-
-import pyodbc
-import requests
+import httpx
 
 
 # Charger les variables d'environnement
@@ -16,33 +17,121 @@ password = os.getenv('DB_PASSWORD')
 
 driver= '{ODBC Driver 17 for SQL Server}'
 
-cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
-cursor = cnxn.cursor()
+# Requêtes simultanées par site, délai par requête (s) et nouvelles tentatives
+# en cas d'erreur réseau ou de réponse 429 / 5xx
+CONCURRENCY_PER_HOST = int(os.getenv('NETTOYAGE_CONCURRENCY', '16'))
+TIMEOUT = float(os.getenv('NETTOYAGE_TIMEOUT', '10'))
+RETRIES = int(os.getenv('NETTOYAGE_RETRIES', '3'))
+
+USER_AGENT = 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/111.0'
+
+# Statuts pour lesquels le site refuse HEAD : l'URL finale est obtenue par un GET
+# dont le corps n'est pas téléchargé
+HEAD_UNSUPPORTED = {403, 404, 405, 501}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# URL finales appliquées en une seule mise à jour ensembliste
+CREATE_STAGING = """
+IF OBJECT_ID('tempdb..#URL_Finale') IS NOT NULL DROP TABLE #URL_Finale;
+CREATE TABLE #URL_Finale (
+    ID_Produit INT NOT NULL PRIMARY KEY,
+    URL_Produit VARCHAR(500) NOT NULL
+);
+"""
+
+UPDATE_URLS = """
+UPDATE p
+SET URL_Produit = u.URL_Produit
+FROM Produit AS p
+JOIN #URL_Finale AS u ON u.ID_Produit = p.ID_Produit;
+"""
+
+
+async def _fetch_final_url(client, url):
+    """URL finale après redirections : HEAD, puis GET sans lecture du corps si HEAD est refusé."""
+    response = await client.head(url)
+    if response.status_code in HEAD_UNSUPPORTED:
+        async with client.stream("GET", url) as response:
+            pass
+    if response.status_code in RETRY_STATUSES:
+        response.raise_for_status()
+    return str(response.url)
+
+
+async def resolve_final_url(client, semaphores, url, retries=RETRIES):
+    """Résout une URL avec au plus CONCURRENCY_PER_HOST requêtes simultanées par site."""
+    host = urlsplit(url).netloc
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(CONCURRENCY_PER_HOST)
+    semaphore = semaphores[host]
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                return await _fetch_final_url(client, url)
+        except (httpx.TransportError, httpx.HTTPStatusError):
+            if attempt == retries:
+                raise
+            # Attente croissante hors sémaphore avant une nouvelle tentative
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+async def resolve_all(rows):
+    """(ID_Produit, URL_Produit) -> liste de (ID_Produit, url_finale ou exception)."""
+    semaphores = {}
+    limits = httpx.Limits(max_connections=CONCURRENCY_PER_HOST * 4, max_keepalive_connections=CONCURRENCY_PER_HOST * 4)
+    async with httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=TIMEOUT,
+        limits=limits,
+        headers={'User-Agent': USER_AGENT},
+    ) as client:
+        results = await asyncio.gather(
+            *[resolve_final_url(client, semaphores, url) for _, url in rows],
+            return_exceptions=True,
+        )
+    return [(id_produit, result) for (id_produit, _), result in zip(rows, results)]
+
+
+def run(cnxn):
+    """Remplace l'URL des produits du dernier scraping par l'URL finale après redirection."""
+    cursor = cnxn.cursor()
+
+    # Sélection des produits du dernier scraping
+    cursor.execute("SELECT ID_Produit, URL_Produit FROM Produit WHERE Date_scrap = (SELECT MAX(Date_scrap) FROM Produit)")
+    rows = [(row[0], row[1]) for row in cursor.fetchall()]
+
+    start = time.perf_counter()
+    resolved = asyncio.run(resolve_all(rows))
+    duration = time.perf_counter() - start
 
+    urls = dict(rows)
+    changes = []
+    errors = 0
+    for id_produit, result in resolved:
+        if isinstance(result, Exception):
+            errors += 1
+            print(f"Une erreur s'est produite lors de la tentative d'accès à l'URL {urls[id_produit]} : {result!r}")
+        elif result != urls[id_produit]:
+            changes.append((id_produit, result))
 
+    # Mettre à jour en une fois les URL_Produit pour lesquelles une redirection a eu lieu
+    updated = 0
+    if changes:
+        cursor.execute(CREATE_STAGING)
+        cursor.fast_executemany = True
+        cursor.executemany("INSERT INTO #URL_Finale (ID_Produit, URL_Produit) VALUES (?, ?)", changes)
+        cursor.execute(UPDATE_URLS)
+        updated = cursor.rowcount
+        cursor.execute("DROP TABLE #URL_Finale")
+    cnxn.commit()
 
-# Sélection de la date la plus élevée dans la colonne Date_scrap de la table Produit
-cursor.execute("SELECT MAX(Date_scrap) FROM Produit")
-max_date = cursor.fetchone()[0]
+    print(f"{len(rows)} URL vérifiées en {duration:.1f}s ({updated} mises à jour, {errors} erreurs)")
+    return {"rows": len(rows), "updated": updated, "errors": errors, "resolve_s": round(duration, 3)}
 
-# Sélection des tables qui ont la date la plus élevée dans la colonne Date_scrap de la table Produit
-cursor.execute("SELECT ID_Produit, URL_Produit FROM Produit WHERE Date_scrap = ?", max_date)
-rows = cursor.fetchall()
 
-for row in rows:
-    id_produit = row[0]
-    url_produit = row[1]
-    
+if __name__ == "__main__":
+    cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
     try:
-        # Suivre les redirections pour obtenir l'URL finale
-        response = requests.get(url_produit)
-        url_final = response.url
-        
-        # Mettre à jour l'URL_Produit dans la table Produit si une redirection a eu lieu
-        if url_produit != url_final:
-            cursor.execute("UPDATE Produit SET URL_Produit = ? WHERE ID_Produit = ?", url_final, id_produit)
-    except requests.exceptions.RequestException as e:
-        print(f"Une erreur s'est produite lors de la tentative d'accès à l'URL {url_produit} : {e}")
-
-cnxn.commit()
-cnxn.close()
+        run(cnxn)
+    finally:
+        cnxn.close()
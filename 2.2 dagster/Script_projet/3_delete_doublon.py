@@ -12,50 +12,81 @@ password = os.getenv('DB_PASSWORD')
 
 driver = '{ODBC Driver 17 for SQL Server}'
 
-cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
-cursor = cnxn.cursor()
+# Un doublon a la même URL, le même prix et la même date de scraping qu'un produit d'ID inférieur.
+# incremental (par défaut) ne lit que les deux derniers Date_scrap : Date_scrap fait partie de
+# la clé, et 4_good_price.py, exécuté après cette étape, ne corrige que les prix du dernier
+# scraping ; les doublons qu'il crée sont donc supprimés au passage suivant, où ce scraping
+# est devenu l'avant-dernier. full parcourt tout l'historique (rattrapage ponctuel).
+MODE = os.getenv('DOUBLON_MODE', 'incremental').strip().lower()
 
-# Compter le nombre de lignes dans la table Produit avant la suppression
-cursor.execute("SELECT COUNT(*) FROM Produit")
-nombre_lignes_avant_suppression = cursor.fetchone()[0]
-
-# Récupérer les ID des doublons dans la table Produit
-cursor.execute("""
-WITH CTE AS (
-    SELECT ID_Produit, URL_Produit, Date_scrap,
-           RN = ROW_NUMBER() OVER (PARTITION BY URL_Produit, Prix, Date_scrap ORDER BY ID_Produit)
-    FROM Produit
-)
-SELECT ID_Produit FROM CTE WHERE RN > 1
-""")
-duplicates = cursor.fetchall()
-
-# Suppression des enregistrements liés dans la table Caracteristiques
-for id_produit in duplicates:
-    cursor.execute("DELETE FROM Caracteristiques WHERE ID_Produit = ?", id_produit)
-
-# Suppression des enregistrements liés dans la table Dimensions
-for id_produit in duplicates:
-    cursor.execute("DELETE FROM Dimensions WHERE ID_Produit = ?", id_produit)
-
-# Suppression des doublons dans la table Produit
-cursor.execute("""
-WITH CTE AS (
-    SELECT ID_Produit, URL_Produit, Date_scrap,
+# ID des doublons calculés une seule fois puis réutilisés par les trois suppressions
+STAGE_DUPLICATES = """
+INSERT INTO #Doublons (ID_Produit)
+SELECT ID_Produit
+FROM (
+    SELECT ID_Produit,
            RN = ROW_NUMBER() OVER (PARTITION BY URL_Produit, Prix, Date_scrap ORDER BY ID_Produit)
     FROM Produit
-)
-DELETE FROM CTE WHERE RN > 1
-""")
-cnxn.commit()
+    {where}
+) AS t
+WHERE RN > 1
+"""
+
+LATEST_SCRAPS = """
+    WHERE Date_scrap >= (
+        SELECT MIN(Date_scrap)
+        FROM (SELECT DISTINCT TOP (2) Date_scrap FROM Produit ORDER BY Date_scrap DESC) AS d
+    )
+"""
+
+
+def run(cnxn, mode=None):
+    """
+    Supprime les doublons (même URL, prix et date de scraping) et leurs lignes liées,
+    dans les deux derniers scrapings (incremental, par défaut) ou tout l'historique (full).
+    """
+    mode = mode or MODE
+    if mode not in ('incremental', 'full'):
+        raise ValueError(f"DOUBLON_MODE inconnu : {mode} (incremental ou full)")
+    cursor = cnxn.cursor()
+
+    try:
+        cursor.execute("CREATE TABLE #Doublons (ID_Produit INT NOT NULL PRIMARY KEY)")
+        cursor.execute(STAGE_DUPLICATES.format(where=LATEST_SCRAPS if mode == 'incremental' else ""))
+
+        # Suppression des enregistrements liés puis des doublons, dans une seule transaction ;
+        # les nombres de lignes viennent des instructions elles-mêmes
+        cursor.execute("""
+        DELETE c FROM Caracteristiques AS c
+        JOIN #Doublons AS d ON d.ID_Produit = c.ID_Produit
+        """)
+        caracteristiques = cursor.rowcount
+
+        cursor.execute("""
+        DELETE dim FROM Dimensions AS dim
+        JOIN #Doublons AS d ON d.ID_Produit = dim.ID_Produit
+        """)
+        dimensions = cursor.rowcount
+
+        cursor.execute("""
+        DELETE p FROM Produit AS p
+        JOIN #Doublons AS d ON d.ID_Produit = p.ID_Produit
+        """)
+        produits = cursor.rowcount
 
-# Compter le nombre de lignes restantes dans la table Produit après la suppression
-cursor.execute("SELECT COUNT(*) FROM Produit")
-nombre_lignes_apres_suppression = cursor.fetchone()[0]
+        cursor.execute("DROP TABLE #Doublons")
+        cnxn.commit()
+    except pyodbc.Error:
+        cnxn.rollback()
+        raise
 
-# Calculer le nombre de lignes supprimées
-lignes_supprimees = nombre_lignes_avant_suppression - nombre_lignes_apres_suppression
+    return {"rows": produits, "caracteristiques": caracteristiques, "dimensions": dimensions, "mode": mode}
 
-print("Nombre de lignes supprimées de la table Produit :", lignes_supprimees)
 
-cnxn.close()
+if __name__ == "__main__":
+    cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+    try:
+        lignes_supprimees = run(cnxn)["rows"]
+        print("Nombre de lignes supprimées de la table Produit :", lignes_supprimees)
+    finally:
+        cnxn.close()
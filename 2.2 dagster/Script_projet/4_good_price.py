@@ -1,13 +1,11 @@
 import os
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 import pyodbc
-
-import pyodbc
-import requests
-
+import httpx
 from lxml import html
-import requests
-import pyodbc
 
 
 # Charger les variables d'environnement
@@ -20,47 +18,234 @@ password = os.getenv('DB_PASSWORD')
 
 driver= '{ODBC Driver 17 for SQL Server}'
 
-cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
-cursor = cnxn.cursor()
-
-
-
-
-
-# Connexion à la base de données
-cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
-cursor = cnxn.cursor()
-
-# Sélection de la date la plus élevée dans la colonne Date_scrap de la table Produit
-cursor.execute("SELECT MAX(Date_scrap) FROM Produit")
-date_max = cursor.fetchone()[0]
-
-# Sélection des URL_Produit, Prix et Date_scrap de la table Produit pour la date la plus élevée
-cursor.execute("SELECT ID_Produit, URL_Produit, Prix, Date_scrap FROM Produit WHERE Date_scrap = ?", date_max)
-rows = cursor.fetchall()
-
-for row in rows:
-    id_produit = row[0]
-    url_produit = row[1]
-    prix_produit = row[2]
-    
-    # Obtenir le contenu HTML de la page
-    response = requests.get(url_produit)
-    tree = html.fromstring(response.content)
-    
-    # Extraire le prix de la page
-    prix_page_list = tree.xpath('//*[@id="tire"]/div[2]/div[3]/div/div[3]/div[2]/div[2]/div[1]/div/form/div[1]/div[1]/div/div/span/text()')
-    
-    # Vérifier si la liste est vide
-    if prix_page_list:
-        prix_page = prix_page_list[0]
-    else:
-        prix_page = 666
-    
-    # Comparer le prix de la page avec le prix dans la base de données
-    if prix_produit != prix_page:
-        # Mettre à jour le prix dans la base de données
-        cursor.execute("UPDATE Produit SET Prix = ? WHERE ID_Produit = ?", prix_page, id_produit)
-
-cnxn.commit()
-cnxn.close()
+# Téléchargements simultanés, délai par requête (s), nouvelles tentatives sur erreur
+# réseau ou réponse 429 / 5xx, et processus dédiés à l'analyse des pages
+CONCURRENCY = int(os.getenv('GOOD_PRICE_CONCURRENCY', '16'))
+TIMEOUT = float(os.getenv('GOOD_PRICE_TIMEOUT', '15'))
+RETRIES = int(os.getenv('GOOD_PRICE_RETRIES', '2'))
+PARSE_WORKERS = int(os.getenv('GOOD_PRICE_PARSE_WORKERS', str(os.cpu_count() or 1)))
+
+USER_AGENT = 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/111.0'
+
+PRICE_XPATH = '//*[@id="tire"]/div[2]/div[3]/div/div[3]/div[2]/div[2]/div[1]/div/form/div[1]/div[1]/div/div/span/text()'
+
+# Prix enregistré quand il est absent de la page (produits supprimés par 6_delete_price_666.py)
+PRIX_INTROUVABLE = 666
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Produit retiré du site : prix introuvable sans analyser la page
+GONE_STATUSES = {404, 410}
+
+# Validateurs HTTP (ETag / Last-Modified) et prix lu lors de la dernière vérification
+# de chaque page : une réponse 304 évite de télécharger et d'analyser la page
+CREATE_TABLE = """
+IF OBJECT_ID('Page_Prix', 'U') IS NULL
+    CREATE TABLE Page_Prix (
+        URL_Produit VARCHAR(500) NOT NULL PRIMARY KEY,
+        ETag VARCHAR(200),
+        Last_Modified VARCHAR(100),
+        Prix_Page VARCHAR(50) NOT NULL,
+        Date_verification DATETIME2 NOT NULL
+    );
+"""
+
+CREATE_STAGING = """
+IF OBJECT_ID('tempdb..#Prix_Verifie') IS NOT NULL DROP TABLE #Prix_Verifie;
+CREATE TABLE #Prix_Verifie (
+    ID_Produit INT NOT NULL PRIMARY KEY,
+    Prix VARCHAR(50) NOT NULL
+);
+IF OBJECT_ID('tempdb..#Page_Prix') IS NOT NULL DROP TABLE #Page_Prix;
+CREATE TABLE #Page_Prix (
+    URL_Produit VARCHAR(500) NOT NULL PRIMARY KEY,
+    ETag VARCHAR(200),
+    Last_Modified VARCHAR(100),
+    Prix_Page VARCHAR(50) NOT NULL
+);
+"""
+
+# Prix modifiés appliqués en une seule mise à jour ensembliste (conversion vers INT
+# par SQL Server, comme pour les paramètres envoyés auparavant)
+UPDATE_PRICES = """
+UPDATE p
+SET Prix = v.Prix
+FROM Produit AS p
+JOIN #Prix_Verifie AS v ON v.ID_Produit = p.ID_Produit;
+"""
+
+MERGE_CACHE = """
+MERGE Page_Prix AS cible
+USING #Page_Prix AS source
+ON cible.URL_Produit = source.URL_Produit
+WHEN MATCHED THEN
+    UPDATE SET ETag = source.ETag, Last_Modified = source.Last_Modified,
+               Prix_Page = source.Prix_Page, Date_verification = SYSDATETIME()
+WHEN NOT MATCHED BY TARGET THEN
+    INSERT (URL_Produit, ETag, Last_Modified, Prix_Page, Date_verification)
+    VALUES (source.URL_Produit, source.ETag, source.Last_Modified, source.Prix_Page, SYSDATETIME());
+"""
+
+
+def extract_price(content):
+    """Prix affiché sur une page produit (texte), ou PRIX_INTROUVABLE. Exécuté dans un processus de PARSE_WORKERS."""
+    tree = html.fromstring(content)
+    prix_page_list = tree.xpath(PRICE_XPATH)
+    return prix_page_list[0].strip() if prix_page_list else str(PRIX_INTROUVABLE)
+
+
+def same_price(prix_produit, prix_page):
+    """Compare le prix en base (INT) au texte lu sur la page."""
+    try:
+        return prix_produit is not None and int(prix_page) == prix_produit
+    except ValueError:
+        return False
+
+
+async def fetch_page(client, semaphore, url, cached, retries=RETRIES):
+    """
+    Télécharge une page en requête conditionnelle.
+    Renvoie (statut, contenu, etag, last_modified) ; contenu vide pour une réponse 304.
+    """
+    headers = {}
+    if cached:
+        etag, last_modified = cached[0], cached[1]
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                response = await client.get(url, headers=headers)
+            if response.status_code in RETRY_STATUSES:
+                response.raise_for_status()
+            return (
+                response.status_code, response.content,
+                response.headers.get('ETag'), response.headers.get('Last-Modified'),
+            )
+        except (httpx.TransportError, httpx.HTTPStatusError):
+            if attempt == retries:
+                raise
+            # Attente croissante hors sémaphore avant une nouvelle tentative
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+async def check_prices(rows, cache, pool):
+    """
+    Prix affiché sur la page de chaque produit.
+
+    rows : (ID_Produit, URL_Produit, Prix) ; cache : URL -> (ETag, Last-Modified, Prix_Page).
+    Renvoie une liste de (ID_Produit, prix_page | None, entrée de cache à écrire | None,
+    page inchangée (304), erreur | None). PRIX_INTROUVABLE n'est renvoyé que pour une
+    page obtenue sans prix ou une réponse 404 / 410.
+    Les pages sont analysées dans le pool de processus au fil des téléchargements.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+
+    async def check(id_produit, url):
+        cached = cache.get(url)
+        try:
+            status, content, etag, last_modified = await fetch_page(client, semaphore, url, cached)
+        except httpx.HTTPError as e:
+            return id_produit, None, None, False, e
+        if status == 304 and cached:
+            return id_produit, cached[2], None, True, None
+        if status in GONE_STATUSES:
+            return id_produit, str(PRIX_INTROUVABLE), None, False, None
+        if status != 200:
+            # Réponse inattendue (403, 304 sans validateur...) : le produit n'est pas modifié
+            return id_produit, None, None, False, f"HTTP {status}"
+        prix_page = await loop.run_in_executor(pool, extract_price, content)
+        entry = (url, etag, last_modified, prix_page) if status == 200 and (etag or last_modified) else None
+        return id_produit, prix_page, entry, False, None
+
+    async with httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=TIMEOUT,
+        limits=limits,
+        headers={'User-Agent': USER_AGENT},
+    ) as client:
+        return await asyncio.gather(*[check(id_produit, url) for id_produit, url, _ in rows])
+
+
+def run(cnxn):
+    """Remplace le prix des produits du dernier scraping par le prix affiché sur leur page."""
+    cursor = cnxn.cursor()
+    cursor.execute(CREATE_TABLE)
+    cnxn.commit()
+
+    # Produits du dernier scraping et validateurs HTTP de leurs pages
+    cursor.execute("""
+    SELECT p.ID_Produit, p.URL_Produit, p.Prix, c.ETag, c.Last_Modified, c.Prix_Page
+    FROM Produit AS p
+    LEFT JOIN Page_Prix AS c ON c.URL_Produit = p.URL_Produit
+    WHERE p.Date_scrap = (SELECT MAX(Date_scrap) FROM Produit)
+    """)
+    rows, cache = [], {}
+    for id_produit, url_produit, prix, etag, last_modified, prix_page in cursor.fetchall():
+        rows.append((id_produit, url_produit, prix))
+        if prix_page is not None:
+            cache[url_produit] = (etag, last_modified, prix_page)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as pool:
+        results = asyncio.run(check_prices(rows, cache, pool))
+    duration = time.perf_counter() - start
+
+    prix_en_base = {id_produit: prix for id_produit, _, prix in rows}
+    changes, entries = [], {}
+    errors = not_modified = 0
+    for id_produit, prix_page, entry, unchanged, error in results:
+        if error is not None:
+            # Page injoignable après les nouvelles tentatives (délai, 429, 5xx) : le produit
+            # est laissé tel quel, une panne passagère du site ne doit pas le faire supprimer
+            # par 6_delete_price_666.py
+            errors += 1
+            print(f"Une erreur s'est produite lors de la vérification du produit {id_produit} : {error!r}")
+            continue
+        not_modified += unchanged
+        if entry is not None:
+            entries[entry[0]] = entry
+        # Comparer le prix de la page avec le prix dans la base de données
+        if not same_price(prix_en_base[id_produit], prix_page):
+            changes.append((id_produit, prix_page))
+
+    # Mettre à jour en une fois les prix modifiés et les validateurs des pages
+    if changes or entries:
+        cursor.execute(CREATE_STAGING)
+        cursor.fast_executemany = True
+        if changes:
+            cursor.executemany("INSERT INTO #Prix_Verifie (ID_Produit, Prix) VALUES (?, ?)", changes)
+            cursor.execute(UPDATE_PRICES)
+        if entries:
+            cursor.executemany(
+                "INSERT INTO #Page_Prix (URL_Produit, ETag, Last_Modified, Prix_Page) VALUES (?, ?, ?, ?)",
+                list(entries.values()),
+            )
+            cursor.execute(MERGE_CACHE)
+        cursor.execute("DROP TABLE #Prix_Verifie; DROP TABLE #Page_Prix;")
+    cnxn.commit()
+
+    pages_per_second = len(rows) / duration if duration else 0.0
+    print(
+        f"{len(rows)} pages vérifiées en {duration:.1f}s ({pages_per_second:.1f} pages/s) : "
+        f"{not_modified} inchangées (304), {len(changes)} prix mis à jour, {errors} erreurs"
+    )
+    return {
+        "rows": len(rows),
+        "not_modified": not_modified,
+        "updated": len(changes),
+        "errors": errors,
+        "pages_per_second": round(pages_per_second, 1),
+    }
+
+
+if __name__ == "__main__":
+    cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+    try:
+        run(cnxn)
+    finally:
+        cnxn.close()
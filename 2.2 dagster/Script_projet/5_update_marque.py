@@ -2,13 +2,6 @@ import os
 from dotenv import load_dotenv
 import pyodbc
 
-import pyodbc
-import requests
-
-from lxml import html
-import requests
-import pyodbc
-
 
 # Charger les variables d'environnement
 load_dotenv()
@@ -20,21 +13,31 @@ password = os.getenv('DB_PASSWORD')
 
 driver= '{ODBC Driver 17 for SQL Server}'
 
-cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
-cursor = cnxn.cursor()
 
+def run(cnxn):
+    """Renseigne la marque (premier mot du descriptif) des produits qui n'en ont pas."""
+    cursor = cnxn.cursor()
+
+    # Mise à jour de la colonne Marque dans la table Produit
+    cursor.execute("""
+    UPDATE Produit
+    SET Marque = CASE 
+        WHEN CHARINDEX(' ', Descriptif) > 0 THEN LEFT(Descriptif, CHARINDEX(' ', Descriptif) - 1)
+        ELSE Descriptif
+    END
+    WHERE Marque IS NULL OR Marque = ''
+    """)
+    row_count = cursor.rowcount
+
+    cnxn.commit()
+    return {"rows": row_count}
 
-# Mise à jour de la colonne Marque dans la table Produit
-cursor.execute("""
-UPDATE Produit
-SET Marque = CASE 
-    WHEN CHARINDEX(' ', Descriptif) > 0 THEN LEFT(Descriptif, CHARINDEX(' ', Descriptif) - 1)
-    ELSE Descriptif
-END
-WHERE Marque IS NULL OR Marque = ''
-""")
 
-cnxn.commit()
-cnxn.close()
+if __name__ == "__main__":
+    cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+    try:
+        run(cnxn)
+    finally:
+        cnxn.close()
 
-print("La colonne 'Marque' a été mise à jour avec succès.")
+    print("La colonne 'Marque' a été mise à jour avec succès.")
@@ -6,8 +6,6 @@ import logging
 # Charger les variables d'environnement
 load_dotenv()
 
-# Configuration du système de journalisation
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 server = os.getenv('DB_SERVER')
@@ -17,9 +15,9 @@ password = os.getenv('DB_PASSWORD')
 
 driver = '{ODBC Driver 17 for SQL Server}'
 
-try:
-    # Connexion à la base de données
-    cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+
+def run(cnxn):
+    """Supprime les produits dont le prix n'a pas été trouvé (Prix = 666) et leurs lignes liées."""
     cursor = cnxn.cursor()
 
     # Suppression des lignes correspondantes dans la table Caracteristiques
@@ -49,17 +47,30 @@ try:
         DELETE FROM Produit
         WHERE Prix = 666
     """)
+    row_count = cursor.rowcount
     logger.info("Lignes supprimées dans la table 'Produit' avec 'Prix' = 666.")
 
     # Valider les modifications
     cnxn.commit()
     logger.info("Les modifications ont été validées.")
+    return {"rows": row_count}
+
+
+if __name__ == "__main__":
+    # Configuration du système de journalisation
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    cnxn = None
+    try:
+        # Connexion à la base de données
+        cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+        run(cnxn)
 
-except Exception as e:
-    logger.error(f"Une erreur s'est produite : {e}")
+    except Exception as e:
+        logger.error(f"Une erreur s'est produite : {e}")
 
-finally:
-    # Fermer la connexion
-    if cnxn:
-        cnxn.close()
-        logger.info("La connexion à la base de données a été fermée.")
+    finally:
+        # Fermer la connexion
+        if cnxn:
+            cnxn.close()
+            logger.info("La connexion à la base de données a été fermée.")
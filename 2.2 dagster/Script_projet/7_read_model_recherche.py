@@ -0,0 +1,116 @@
+import os
+from dotenv import load_dotenv
+import pyodbc
+import logging
+
+# Charger les variables d'environnement
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+server = os.getenv('DB_SERVER')
+database = os.getenv('DB_DATABASE')
+username = os.getenv('DB_USERNAME')
+password = os.getenv('DB_PASSWORD')
+
+driver = '{ODBC Driver 17 for SQL Server}'
+
+# Modèle de lecture dénormalisé utilisé par l'API (/produits/recherche) :
+# une ligne par produit du dernier scraping, caractéristiques et dimensions incluses,
+# pour filtrer et compter les facettes sans jointure à chaque requête.
+CREATE_TABLE = """
+IF OBJECT_ID('Produit_Recherche', 'U') IS NULL
+BEGIN
+    CREATE TABLE Produit_Recherche (
+        ID_Produit INT NOT NULL PRIMARY KEY,
+        URL_Produit VARCHAR(500),
+        Prix INT,
+        Descriptif VARCHAR(500),
+        Marque VARCHAR(200),
+        Note VARCHAR(50),
+        Date_scrap DATE,
+        Saisonalite VARCHAR(50),
+        Type_Vehicule VARCHAR(50),
+        Runflat VARCHAR(50),
+        Consommation CHAR(1),
+        Indice_Pluie CHAR(1),
+        Bruit INT,
+        Largeur INT,
+        Hauteur INT,
+        Diametre INT,
+        Charge INT,
+        Vitesse CHAR(1)
+    );
+
+    -- Index columnstore : filtres multiples et comptage des facettes (GROUPING SETS) en mode batch
+    CREATE NONCLUSTERED COLUMNSTORE INDEX NCCI_Produit_Recherche
+        ON Produit_Recherche (
+            Prix, Marque, Saisonalite, Type_Vehicule, Runflat, Consommation, Indice_Pluie,
+            Largeur, Hauteur, Diametre, Charge, Vitesse
+        );
+END
+"""
+
+# Une seule ligne Caracteristiques / Dimensions par produit (TOP 1) pour respecter la clé primaire
+REBUILD = """
+DELETE FROM Produit_Recherche;
+
+INSERT INTO Produit_Recherche (
+    ID_Produit, URL_Produit, Prix, Descriptif, Marque, Note, Date_scrap,
+    Saisonalite, Type_Vehicule, Runflat, Consommation, Indice_Pluie, Bruit,
+    Largeur, Hauteur, Diametre, Charge, Vitesse
+)
+SELECT p.ID_Produit, p.URL_Produit, p.Prix, p.Descriptif, p.Marque, p.Note, p.Date_scrap,
+       c.Saisonalite, c.Type_Vehicule, c.Runflat, c.Consommation, c.Indice_Pluie, c.Bruit,
+       d.Largeur, d.Hauteur, d.Diametre, d.Charge, d.Vitesse
+FROM Produit AS p
+OUTER APPLY (
+    SELECT TOP 1 Saisonalite, Type_Vehicule, Runflat, Consommation, Indice_Pluie, Bruit
+    FROM Caracteristiques
+    WHERE ID_Produit = p.ID_Produit
+) AS c
+OUTER APPLY (
+    SELECT TOP 1 Largeur, Hauteur, Diametre, Charge, Vitesse
+    FROM Dimensions
+    WHERE ID_Produit = p.ID_Produit
+) AS d
+WHERE p.Date_scrap = (SELECT MAX(Date_scrap) FROM Produit);
+"""
+
+def run(cnxn):
+    """Reconstruit la table Produit_Recherche à partir du dernier scraping."""
+    cursor = cnxn.cursor()
+
+    cursor.execute(CREATE_TABLE)
+    cnxn.commit()
+
+    # Reconstruction dans une seule transaction : les lecteurs de l'API voient
+    # l'ancienne ou la nouvelle version complète de la table, jamais une table vide
+    cursor.execute(REBUILD)
+    cursor.execute("SELECT COUNT(*) FROM Produit_Recherche")
+    row_count = cursor.fetchone()[0]
+    cnxn.commit()
+    logger.info("Table 'Produit_Recherche' reconstruite.")
+    return {"rows": row_count}
+
+
+if __name__ == "__main__":
+    # Configuration du système de journalisation
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    cnxn = None
+    try:
+        # Connexion à la base de données
+        cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+        row_count = run(cnxn)["rows"]
+        print(f"{row_count} lignes dans le modèle de lecture")
+
+    except Exception as e:
+        logger.error(f"Une erreur s'est produite : {e}")
+        raise
+
+    finally:
+        # Fermer la connexion
+        if cnxn:
+            cnxn.close()
+            logger.info("La connexion à la base de données a été fermée.")
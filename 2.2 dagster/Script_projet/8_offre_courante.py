@@ -0,0 +1,117 @@
+import os
+from dotenv import load_dotenv
+import pyodbc
+import logging
+
+# Charger les variables d'environnement
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+server = os.getenv('DB_SERVER')
+database = os.getenv('DB_DATABASE')
+username = os.getenv('DB_USERNAME')
+password = os.getenv('DB_PASSWORD')
+
+driver = '{ODBC Driver 17 for SQL Server}'
+
+# Offre courante : une ligne par URL avec le dernier prix connu, le prix précédent
+# et les dates de première / dernière apparition. Lue par l'API (/search?latest_only=true)
+# à la place de l'historique complet de Produit.
+CREATE_TABLE = """
+IF OBJECT_ID('Offre_Courante', 'U') IS NULL
+BEGIN
+    CREATE TABLE Offre_Courante (
+        URL_Produit VARCHAR(500) NOT NULL PRIMARY KEY,
+        ID_Produit INT NOT NULL,
+        Prix INT,
+        Prix_precedent INT,
+        Info_generale VARCHAR(500),
+        Descriptif VARCHAR(500),
+        Note VARCHAR(50),
+        Marque VARCHAR(200),
+        Date_premiere_vue DATE NOT NULL,
+        Date_derniere_vue DATE NOT NULL
+    );
+
+    -- /search/{marque}?latest_only=true : offres d'une marque vues au dernier scraping
+    CREATE NONCLUSTERED INDEX IX_Offre_Courante_Marque_Date
+        ON Offre_Courante (Marque, Date_derniere_vue, ID_Produit)
+        INCLUDE (URL_Produit, Prix, Prix_precedent, Info_generale, Descriptif, Note, Date_premiere_vue);
+END
+"""
+
+# Mise à jour incrémentale : seuls les scrapings à partir de la dernière date intégrée
+# sont lus (tout l'historique au premier passage). Cette date est relue pour prendre en
+# compte un second passage le même jour et les prix corrigés depuis ; le MERGE est
+# idempotent. Pour chaque URL, la ligne la plus récente est retenue ; le prix précédent
+# n'est remplacé que si le prix change.
+MERGE = """
+SET NOCOUNT ON;
+
+DECLARE @derniere_date DATE = (SELECT MAX(Date_derniere_vue) FROM Offre_Courante);
+
+WITH Nouveaux AS (
+    SELECT ID_Produit, URL_Produit, Prix, Info_generale, Descriptif, Note, Marque, Date_scrap,
+           MIN(Date_scrap) OVER (PARTITION BY URL_Produit) AS Date_premiere_vue,
+           ROW_NUMBER() OVER (PARTITION BY URL_Produit ORDER BY Date_scrap DESC, ID_Produit DESC) AS rn
+    FROM Produit
+    WHERE URL_Produit IS NOT NULL
+      AND (@derniere_date IS NULL OR Date_scrap >= @derniere_date)
+)
+MERGE Offre_Courante AS cible
+USING (SELECT * FROM Nouveaux WHERE rn = 1) AS source
+ON cible.URL_Produit = source.URL_Produit
+WHEN MATCHED THEN
+    UPDATE SET
+        Prix_precedent = CASE WHEN cible.Prix <> source.Prix THEN cible.Prix ELSE cible.Prix_precedent END,
+        Prix = source.Prix,
+        ID_Produit = source.ID_Produit,
+        Info_generale = source.Info_generale,
+        Descriptif = source.Descriptif,
+        Note = source.Note,
+        Marque = source.Marque,
+        Date_derniere_vue = source.Date_scrap
+WHEN NOT MATCHED BY TARGET THEN
+    INSERT (URL_Produit, ID_Produit, Prix, Prix_precedent, Info_generale, Descriptif, Note, Marque,
+            Date_premiere_vue, Date_derniere_vue)
+    VALUES (source.URL_Produit, source.ID_Produit, source.Prix, NULL, source.Info_generale,
+            source.Descriptif, source.Note, source.Marque, source.Date_premiere_vue, source.Date_scrap);
+
+SELECT @@ROWCOUNT;
+"""
+
+def run(cnxn):
+    """Met à jour Offre_Courante avec les scrapings depuis la dernière date intégrée."""
+    cursor = cnxn.cursor()
+
+    cursor.execute(CREATE_TABLE)
+    cnxn.commit()
+
+    cursor.execute(MERGE)
+    row_count = cursor.fetchone()[0]
+    cnxn.commit()
+    logger.info("Table 'Offre_Courante' mise à jour.")
+    return {"rows": row_count}
+
+
+if __name__ == "__main__":
+    # Configuration du système de journalisation
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    cnxn = None
+    try:
+        # Connexion à la base de données
+        cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+        row_count = run(cnxn)["rows"]
+        print(f"{row_count} offres insérées ou mises à jour")
+
+    except Exception as e:
+        logger.error(f"Une erreur s'est produite : {e}")
+        raise
+
+    finally:
+        # Fermer la connexion
+        if cnxn:
+            cnxn.close()
+            logger.info("La connexion à la base de données a été fermée.")
@@ -0,0 +1,195 @@
+import os
+import time
+import logging
+from dotenv import load_dotenv
+import pyodbc
+from twisted.internet import task
+
+# Charger les variables d'environnement
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+server = os.getenv('DB_SERVER')
+database = os.getenv('DB_DATABASE')
+username = os.getenv('DB_USERNAME')
+password = os.getenv('DB_PASSWORD')
+
+driver = '{ODBC Driver 17 for SQL Server}'
+
+# Taille des lots et délai maximal (s) avant l'écriture d'un lot incomplet
+BATCH_SIZE = int(os.getenv('SCRAPY_BATCH_SIZE', '500'))
+FLUSH_INTERVAL = float(os.getenv('SCRAPY_FLUSH_INTERVAL', '30'))
+
+# Table de transit de la session : un lot y est chargé en un seul envoi
+# (fast_executemany), avec le numéro de ligne qui relie produit et caractéristiques.
+# Types texte comme les paramètres envoyés auparavant : les conversions vers les
+# colonnes de Produit, Caracteristiques et Dimensions restent celles de SQL Server.
+CREATE_STAGING = """
+IF OBJECT_ID('tempdb..#Produit_Lot') IS NULL
+    CREATE TABLE #Produit_Lot (
+        Num_Ligne INT NOT NULL PRIMARY KEY,
+        URL_Produit VARCHAR(500),
+        Prix VARCHAR(50),
+        Info_generale VARCHAR(500),
+        Descriptif VARCHAR(500),
+        Note VARCHAR(50),
+        Date_scrap VARCHAR(10),
+        Consommation VARCHAR(10),
+        Indice_Pluie VARCHAR(10),
+        Bruit VARCHAR(20),
+        Saisonalite VARCHAR(50),
+        Type_Vehicule VARCHAR(50),
+        Runflat VARCHAR(50),
+        Largeur VARCHAR(10),
+        Hauteur VARCHAR(10),
+        Diametre VARCHAR(10),
+        Charge VARCHAR(10),
+        Vitesse VARCHAR(10)
+    );
+"""
+
+STAGING_COLUMNS = (
+    "Num_Ligne", "URL_Produit", "Prix", "Info_generale", "Descriptif", "Note", "Date_scrap",
+    "Consommation", "Indice_Pluie", "Bruit", "Saisonalite", "Type_Vehicule", "Runflat",
+    "Largeur", "Hauteur", "Diametre", "Charge", "Vitesse",
+)
+
+INSERT_STAGING = (
+    f"INSERT INTO #Produit_Lot ({', '.join(STAGING_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in STAGING_COLUMNS)})"
+)
+
+# Insertion ensembliste du lot. MERGE ... ON 1 = 0 insère toutes les lignes et,
+# contrairement à INSERT, permet de renvoyer dans OUTPUT une colonne de la source :
+# on obtient la correspondance Num_Ligne -> ID_Produit sans SELECT @@IDENTITY par produit.
+FLUSH_BATCH = """
+SET NOCOUNT ON;
+
+DECLARE @ids TABLE (Num_Ligne INT NOT NULL PRIMARY KEY, ID_Produit INT NOT NULL);
+
+MERGE Produit AS cible
+USING #Produit_Lot AS source
+ON 1 = 0
+WHEN NOT MATCHED THEN
+    INSERT (URL_Produit, Prix, Info_generale, Descriptif, Note, Date_scrap)
+    VALUES (source.URL_Produit, source.Prix, source.Info_generale, source.Descriptif,
+            source.Note, source.Date_scrap)
+OUTPUT source.Num_Ligne, INSERTED.ID_Produit INTO @ids (Num_Ligne, ID_Produit);
+
+INSERT INTO Caracteristiques (Consommation, Indice_Pluie, Bruit, ID_Produit, Saisonalite, Type_Vehicule, Runflat)
+SELECT l.Consommation, l.Indice_Pluie, l.Bruit, i.ID_Produit, l.Saisonalite, l.Type_Vehicule, l.Runflat
+FROM #Produit_Lot AS l
+JOIN @ids AS i ON i.Num_Ligne = l.Num_Ligne;
+
+INSERT INTO Dimensions (Largeur, Hauteur, Diametre, Charge, Vitesse, ID_Produit)
+SELECT l.Largeur, l.Hauteur, l.Diametre, l.Charge, l.Vitesse, i.ID_Produit
+FROM #Produit_Lot AS l
+JOIN @ids AS i ON i.Num_Ligne = l.Num_Ligne;
+
+TRUNCATE TABLE #Produit_Lot;
+"""
+
+
+def item_row(num_ligne, item):
+    """Valeurs d'un item du spider dans l'ordre de STAGING_COLUMNS."""
+    return (
+        num_ligne, item["url-produit"], item["Prix"], item["Info_generale"], item["Descriptif"],
+        item["Note"], item["Date_scrap"], item["Consommation"], item["Indice_Pluie"], item["Bruit"],
+        item["Saisonalite"], item["Type_Vehicule"], item["Runflat"], item["Largeur"],
+        item["Hauteur"], item["Diametre"], item["Charge"], item["Vitesse"],
+    )
+
+
+class CarterCashBatchPipeline:
+    """
+    Écrit les items du spider carter par lots : une connexion pour tout le crawl,
+    un chargement en masse dans #Produit_Lot puis trois insertions ensemblistes et
+    un commit par lot, au lieu de trois INSERT, d'un SELECT @@IDENTITY et d'un commit par pneu.
+
+    Activé dans settings.py (ITEM_PIPELINES). Un lot est écrit dès qu'il atteint
+    SCRAPY_BATCH_SIZE items, au plus tard SCRAPY_FLUSH_INTERVAL secondes après
+    le précédent, et à la fermeture du spider.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, stats=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = stats
+        self.buffer = []
+        self.cnxn = None
+        self.cursor = None
+        self._timer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint('SCRAPY_BATCH_SIZE', BATCH_SIZE),
+            flush_interval=crawler.settings.getfloat('SCRAPY_FLUSH_INTERVAL', FLUSH_INTERVAL),
+            stats=crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        self.cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
+        self.cursor = self.cnxn.cursor()
+        self.cursor.fast_executemany = True
+        self.cursor.execute(CREATE_STAGING)
+        self.cnxn.commit()
+        if self.flush_interval > 0:
+            # Exécuté par le réacteur, comme process_item : pas d'accès concurrent au tampon
+            self._timer = task.LoopingCall(self.flush)
+            self._timer.start(self.flush_interval, now=False)
+
+    def process_item(self, item, spider):
+        self.buffer.append(item)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        return item
+
+    def close_spider(self, spider):
+        if self._timer is not None and self._timer.running:
+            self._timer.stop()
+        try:
+            self.flush()
+        finally:
+            self.cnxn.close()
+
+    def flush(self):
+        """Écrit le tampon courant en base (sans effet s'il est vide)."""
+        if not self.buffer:
+            return
+        items, self.buffer = self.buffer, []
+        rows = [item_row(num_ligne, item) for num_ligne, item in enumerate(items)]
+        start = time.perf_counter()
+        try:
+            self._write(rows)
+        except pyodbc.Error as e:
+            # Un lot refusé (valeur non convertible...) est réécrit ligne par ligne :
+            # seuls les items en erreur sont perdus, comme avec l'insertion item par item
+            logger.warning(f"Lot de {len(rows)} produits refusé ({e}), écriture ligne par ligne")
+            written = 0
+            for row in rows:
+                try:
+                    self._write([row])
+                    written += 1
+                except pyodbc.Error as e:
+                    logger.error(f"Produit non inséré {row[1]} : {e}")
+                    self._inc_stat('carter/items_failed')
+            rows = rows[:written]
+        self._inc_stat('carter/items_inserted', len(rows))
+        self._inc_stat('carter/batches')
+        logger.info(f"{len(rows)} produits insérés en {time.perf_counter() - start:.2f}s")
+
+    def _write(self, rows):
+        try:
+            self.cursor.executemany(INSERT_STAGING, rows)
+            self.cursor.execute(FLUSH_BATCH)
+            self.cnxn.commit()
+        except pyodbc.Error:
+            # Annule aussi le chargement de #Produit_Lot (créée dans une transaction antérieure)
+            self.cnxn.rollback()
+            raise
+
+    def _inc_stat(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
@@ -0,0 +1,19 @@
+# Réglages Scrapy du projet leboncoin (spider carter)
+
+BOT_NAME = "leboncoin"
+
+SPIDER_MODULES = ["leboncoin.spiders"]
+NEWSPIDER_MODULE = "leboncoin.spiders"
+
+# Écriture des items en base par lots (voir leboncoin/pipelines.py)
+ITEM_PIPELINES = {
+    "leboncoin.pipelines.CarterCashBatchPipeline": 300,
+}
+
+# Taille des lots et délai maximal (s) avant l'écriture d'un lot incomplet ;
+# les variables d'environnement du même nom servent de valeur par défaut
+# SCRAPY_BATCH_SIZE = 500
+# SCRAPY_FLUSH_INTERVAL = 30
+
+REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
+FEED_EXPORT_ENCODING = "utf-8"
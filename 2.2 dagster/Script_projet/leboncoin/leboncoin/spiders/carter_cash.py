@@ -1,6 +1,4 @@
 import os
-from dotenv import load_dotenv
-import pyodbc
 import scrapy
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import CrawlSpider, Rule
@@ -8,27 +6,9 @@ import subprocess
 from datetime import datetime
 
 
-# Charger les variables d'environnement
-
-
-import os
-from dotenv import load_dotenv
-import pyodbc
-
-# Charger les variables d'environnement
-load_dotenv()
-server = os.getenv('DB_SERVER')
-database = os.getenv('DB_DATABASE')
-username = os.getenv('DB_USERNAME')
-password = os.getenv('DB_PASSWORD')
-
-driver= '{ODBC Driver 17 for SQL Server}'
-
-cnxn = pyodbc.connect('DRIVER='+driver+';SERVER='+server+';PORT=1433;DATABASE='+database+';UID='+username+';PWD='+ password)
-cursor = cnxn.cursor()
-
 def run_spider():
-    subprocess.run(["scrapy", "crawl", "carter"])
+    # Lancé depuis le projet Scrapy : settings.py active leboncoin.pipelines
+    subprocess.run(["scrapy", "crawl", "carter"], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
 
 class ImmoSpider(CrawlSpider):
     name = "carter"
@@ -140,37 +120,8 @@ class ImmoSpider(CrawlSpider):
 
 
 
-        # Insérer les données dans la base de données
-        # print(f"Inserting into Produit: {item['url-produit'],item['Prix'], item['Info_generale'], item['Descriptif'], item['Saisonalite'], item['Type_Vehicule'], item['Runflat'], item['Note'], item['Date_scrap']}")
-        cursor.execute("""
-        INSERT INTO Produit (URL_Produit, Prix, Info_generale, Descriptif, Note, Date_scrap)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, item["url-produit"], item["Prix"], item["Info_generale"], item["Descriptif"], item["Note"], item["Date_scrap"])
-
-        # Récupérer l'ID du produit inséré
-        ID_Produit = cursor.execute("SELECT @@IDENTITY AS ID").fetchone()[0]
-
-        # print(f"Inserting into Prix: {item['Prix'], ID_Produit}")
-        # cursor.execute("""
-        # INSERT INTO Prix (Prix, ID_Produit)
-        # VALUES (?, ?)
-        # """, item["Prix"], ID_Produit)
-
-        # print(f"Inserting into Caracteristiques: {item['Consommation'], item['Indice_Pluie'], item['Bruit'], ID_Produit}")
-        cursor.execute("""
-        INSERT INTO Caracteristiques (Consommation, Indice_Pluie, Bruit, ID_Produit, Saisonalite, Type_Vehicule, Runflat)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, item["Consommation"], item["Indice_Pluie"], item["Bruit"], ID_Produit, item["Saisonalite"], item["Type_Vehicule"], item["Runflat"])
-
-        # print(f"Inserting into Dimensions: {item['Largeur'], item['Hauteur'], item['Diametre'], item['Charge'], item['Vitesse'], ID_Produit}")
-        cursor.execute("""
-        INSERT INTO Dimensions (Largeur, Hauteur, Diametre, Charge, Vitesse, ID_Produit)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, item["Largeur"], item["Hauteur"], item["Diametre"], item["Charge"], item["Vitesse"], ID_Produit)
-
-        cnxn.commit()
-
-
+        # Écriture en base par lots : leboncoin.pipelines.CarterCashBatchPipeline (settings.py)
         return item
 
-run_spider()
\ No newline at end of file
+if __name__ == "__main__":
+    run_spider()
@@ -1,13 +1,80 @@
-import subprocess
-from typing import List
-from dagster import asset, AssetExecutionContext, define_asset_job, Definitions, ScheduleDefinition, AssetSelection, Failure
-from dagster import asset, AssetIn
-
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-from Script_projet.leboncoin.leboncoin.spiders.carter_cash import ImmoSpider
-from dagster import Failure
+import importlib
 import os
+import subprocess
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import pyodbc
+from pydantic import PrivateAttr
+from dagster import asset, AssetIn, AssetExecutionContext, define_asset_job, Definitions, ScheduleDefinition, AssetSelection, Failure
+from dagster import ConfigurableResource, InitResourceContext, Output, in_process_executor
+
+# Charger les variables d'environnement
+load_dotenv()
+
+
+class SqlServerResource(ConfigurableResource):
+    """
+    Connexion SQL Server partagée par les étapes du job.
+
+    Les étapes s'exécutent dans le processus Dagster (in_process_executor) : la ressource
+    est initialisée une fois par run et toutes les étapes réutilisent la même connexion,
+    ouverte à la première étape et fermée en fin de run. Après une erreur, la connexion
+    est fermée et l'étape suivante en ouvre une nouvelle.
+    """
+
+    server: str
+    database: str
+    username: str
+    password: str
+    driver: str = '{ODBC Driver 17 for SQL Server}'
+
+    _cnxn = PrivateAttr(default=None)
+
+    def setup_for_execution(self, context: InitResourceContext) -> None:
+        self._cnxn = None
+
+    def teardown_after_execution(self, context: InitResourceContext) -> None:
+        self._close()
+
+    def _close(self):
+        if self._cnxn is not None:
+            try:
+                self._cnxn.close()
+            except pyodbc.Error:
+                pass
+            self._cnxn = None
+
+    @contextmanager
+    def get_connection(self):
+        if self._cnxn is None:
+            self._cnxn = pyodbc.connect('DRIVER='+self.driver+';SERVER='+self.server+';PORT=1433;DATABASE='+self.database+';UID='+self.username+';PWD='+ self.password)
+        try:
+            yield self._cnxn
+        except Exception:
+            # Transaction en cours annulée avec la connexion : état non garanti pour l'étape suivante
+            self._close()
+            raise
+
+
+def run_step(context: AssetExecutionContext, db: SqlServerResource, script: str) -> Output:
+    """
+    Exécute la fonction run(cnxn) de Script_projet/<script>.py et renvoie son résultat
+    (nombre de lignes...) et sa durée en métadonnées de l'asset.
+    """
+    context.log.info(f"Début de l'exécution de {script}.py")
+    start = time.perf_counter()
+    try:
+        # Noms de modules commençant par un chiffre : import par importlib
+        step = importlib.import_module(f"Script_projet.{script}")
+        with db.get_connection() as cnxn:
+            result = step.run(cnxn)
+    except Exception as e:
+        raise Failure(f"Erreur lors de l'exécution de {script}.py : {str(e)}") from e
+    duration = round(time.perf_counter() - start, 3)
+    context.log.info(f"{script}.py exécuté avec succès en {duration}s : {result}")
+    return Output(True, metadata={**result, "duration_s": duration})
+
 
 ####################################################################################################
 ################################     partie 1 scraping    ############################################
@@ -20,19 +87,22 @@ def execute_Scrapy(context: AssetExecutionContext):
     """
     context.log.info("Début de l'exécution de la tâche de scraping.")
     try:
-        # Run the Scrapy spider
+        # Le réacteur Twisted de Scrapy ne peut pas être relancé dans un même processus :
+        # le crawl reste un sous-processus, lancé depuis le dossier du projet Scrapy
+        # (sans os.chdir, les étapes suivantes s'exécutent dans ce processus)
         scrapy_project_path = "Script_projet/leboncoin/leboncoin/spiders"
 
-        # Change the current working directory to the Scrapy project directory
-        os.chdir(scrapy_project_path)
-        
         # Run the Scrapy spider
-        subprocess.run(["scrapy", "crawl", "carter"])
-
-        context.log.info("Scraping terminé avec succès.")
-        return True
+        start = time.perf_counter()
+        # Journal Scrapy non capturé (plusieurs heures de logs) : il reste visible dans les logs du run
+        result = subprocess.run(["scrapy", "crawl", "carter"], cwd=scrapy_project_path)
     except Exception as e:
         raise Failure(f"Erreur lors de l'exécution du scraping : {str(e)}")
+    if result.returncode != 0:
+        raise Failure(f"Erreur lors de l'exécution du scraping : code de retour {result.returncode}")
+
+    context.log.info("Scraping terminé avec succès.")
+    return Output(True, metadata={"duration_s": round(time.perf_counter() - start, 3)})
 
 
 ####################################################################################################
@@ -40,7 +110,7 @@ def execute_Scrapy(context: AssetExecutionContext):
 ####################################################################################################
 
 @asset(key="2_Azure_Count", group_name="azure_tasks", ins={"upstream": AssetIn(key="1_Azure_Scrapy")})
-def execute_Count(context: AssetExecutionContext, upstream: bool):
+def execute_Count(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
     """
 
    nombre de lignes injecter lors du dernier scraping 
@@ -50,19 +120,7 @@ def execute_Count(context: AssetExecutionContext, upstream: bool):
         context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
         return
     
-    context.log.info("Début de l'exécution de 1_bis_count_inject.py")
-    try:
-        result = subprocess.run(["python", "Script_projet/1_bis_count_inject.py"], capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Failure(f"Erreur lors de l'exécution de 1_bis_count_inject.py : {result.stderr}")
-        else:
-            lines_inserted = [int(s) for s in result.stdout.split() if s.isdigit()]
-            if lines_inserted:
-                context.log.info(f"{lines_inserted[0]} lignes ont été insérées.")
-            context.log.info("1_bis_count_inject.py exécuté avec succès")
-            return True
-    except FileNotFoundError as e:
-        raise Failure(f"Erreur lors de l'exécution de 1_bis_count_inject.py : {str(e)}")
+    return run_step(context, db, "1_bis_count_inject")
 
 
 ####################################################################################################
@@ -70,7 +128,7 @@ def execute_Count(context: AssetExecutionContext, upstream: bool):
 ####################################################################################################
 
 @asset(key="3_Azure_Nettoyage", group_name="azure_tasks" , ins={"upstream": AssetIn(key="2_Azure_Count")})
-def execute_Nettoyage(context: AssetExecutionContext, upstream: bool):
+def execute_Nettoyage(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
     """
 
    Nettoyage de la BDD pour avoir la bonne URL 
@@ -80,52 +138,34 @@ def execute_Nettoyage(context: AssetExecutionContext, upstream: bool):
         context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
         return
     
-    context.log.info("Début de l'exécution de 2_nettoyage.py")
-    try:
-        result = subprocess.run(["python", "Script_projet/2_nettoyage.py"], capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Failure(f"Erreur lors de l'exécution de 2_nettoyage.py : {result.stderr}")
-        else:
-            context.log.info("2_nettoyage.py exécuté avec succès")
-            return True
-    except FileNotFoundError as e:
-        raise Failure(f"Erreur lors de l'exécution de 2_nettoyage.py : {str(e)}")
+    return run_step(context, db, "2_nettoyage")
+
 
 ####################################################################################################
 ################################     Partie 4 suppresion des doublon     ###########################
 ####################################################################################################
 
 @asset(key="4_Azure_delete_doublon", group_name="azure_tasks", ins={"upstream": AssetIn(key="3_Azure_Nettoyage")})
-def execute_delete_doublon(context: AssetExecutionContext, upstream: bool):
+def execute_delete_doublon(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
     """
 
    suppresion des doublon  
+   (deux derniers scrapings ; DOUBLON_MODE=full pour tout l'historique)
 
     """
     if not upstream:
         context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
         return
     
-    context.log.info("Début de l'exécution de 3_delete_doublon.py")
-    try:
-        result = subprocess.run(["python", "Script_projet/3_delete_doublon.py"], capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Failure(f"Erreur lors de l'exécution de 3_delete_doublon.py : {result.stderr}")
-        else:
-            lines_inserted = [int(s) for s in result.stdout.split() if s.isdigit()]
-            if lines_inserted:
-                context.log.info(f"{lines_inserted[0]}  doublon  ont été supprimer de la BDD.")
-            context.log.info("3_delete_doublon.py exécuté avec succès")
-            return True
-    except FileNotFoundError as e:
-        raise Failure(f"Erreur lors de l'exécution de 3_delete_doublon.py : {str(e)}")
+    return run_step(context, db, "3_delete_doublon")
+
 
 ####################################################################################################
 ################################     Partie 5 recuperation du bon prix par url    ##################
 ####################################################################################################
 
 @asset(key="5_Azure_changement_prix", group_name="azure_tasks" , ins={"upstream": AssetIn(key="4_Azure_delete_doublon")})
-def execute_changement_prix(context: AssetExecutionContext, upstream: bool):
+def execute_changement_prix(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
     """
 
    changement de prix pour avoir les bon prix par rapport a l' URL
@@ -135,23 +175,15 @@ def execute_changement_prix(context: AssetExecutionContext, upstream: bool):
         context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
         return
     
-    context.log.info("Début de l'exécution de 4_good_price.py")
-    try:
-        result = subprocess.run(["python", "Script_projet/4_good_price.py"], capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Failure(f"Erreur lors de l'exécution de 4_good_price.py : {result.stderr}")
-        else:
-            context.log.info("4_good_price exécuté avec succès")
-            return True
-    except FileNotFoundError as e:
-        raise Failure(f"Erreur lors de l'exécution de 4_good_price.py : {str(e)}")
-    
+    return run_step(context, db, "4_good_price")
+
+
 ####################################################################################################
 ################################     Partie 6 recuperation ajout de la marque     ##################
 ####################################################################################################
 
 @asset(key="6_Azure_ajouts_marque", group_name="azure_tasks" , ins={"upstream": AssetIn(key="5_Azure_changement_prix")})
-def execute_ajouts_marque(context: AssetExecutionContext, upstream: bool):
+def execute_ajouts_marque(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
     """
 
    ajouts de la marque ( prend le 1er mots de description )
@@ -161,24 +193,15 @@ def execute_ajouts_marque(context: AssetExecutionContext, upstream: bool):
         context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
         return
     
-    context.log.info("Début de l'exécution de 5_update_marque.py")
-    try:
-        result = subprocess.run(["python", "Script_projet/5_update_marque.py"], capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Failure(f"Erreur lors de l'exécution de 5_update_marque.py : {result.stderr}")
-        else:
-            context.log.info("5_update_marque exécuté avec succès")
-            return True
-    except FileNotFoundError as e:
-        raise Failure(f"Erreur lors de l'exécution de 5_update_marque.py : {str(e)}")
-      
-    
+    return run_step(context, db, "5_update_marque")
+
+
 ####################################################################################################
 ################################     Partie 7 suppresion des prix a 666      ##################
 ####################################################################################################
 
 @asset(key="7_Azure_delete_666", group_name="azure_tasks" , ins={"upstream": AssetIn(key="6_Azure_ajouts_marque")})
-def execute_delete_666(context: AssetExecutionContext, upstream: bool):
+def execute_delete_666(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
     """
 
    suppression des prix égale à 666 
@@ -188,19 +211,44 @@ def execute_delete_666(context: AssetExecutionContext, upstream: bool):
         context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
         return
     
-    context.log.info("Début de l'exécution de 6_delete_price_666.py")
+    return run_step(context, db, "6_delete_price_666")
+
+
+####################################################################################################
+################################     Partie 8 modèle de lecture pour l'API      ##################
+####################################################################################################
+
+@asset(key="8_Azure_read_model_recherche", group_name="azure_tasks" , ins={"upstream": AssetIn(key="7_Azure_delete_666")})
+def execute_read_model_recherche(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
+    """
+
+   reconstruction de la table Produit_Recherche (recherche à facettes de l'API)
+
+    """
+    if not upstream:
+        context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
+        return
     
-    try:
-        result = subprocess.run(["python", "Script_projet/6_delete_price_666.py"], capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Failure(f"Erreur lors de l'exécution de 6_delete_price_666.py : {result.stderr}")
-        else:
-            context.log.info("5_update_marque exécuté avec succès")
-            return True
-    except FileNotFoundError as e:
-        raise Failure(f"Erreur lors de l'exécution de 6_delete_price_666.py : {str(e)}")
-      
-        
+    return run_step(context, db, "7_read_model_recherche")
+
+
+####################################################################################################
+################################     Partie 9 offre courante par URL      ########################
+####################################################################################################
+
+@asset(key="9_Azure_offre_courante", group_name="azure_tasks" , ins={"upstream": AssetIn(key="8_Azure_read_model_recherche")})
+def execute_offre_courante(context: AssetExecutionContext, upstream: bool, db: SqlServerResource):
+    """
+
+   mise à jour incrémentale de la table Offre_Courante (dernier prix par URL)
+
+    """
+    if not upstream:
+        context.log.info("La tâche précédente a échoué, donc cette tâche ne sera pas exécutée.")
+        return
+    
+    return run_step(context, db, "8_offre_courante")
+
 
 # Définition des horaires pour chaque tâche
 
@@ -217,11 +265,15 @@ def schedule_azure_test():
 
 defs = Definitions(
     assets=[execute_Scrapy, execute_Count, execute_Nettoyage, execute_delete_doublon
-            , execute_changement_prix , execute_ajouts_marque ,execute_delete_666],# ,execute_delete_666
+            , execute_changement_prix , execute_ajouts_marque ,execute_delete_666
+            , execute_read_model_recherche, execute_offre_courante],# ,execute_delete_666
     jobs=[
         define_asset_job(
             name="Azure_Test_Job",
             selection=AssetSelection.groups("azure_tasks"),
+            # Étapes enchaînées dans un seul processus : pas de démarrage d'interpréteur
+            # ni de nouvelle connexion SQL Server par asset
+            executor_def=in_process_executor,
         )
         
 
@@ -230,4 +282,12 @@ defs = Definitions(
         schedule_azure_test()
 
     ],
+    resources={
+        "db": SqlServerResource(
+            server=os.getenv('DB_SERVER', ''),
+            database=os.getenv('DB_DATABASE', ''),
+            username=os.getenv('DB_USERNAME', ''),
+            password=os.getenv('DB_PASSWORD', ''),
+        ),
+    },
 )
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Test de charge : concurrence de /search/{marque} quand la base de données est lente.
+
+Compare le comportement historique (appel pyodbc synchrone dans une route async,
+qui bloque la boucle d'événements) et le chemin actuel via database.executor.
+
+Aucune base réelle n'est nécessaire : db.get_cursor est remplacé par un curseur
+factice qui dort DB_LATENCY secondes à chaque requête.
+
+Utilisation (depuis le dossier API) :
+    python benchmark/bench_concurrency.py --latency 0.1 --concurrency 1 10 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from main import app
+from database.search import get_data_from_db
+
+
+def make_fake_get_cursor(latency):
+    @contextmanager
+    def fake_get_cursor():
+        cursor = MagicMock()
+        cursor.description = [("ID_Produit",), ("Marque",)]
+
+        def execute(*args, **kwargs):
+            time.sleep(latency)
+
+        cursor.execute.side_effect = execute
+        cursor.fetchall.return_value = [(i, "Michelin") for i in range(20)]
+        yield cursor
+    return fake_get_cursor
+
+
+# Route reproduisant l'ancien comportement (appel synchrone dans la boucle)
+@app.get("/_bench/blocking/{marque}", include_in_schema=False)
+async def blocking_search(marque: str):
+    return get_data_from_db(marque)
+
+
+async def drive(path, concurrency, requests_per_client):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": "Bearer bench"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in range(requests_per_client):
+                response = await client.get(path, headers=headers)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    total = concurrency * requests_per_client
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1, help="latence simulée d'une requête SQL (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=5, help="requêtes par client")
+    args = parser.parse_args()
+
+    with patch("database.search.db.get_cursor", make_fake_get_cursor(args.latency)):
+        print(f"{'clients':>8} | {'bloquant (req/s)':>17} | {'exécuteur (req/s)':>18}")
+        for concurrency in args.concurrency:
+            blocking = asyncio.run(drive("/_bench/blocking/Michelin", concurrency, args.requests))
+            pooled = asyncio.run(drive("/search/Michelin", concurrency, args.requests))
+            print(f"{concurrency:>8} | {blocking:>17.1f} | {pooled:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark de la sérialisation JSON d'une page de /search/{marque}.
+
+Compare, sur des lignes synthétiques au format de Produit :
+  - avant    : dict par ligne + jsonable_encoder + JSONResponse (json standard)
+  - objets   : dict par ligne + orjson (FastJSONResponse)
+  - colonnes : tuple par ligne + orjson (?columnar=true)
+et la taille du corps compressé par gzip.
+
+Utilisation (depuis le dossier API) :
+    python benchmark/bench_serialization.py --rows 1000 --iterations 200
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from responses import dumps
+
+COLUMNS = ["ID_Produit", "URL_Produit", "Prix", "Info_generale", "Descriptif", "Note", "Marque", "Date_scrap"]
+
+
+def synthetic_rows(count):
+    random.seed(42)
+    rows = []
+    for i in range(count):
+        width, height, diameter = random.choice([(205, 55, 16), (195, 65, 15), (225, 45, 17)])
+        rows.append((
+            i + 1,
+            f"https://www.carter-cash.com/pneus/michelin-primacy-4-{width}-{height}-r{diameter}-{i}",
+            random.randint(50, 250),
+            f"Pneu été {width}/{height} R{diameter} 91V",
+            f"MICHELIN PRIMACY 4 {width}/{height} R{diameter} 91V",
+            f"{random.randint(30, 50) / 10}/5",
+            "MICHELIN",
+            date(2025, 2, random.randint(1, 28)),
+        ))
+    return rows
+
+
+def before(rows):
+    payload = {"success": True, "count": len(rows), "data": [dict(zip(COLUMNS, row)) for row in rows]}
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def orjson_objects(rows):
+    payload = {"success": True, "count": len(rows), "data": [dict(zip(COLUMNS, row)) for row in rows]}
+    return dumps(payload)
+
+
+def orjson_columns(rows):
+    payload = {"success": True, "count": len(rows), "columns": COLUMNS, "rows": [tuple(row) for row in rows]}
+    return dumps(payload)
+
+
+def measure(func, rows, iterations):
+    body = func(rows)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(rows)
+    elapsed = (time.perf_counter() - start) / iterations
+    return elapsed, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="produits par page")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--gzip-level", type=int, default=6, help="niveau de compression (GZIP_COMPRESS_LEVEL)")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    print(f"{args.rows} lignes, {args.iterations} itérations\n")
+    print(f"{'mode':<10} {'ms/page':>9} {'lignes/s':>12} {'Mo/s':>8} {'octets':>10} {'gzip':>9} {'gzip ms':>8}")
+
+    reference = None
+    for name, func in (("avant", before), ("objets", orjson_objects), ("colonnes", orjson_columns)):
+        elapsed, body = measure(func, rows, args.iterations)
+        start = time.perf_counter()
+        compressed = gzip.compress(body, compresslevel=args.gzip_level)
+        gzip_time = time.perf_counter() - start
+        reference = reference or elapsed
+        print(
+            f"{name:<10} {elapsed * 1000:>9.2f} {args.rows / elapsed:>12,.0f} "
+            f"{len(body) / elapsed / 1e6:>8.1f} {len(body):>10,} {len(compressed):>9,} {gzip_time * 1000:>8.2f}"
+            f"   x{reference / elapsed:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
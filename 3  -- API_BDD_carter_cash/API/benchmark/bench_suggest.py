@@ -0,0 +1,80 @@
+"""
+Benchmark de l'index de suggestions de véhicules (database/suggest.py).
+
+Par défaut, génère un jeu synthétique de la taille de DimensionsParModel ;
+avec --from-db, charge la vraie table via la connexion configurée dans .env.
+
+Utilisation (depuis le dossier API) :
+    python benchmark/bench_suggest.py --rows 60000
+    python benchmark/bench_suggest.py --from-db
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.suggest import SuggestIndex
+from database.dimensions_index import DimensionsIndex
+
+QUERIES = ["clio iv", "C-3", "golf7", "208", "sandro", "peug", "megane 3", "x5", "tiguan", "c4 picaso"]
+
+
+def synthetic_rows(count):
+    random.seed(42)
+    brands = ["Renault", "Peugeot", "Citroen", "Dacia", "Volkswagen", "Toyota", "BMW", "Audi", "Ford", "Opel"]
+    models = ["Clio", "Megane", "Sandero", "Golf", "Polo", "Tiguan", "C3", "C4 Picasso", "208", "308",
+              "Yaris", "Corolla", "X5", "Serie 3", "A3", "Focus", "Fiesta", "Corsa", "Astra", "Captur"]
+    suffixes = ["", " II", " III", " IV", " V", " Estate", " Sport", " Hybrid"]
+    rows = []
+    for _ in range(count):
+        rows.append((
+            random.choice(brands),
+            random.choice(models) + random.choice(suffixes) + random.choice(["", "", f" {random.randint(1, 99)}"]),
+            random.randint(1995, 2024), "", 195, 55, 16
+        ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=60000, help="lignes synthétiques de DimensionsParModel")
+    parser.add_argument("--from-db", action="store_true", help="charger la vraie table DimensionsParModel")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.from_db:
+        dimensions = DimensionsIndex()
+    else:
+        rows = synthetic_rows(args.rows)
+        dimensions = DimensionsIndex(load_rows=lambda: rows, load_version=lambda: "bench")
+
+    start = time.perf_counter()
+    dimensions.refresh()
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = SuggestIndex(dimensions.vehicles())
+    build_time = time.perf_counter() - start
+
+    timings = []
+    for _ in range(args.iterations):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query, limit=10)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    print(f"lignes DimensionsParModel : {dimensions.rows}")
+    print(f"couples marque/modèle     : {len(index)}")
+    print(f"chargement de l'index     : {load_time * 1000:.1f} ms")
+    print(f"construction trigrammes   : {build_time * 1000:.1f} ms")
+    print(f"recherche p50 / p95 / p99 : {statistics.median(timings):.3f} / "
+          f"{timings[int(len(timings) * 0.95)]:.3f} / {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Test de charge du mode production : débit de l'API selon le nombre de workers gunicorn.
+
+Pour chaque nombre de workers, lance `gunicorn -c gunicorn.conf.py` sur une copie de
+l'application dont la base est simulée (curseur factice, DimensionsParModel synthétique,
+authentification court-circuitée), attend /health/ready, puis envoie des requêtes
+/dimensions_for_modele_car et /search/{marque} depuis plusieurs processus clients.
+Affiche le débit, l'accélération par rapport au premier palier, la latence p50/p99
+et la mémoire proportionnelle (PSS) moyenne par worker, qui montre le partage
+copy-on-write des données préchargées (comparer avec --no-preload).
+
+Le débit ne peut croître que jusqu'au nombre de cœurs disponibles (clients compris).
+
+Utilisation (depuis le dossier API, Linux) :
+    python benchmark/bench_workers.py --workers 1 2 4 8 --duration 10
+    python benchmark/bench_workers.py --workers 4 --no-preload
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+import httpx
+
+BRANDS = ["Michelin", "Continental", "Bridgestone", "Pirelli", "Goodyear", "Dunlop"]
+
+
+def create_app():
+    """Fabrique appelée par gunicorn ('bench_workers:create_app()') : API sans base réelle."""
+    os.environ.setdefault("RATE_LIMIT_SEARCH", "0")
+    os.environ.setdefault("DB_POOL_MIN_SIZE", "0")
+
+    from contextlib import contextmanager
+    from unittest.mock import MagicMock
+    from bench_suggest import synthetic_rows
+    from main import app
+    from database.db_connection import db
+    from database.dimensions_index import dimensions_index
+    from database.marques import brand_list
+    from database.auth import get_current_user
+    from models import User
+
+    rows = synthetic_rows(int(os.getenv("BENCH_DIMENSION_ROWS", "60000")))
+    dimensions_index._load_rows = lambda: rows
+    dimensions_index._load_version = lambda: "bench"
+    brand_list._load = lambda: BRANDS
+
+    @contextmanager
+    def fake_get_cursor():
+        cursor = MagicMock()
+        cursor.description = [(name,) for name in ("ID_Produit", "URL_Produit", "Prix", "Marque")]
+        cursor.fetchall.return_value = [
+            (i, f"https://example.com/pneu/{i}", 50 + i % 150, "Michelin") for i in range(1, 101)
+        ]
+        cursor.fetchone.return_value = ("bench", 1, None)
+        yield cursor
+
+    db.get_cursor = fake_get_cursor
+    user = User(username="bench", email="bench@example.com", full_name="Bench", hashed_password="x")
+    app.dependency_overrides[get_current_user] = lambda: user
+    return app
+
+
+def vehicle_paths(count=200):
+    from bench_suggest import synthetic_rows
+    return [
+        f"/dimensions_for_modele_car?marque={marque}&modele={modele}&annee={annee}"
+        for marque, modele, annee, *_ in random.Random(1).sample(synthetic_rows(60000), count)
+    ]
+
+
+def worker_pids(master_pid):
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def pss_mb(pid):
+    """Mémoire proportionnelle : les pages partagées sont divisées entre les processus qui les partagent."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def start_server(workers, port, preload):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{port}",
+        GUNICORN_PRELOAD="true" if preload else "false",
+    )
+    process = subprocess.Popen(
+        ["gunicorn", "-c", "gunicorn.conf.py", "--pythonpath", os.path.join(API_DIR, "benchmark"),
+         "bench_workers:create_app()"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            ready = [
+                httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1).status_code == 200
+                for _ in range(workers * 2)
+            ]
+            if all(ready) and len(worker_pids(process.pid)) == workers:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def client_process(args):
+    base_url, paths, concurrency, duration = args
+
+    async def run():
+        latencies = []
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            deadline = time.perf_counter() + duration
+
+            async def loop(offset):
+                i = offset
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    response = await client.get(paths[i % len(paths)])
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                    i += concurrency
+
+            await asyncio.gather(*[loop(i) for i in range(concurrency)])
+        return latencies
+
+    return asyncio.run(run())
+
+
+def measure(base_url, paths, clients, concurrency, duration):
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client_process, [(base_url, paths, concurrency, duration)] * clients)
+    latencies = sorted(latency for result in results for latency in result)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return len(latencies) / duration, quantiles[49] * 1000, quantiles[98] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=multiprocessing.cpu_count(), help="processus clients")
+    parser.add_argument("--concurrency", type=int, default=16, help="requêtes simultanées par client")
+    parser.add_argument("--duration", type=float, default=10.0, help="durée de chaque palier (s)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-preload", action="store_true", help="chaque worker charge ses propres données")
+    args = parser.parse_args()
+
+    paths = vehicle_paths() + [f"/search/{marque}" for marque in BRANDS] + ["/search/Inconnue"]
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"{'workers':>8} | {'req/s':>9} | {'accél.':>7} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'PSS/worker (Mo)':>16}")
+    baseline = None
+    for workers in args.workers:
+        server = start_server(workers, args.port, preload=not args.no_preload)
+        try:
+            measure(base_url, paths, args.clients, args.concurrency, 1.0)  # préchauffage
+            rps, p50, p99 = measure(base_url, paths, args.clients, args.concurrency, args.duration)
+            sizes = [size for size in map(pss_mb, worker_pids(server.pid)) if size is not None]
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        baseline = baseline or rps
+        pss = f"{sum(sizes) / len(sizes):.1f}" if sizes else "n/a"
+        print(f"{workers:>8} | {rps:>9.0f} | {rps / baseline:>6.2f}x | {p50:>9.1f} | {p99:>9.1f} | {pss:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Test de charge de l'API sur la base locale remplie par benchmark/seed_local_db.py.
+
+Envoie des requêtes à une API déjà démarrée pour chaque scénario et chaque niveau de
+concurrence (clients simultanés, chacun avec son compte USER_API) :
+- `token` : POST /token (lecture USER_API + vérification bcrypt) ;
+- `search` : GET /search/{marque} sur les marques du jeu de données ;
+- `dimensions` : GET /dimensions_for_modele_car sur des véhicules existants.
+
+Écrit la latence (moyenne, p50, p95, p99, max), le débit et les codes de statut dans
+un fichier JSON horodaté. Avec --compare, compare au résultat d'une exécution
+précédente et termine avec le code 1 si le débit baisse ou si le p95 augmente de
+plus de --threshold.
+
+Démarrer l'API sans limitation de débit, sinon les 429 sont comptés en erreurs.
+
+Utilisation (depuis le dossier API) :
+    RATE_LIMIT_SEARCH=0 gunicorn -c gunicorn.conf.py main:app
+    python benchmark/load_test.py --concurrency 1 10 50 --duration 20
+    python benchmark/load_test.py --compare benchmark/results/loadtest-20250301-101500.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import httpx
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(API_DIR, "benchmark", "results")
+
+
+def percentile(sorted_values, p):
+    """Percentile au rang le plus proche (valeurs triées)."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def make_scenarios(manifest, search_params):
+    brands, vehicles = manifest["brands"], manifest["vehicles"]
+
+    def token(rng, user):
+        return "POST", "/token", {"data": {"username": user, "password": manifest["password"]}}
+
+    def search(rng, user):
+        return "GET", f"/search/{rng.choice(brands)}", {"params": search_params}
+
+    def dimensions(rng, user):
+        marque, modele, annee = rng.choice(vehicles)
+        return "GET", "/dimensions_for_modele_car", {"params": {"marque": marque, "modele": modele, "annee": annee}}
+
+    return {"token": token, "search": search, "dimensions": dimensions}
+
+
+async def fetch_tokens(client, users, password, parallel=4):
+    # Connexions étalées : l'exécuteur bcrypt de l'API rejette les rafales (HTTP 503)
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def login(user):
+        async with semaphore:
+            response = await client.post("/token", data={"username": user, "password": password})
+        response.raise_for_status()
+        return user, response.json()["access_token"]
+
+    return dict(await asyncio.gather(*[login(user) for user in users]))
+
+
+async def run_level(client, scenario, make_request, users, tokens, concurrency, duration, seed):
+    latencies = []
+    statuses = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(i):
+        rng = random.Random(seed + i)
+        user = users[i % len(users)]
+        headers = {} if scenario == "token" else {"Authorization": f"Bearer {tokens[user]}"}
+        while time.perf_counter() < deadline:
+            method, path, kwargs = make_request(rng, user)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[virtual_user(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status not in ("200", "304"))
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "status_counts": dict(statuses),
+        "rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+            **{f"p{p}": round(percentile(latencies, p) * 1000, 2) if latencies else None for p in (50, 95, 99)},
+            "max": round(latencies[-1] * 1000, 2) if latencies else None,
+        },
+    }
+
+
+async def run(args, manifest):
+    search_params = dict(param.split("=", 1) for param in args.search_params)
+    scenarios = make_scenarios(manifest, search_params)
+    users = manifest["users"][:max(args.concurrency)]
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    results = []
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        tokens = await fetch_tokens(client, users, manifest["password"])
+        for scenario in args.scenarios:
+            for concurrency in args.concurrency:
+                # Préchauffage non mesuré (caches, pool de connexions, index)
+                await run_level(client, scenario, scenarios[scenario], users, tokens, concurrency, args.warmup, args.seed)
+                result = await run_level(
+                    client, scenario, scenarios[scenario], users, tokens, concurrency, args.duration, args.seed
+                )
+                latency = result["latency_ms"]
+                print(
+                    f"{scenario:>10} | {concurrency:>5} | {result['rps']:>8.1f} | {latency['p50']:>8} | "
+                    f"{latency['p95']:>8} | {latency['p99']:>8} | {result['errors']:>6}"
+                )
+                results.append(result)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=API_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Affiche les écarts avec une exécution précédente ; renvoie le nombre de régressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nComparaison avec {baseline_path} (seuil {threshold:.0%})")
+    for result in results:
+        previous = baseline.get((result["scenario"], result["concurrency"]))
+        if previous is None or not previous["rps"] or not previous["latency_ms"]["p95"]:
+            continue
+        rps_delta = result["rps"] / previous["rps"] - 1
+        p95_delta = result["latency_ms"]["p95"] / previous["latency_ms"]["p95"] - 1
+        regressed = rps_delta < -threshold or p95_delta > threshold
+        regressions += regressed
+        print(
+            f"{result['scenario']:>10} | {result['concurrency']:>5} | req/s {rps_delta:+.1%} | "
+            f"p95 {p95_delta:+.1%}{'  <- RÉGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default=os.path.join(RESULTS_DIR, "seed_manifest.json"))
+    parser.add_argument("--scenarios", nargs="+", choices=("token", "search", "dimensions"),
+                        default=["token", "search", "dimensions"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=20.0, help="durée mesurée par palier (s)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="préchauffage non mesuré par palier (s)")
+    parser.add_argument("--search-params", nargs="*", default=["limit=100"], help="ex. limit=100 latest_only=true")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="fichier JSON (par défaut benchmark/results/loadtest-<date>.json)")
+    parser.add_argument("--compare", help="résultat JSON d'une exécution précédente")
+    parser.add_argument("--threshold", type=float, default=0.10, help="écart toléré avant régression")
+    args = parser.parse_args()
+
+    with open(args.manifest, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if len(manifest["users"]) < max(args.concurrency):
+        sys.exit(f"Only {len(manifest['users'])} seeded users, re-seed with --users {max(args.concurrency)}")
+
+    print(f"{'scénario':>10} | {'conc.':>5} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'erreurs':>6}")
+    results = asyncio.run(run(args, manifest))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "base_url": args.base_url,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "search_params": args.search_params,
+            "volumes": manifest.get("volumes"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats : {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
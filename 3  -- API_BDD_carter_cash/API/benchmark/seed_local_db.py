@@ -0,0 +1,344 @@
+"""
+Base SQL Server locale pour les tests de charge (benchmark/load_test.py).
+
+Crée la base DB_DATABASE sur le serveur DB_SERVER (conteneur de
+benchmark/docker-compose.yml), y recrée les tables Produit, Caracteristiques,
+Dimensions, DimensionsParModel et USER_API avec le schéma de production puis les
+remplit d'un jeu de données synthétique et reproductible (graine fixe) :
+- `--urls` pneus relevés à chacun des `--scrapes` scrapings (un tous les 3 jours),
+  soit urls x scrapes lignes de Produit, Caracteristiques et Dimensions ;
+- `--vehicules` lignes de DimensionsParModel ;
+- `--users` comptes USER_API (bench_0, bench_1...) partageant le mot de passe `--password`.
+
+Applique ensuite sql/indexes.sql et construit Produit_Recherche et Offre_Courante
+avec les étapes 7 et 8 du pipeline Dagster. Les paramètres utiles au test de charge
+(comptes, marques, véhicules existants, volumes) sont écrits dans `--manifest`.
+
+Les tables existantes sont supprimées : le script refuse un serveur distant
+sauf avec --allow-remote.
+
+Utilisation (depuis le dossier API) :
+    docker compose -f benchmark/docker-compose.yml up -d
+    export DB_SERVER=localhost,1433 DB_DATABASE=carter_cash_bench DB_USERNAME=sa DB_PASSWORD='Bench_Passw0rd!'
+    python benchmark/seed_local_db.py --urls 4000 --scrapes 100 --vehicules 60000 --users 200
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(os.path.dirname(API_DIR))
+PIPELINE_DIR = os.path.join(REPO_DIR, "2.2 dagster", "Script_projet")
+sys.path.insert(0, API_DIR)
+
+import pyodbc
+from database.db_connection import db
+from database.auth import get_password_hash
+
+LOCAL_SERVERS = ("localhost", "127.0.0.1", "(local)", ".")
+
+# Schéma de production (2 -- BDD Creation_nettoyage _ CRUD_RGPD/Création _BDD.ipynb)
+SCHEMA = """
+DROP TABLE IF EXISTS Produit_Recherche;
+DROP TABLE IF EXISTS Offre_Courante;
+DROP TABLE IF EXISTS Caracteristiques;
+DROP TABLE IF EXISTS Dimensions;
+DROP TABLE IF EXISTS Produit;
+DROP TABLE IF EXISTS DimensionsParModel;
+DROP TABLE IF EXISTS USER_API;
+
+CREATE TABLE Produit (
+    ID_Produit INT PRIMARY KEY IDENTITY,
+    URL_Produit VARCHAR(200),
+    Prix INT,
+    Info_generale VARCHAR(200),
+    Descriptif VARCHAR(200),
+    Note VARCHAR(50),
+    Date_scrap DATE,
+    Marque VARCHAR(200)
+);
+
+CREATE TABLE Caracteristiques (
+    ID_Caracteristique INT PRIMARY KEY IDENTITY,
+    Consommation CHAR(1),
+    Indice_Pluie CHAR(1),
+    Bruit INT,
+    Saisonalite VARCHAR(50),
+    Type_Vehicule VARCHAR(50),
+    Runflat VARCHAR(50),
+    ID_Produit INT FOREIGN KEY REFERENCES Produit(ID_Produit)
+);
+
+CREATE TABLE Dimensions (
+    ID_Dimension INT PRIMARY KEY IDENTITY,
+    Largeur INT,
+    Hauteur INT,
+    Diametre INT,
+    Charge INT,
+    Vitesse CHAR(1),
+    ID_Produit INT FOREIGN KEY REFERENCES Produit(ID_Produit)
+);
+
+CREATE TABLE DimensionsParModel (
+    ID_DimensionModel INT PRIMARY KEY IDENTITY,
+    Marque VARCHAR(50),
+    Modele VARCHAR(50),
+    Annee INT,
+    Finition VARCHAR(250),
+    Largeur INT,
+    Hauteur INT,
+    Diametre INT
+);
+
+CREATE TABLE USER_API (
+    ID_USER_API INT PRIMARY KEY IDENTITY,
+    username VARCHAR(50),
+    email VARCHAR(150),
+    full_name VARCHAR(50),
+    hashed_password VARCHAR(200),
+    Date_Création DATE,
+    Date_Derniere_Connexion DATE
+);
+"""
+
+# Marques de pneus par popularité décroissante (poids ~ 1 / rang)
+TYRE_BRANDS = [
+    "Michelin", "Continental", "Bridgestone", "Goodyear", "Pirelli", "Dunlop", "Hankook",
+    "Kleber", "Firestone", "Uniroyal", "BFGoodrich", "Nokian", "Falken", "Kumho", "Vredestein",
+    "Toyo", "Yokohama", "Nexen", "Barum", "Semperit", "Maxxis", "Laufenn", "Kenda", "Nankang",
+    "Sailun", "Linglong", "Tracmax", "Minerva", "Imperial", "Rotalla",
+]
+TYRE_SIZES = [
+    (165, 65, 14), (175, 65, 14), (185, 65, 15), (195, 65, 15), (205, 55, 16), (215, 55, 16),
+    (205, 60, 16), (225, 45, 17), (225, 50, 17), (215, 60, 17), (235, 45, 18), (225, 40, 18),
+    (245, 40, 18), (235, 55, 19), (255, 35, 19), (245, 45, 20),
+]
+SEASONS = ["Eté", "Hiver", "4 saisons"]
+VEHICLE_TYPES = ["Tourisme", "SUV 4x4", "Utilitaire"]
+SPEED_INDEXES = "HTVWY"
+EU_CLASSES = "ABCDE"
+
+CAR_MODELS = {
+    "Renault": ["Clio", "Megane", "Captur", "Kadjar", "Scenic", "Twingo", "Zoe", "Austral"],
+    "Peugeot": ["208", "308", "2008", "3008", "5008", "508", "Partner", "Rifter"],
+    "Citroen": ["C3", "C4", "C5 Aircross", "Berlingo", "C3 Aircross", "C4 Picasso"],
+    "Dacia": ["Sandero", "Duster", "Logan", "Jogger", "Spring"],
+    "Volkswagen": ["Golf", "Polo", "Tiguan", "T-Roc", "Passat", "Touran", "ID.3"],
+    "Toyota": ["Yaris", "Corolla", "C-HR", "RAV4", "Aygo"],
+    "Ford": ["Fiesta", "Focus", "Kuga", "Puma", "Transit"],
+    "Opel": ["Corsa", "Astra", "Mokka", "Grandland", "Zafira"],
+    "BMW": ["Serie 1", "Serie 3", "Serie 5", "X1", "X3", "X5"],
+    "Audi": ["A1", "A3", "A4", "Q2", "Q3", "Q5"],
+    "Mercedes": ["Classe A", "Classe C", "Classe E", "GLA", "GLC"],
+    "Nissan": ["Micra", "Juke", "Qashqai", "X-Trail"],
+    "Fiat": ["500", "Panda", "Tipo", "Doblo"],
+    "Skoda": ["Fabia", "Octavia", "Kodiaq", "Karoq"],
+    "Seat": ["Ibiza", "Leon", "Arona", "Ateca"],
+    "Kia": ["Picanto", "Rio", "Ceed", "Sportage", "Niro"],
+    "Hyundai": ["i10", "i20", "i30", "Tucson", "Kona"],
+}
+TRIMS = ["", "Life", "Zen", "Intens", "Business", "GT Line", "Active", "Allure", "Sport", "Confort"]
+
+
+def chunks(rows, size):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(cursor, table, columns, rows, batch_size, identity_insert=False):
+    """INSERT par lots avec fast_executemany (paramètres envoyés en tableau au pilote ODBC)."""
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    cursor.fast_executemany = True
+    if identity_insert:
+        cursor.execute(f"SET IDENTITY_INSERT {table} ON")
+    count = 0
+    for batch in chunks(rows, batch_size):
+        cursor.executemany(query, batch)
+        count += len(batch)
+    if identity_insert:
+        cursor.execute(f"SET IDENTITY_INSERT {table} OFF")
+    return count
+
+
+def tyre_catalog(rng, urls):
+    """Pneus du catalogue : un par URL, avec ses caractéristiques fixes et son prix de base."""
+    weights = [1 / rank for rank in range(1, len(TYRE_BRANDS) + 1)]
+    catalog = []
+    for i in range(urls):
+        marque = rng.choices(TYRE_BRANDS, weights)[0]
+        largeur, hauteur, diametre = rng.choice(TYRE_SIZES)
+        saison = rng.choices(SEASONS, (6, 3, 2))[0]
+        premium = 1.6 - TYRE_BRANDS.index(marque) / len(TYRE_BRANDS)
+        catalog.append({
+            "url": f"https://www.carter-cash.com/pneus/{marque.lower()}-{largeur}-{hauteur}-r{diametre}-{i}",
+            "marque": marque,
+            "prix": int((diametre * 4.5 + (largeur - 150) * 0.6) * premium),
+            "info": f"Pneu {saison.lower()} {marque} {largeur}/{hauteur} R{diametre}",
+            "charge": rng.randint(82, 104),
+            "vitesse": rng.choice(SPEED_INDEXES),
+            "size": (largeur, hauteur, diametre),
+            "caracteristiques": (
+                rng.choice(EU_CLASSES), rng.choice(EU_CLASSES[:4]), rng.randint(67, 74), saison,
+                rng.choices(VEHICLE_TYPES, (8, 3, 1))[0], rng.choices(["Non", "Oui"], (9, 1))[0],
+            ),
+        })
+    return catalog
+
+
+def product_rows(rng, catalog, scrapes, start):
+    """
+    Un relevé par pneu et par scraping, dans l'ordre chronologique (comme le scraper) :
+    (ID_Produit, produit, caractéristiques, dimensions).
+    """
+    product_id = 0
+    for scrape in range(scrapes):
+        date_scrap = start + timedelta(days=3 * scrape)
+        for tyre in catalog:
+            product_id += 1
+            largeur, hauteur, diametre = tyre["size"]
+            prix = max(30, round(tyre["prix"] * rng.uniform(0.92, 1.08)))
+            note = f"{rng.choice([3.5, 4.0, 4.5, 5.0])}/5"
+            descriptif = f"{largeur}/{hauteur} R{diametre} {tyre['charge']}{tyre['vitesse']}"
+            yield (
+                product_id,
+                (product_id, tyre["url"], prix, tyre["info"], descriptif, note, date_scrap, tyre["marque"]),
+                (*tyre["caracteristiques"], product_id),
+                (largeur, hauteur, diametre, tyre["charge"], tyre["vitesse"], product_id),
+            )
+
+
+def vehicle_rows(rng, count):
+    for _ in range(count):
+        marque = rng.choice(list(CAR_MODELS))
+        largeur, hauteur, diametre = rng.choice(TYRE_SIZES)
+        yield (
+            marque, rng.choice(CAR_MODELS[marque]), rng.randint(2005, 2024),
+            rng.choice(TRIMS), largeur, hauteur, diametre,
+        )
+
+
+def run_pipeline_step(script):
+    """Étape du pipeline Dagster lancée comme par l'asset (mêmes variables DB_*)."""
+    subprocess.run([sys.executable, os.path.join(PIPELINE_DIR, script)], check=True, cwd=PIPELINE_DIR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=4000, help="pneus distincts relevés à chaque scraping")
+    parser.add_argument("--scrapes", type=int, default=100, help="nombre de scrapings (un tous les 3 jours)")
+    parser.add_argument("--vehicules", type=int, default=60000, help="lignes de DimensionsParModel")
+    parser.add_argument("--users", type=int, default=200, help="comptes USER_API")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--manifest", default=os.path.join(API_DIR, "benchmark", "results", "seed_manifest.json"))
+    parser.add_argument("--skip-read-models", action="store_true", help="ne pas lancer les étapes 7 et 8 du pipeline")
+    parser.add_argument("--allow-remote", action="store_true", help="autoriser un serveur autre que localhost")
+    args = parser.parse_args()
+
+    host = (db.server or "").split(",")[0].split("\\")[0].lower()
+    if host not in LOCAL_SERVERS and not args.allow_remote:
+        sys.exit(f"Refusing to drop and seed tables on '{db.server}' (use --allow-remote)")
+
+    # Création de la base depuis master si elle n'existe pas
+    master = db.connection_string.replace(f"DATABASE={db.database}", "DATABASE=master")
+    cnxn = pyodbc.connect(master, autocommit=True)
+    try:
+        cnxn.execute(f"IF DB_ID(?) IS NULL EXEC('CREATE DATABASE [{db.database}]')", db.database)
+    finally:
+        cnxn.close()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    cnxn = pyodbc.connect(db.connection_string)
+    try:
+        cursor = cnxn.cursor()
+        cursor.execute(SCHEMA)
+        cnxn.commit()
+
+        catalog = tyre_catalog(rng, args.urls)
+        start = date(2024, 1, 1)
+        produits = caracteristiques = dimensions = 0
+        for batch in chunks(product_rows(rng, catalog, args.scrapes, start), args.batch_size):
+            produits += bulk_insert(
+                cursor, "Produit",
+                ("ID_Produit", "URL_Produit", "Prix", "Info_generale", "Descriptif", "Note", "Date_scrap", "Marque"),
+                [row[1] for row in batch], args.batch_size, identity_insert=True
+            )
+            caracteristiques += bulk_insert(
+                cursor, "Caracteristiques",
+                ("Consommation", "Indice_Pluie", "Bruit", "Saisonalite", "Type_Vehicule", "Runflat", "ID_Produit"),
+                [row[2] for row in batch], args.batch_size
+            )
+            dimensions += bulk_insert(
+                cursor, "Dimensions",
+                ("Largeur", "Hauteur", "Diametre", "Charge", "Vitesse", "ID_Produit"),
+                [row[3] for row in batch], args.batch_size
+            )
+            cnxn.commit()
+            print(f"Produit : {produits} lignes ({time.perf_counter() - started:.0f} s)")
+
+        vehicles = list(vehicle_rows(rng, args.vehicules))
+        bulk_insert(
+            cursor, "DimensionsParModel",
+            ("Marque", "Modele", "Annee", "Finition", "Largeur", "Hauteur", "Diametre"),
+            vehicles, args.batch_size
+        )
+
+        # Un seul hachage bcrypt pour tous les comptes (même mot de passe)
+        hashed_password = get_password_hash(args.password)
+        usernames = [f"bench_{i}" for i in range(args.users)]
+        bulk_insert(
+            cursor, "USER_API",
+            ("username", "email", "full_name", "hashed_password", "Date_Création"),
+            [(name, f"{name}@example.com", f"Bench {name}", hashed_password, start) for name in usernames],
+            args.batch_size
+        )
+        cnxn.commit()
+
+        with open(os.path.join(API_DIR, "sql", "indexes.sql"), encoding="utf-8") as f:
+            cursor.execute(f.read())
+        cnxn.commit()
+    finally:
+        cnxn.close()
+
+    if not args.skip_read_models:
+        run_pipeline_step("7_read_model_recherche.py")
+        run_pipeline_step("8_offre_courante.py")
+
+    elapsed = time.perf_counter() - started
+    manifest = {
+        "seed": args.seed,
+        "volumes": {
+            "Produit": produits,
+            "Caracteristiques": caracteristiques,
+            "Dimensions": dimensions,
+            "DimensionsParModel": len(vehicles),
+            "USER_API": len(usernames),
+            "urls": args.urls,
+            "scrapes": args.scrapes,
+        },
+        "users": usernames,
+        "password": args.password,
+        "brands": sorted({tyre["marque"] for tyre in catalog}),
+        "vehicles": [list(vehicle[:3]) for vehicle in random.Random(args.seed).sample(vehicles, min(500, len(vehicles)))],
+        "seeded_in_seconds": round(elapsed, 1),
+    }
+    os.makedirs(os.path.dirname(args.manifest), exist_ok=True)
+    with open(args.manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"{produits} produits, {len(vehicles)} véhicules, {len(usernames)} comptes en {elapsed:.0f} s -> {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
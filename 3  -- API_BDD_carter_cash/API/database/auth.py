@@ -3,32 +3,80 @@ from models import User, UserCreate, PasswordChange
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from typing import Optional
+from typing import Optional, Tuple
 from .db_connection import db
-import pyodbc
+from .executor import BoundedExecutor, run_in_db
+from .cache import TTLCache
+from metrics import timed
+import hashlib
+import os
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# SÉCURITÉ : Coût bcrypt configurable ; les hachages d'un coût inférieur
+# sont considérés obsolètes et recalculés à la connexion suivante
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# PERFORMANCE : bcrypt libère le GIL, un pool de threads borné suffit
+# à sortir le hachage de la boucle d'événements
+hash_executor = BoundedExecutor(
+    "hash",
+    max_workers=int(os.getenv('HASH_WORKERS', str(os.cpu_count() or 2))),
+    max_pending=int(os.getenv('HASH_MAX_PENDING', '32')),
+)
+
 SECRET_KEY = "YOUR_SECRET_KEY"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# PERFORMANCE : utilisateurs authentifiés gardés en mémoire pour éviter
+# une requête USER_API à chaque appel protégé. Le cache est propre à chaque
+# worker : invalidate_user ne vide que celui du worker qui traite la requête.
+# Le token porte l'empreinte du mot de passe (claim "pwd") : un token émis après
+# un changement de mot de passe force la relecture de USER_API sur tous les workers,
+# et les anciens tokens sont refusés au plus tard USER_CACHE_TTL secondes après.
+user_cache = TTLCache(
+    maxsize=int(os.getenv('USER_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('USER_CACHE_TTL', '30'))
+)
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Vérifie le mot de passe et renvoie un nouveau hachage si le coût stocké est obsolète."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    with timed("auth"):
+        return await hash_executor.run(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    with timed("auth"):
+        return await hash_executor.run(verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def password_fingerprint(hashed_password: str) -> str:
+    """Empreinte courte du hachage stocké, placée dans le token (claim "pwd")."""
+    return hashlib.sha256(hashed_password.encode("utf-8")).hexdigest()[:16]
+
 def get_user(username: str):
     query = """
     SELECT username, email, full_name, hashed_password 
@@ -46,12 +94,13 @@ def get_user(username: str):
             )
     return None
 
-def create_user(user: UserCreate):
+def create_user(user: UserCreate, hashed_password: Optional[str] = None):
     query = """
     INSERT INTO USER_API (username, email, full_name, hashed_password, Date_Création)
     VALUES (?, ?, ?, ?, ?)
     """
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     current_date = datetime.now().date()
     
     with db.get_cursor() as cursor:
@@ -64,9 +113,102 @@ def create_user(user: UserCreate):
                 current_date
             ))
             return user
-        except pyodbc.IntegrityError:
+        except db.backend.integrity_errors:
             raise HTTPException(
                 status_code=400,
                 detail="Username already registered"
             )
 
+def user_exists(username: str, email: str) -> bool:
+    check_query = "SELECT 1 FROM USER_API WHERE username = ? OR email = ?"
+    with db.get_cursor() as cursor:
+        cursor.execute(check_query, (username, email))
+        return cursor.fetchone() is not None
+
+def update_last_login(username: str, new_hashed_password: Optional[str] = None):
+    """Met à jour la date de connexion (et le hachage s'il a été recalculé) en une seule requête."""
+    if new_hashed_password is None:
+        update_query = """
+        UPDATE USER_API 
+        SET Date_Derniere_Connexion = ? 
+        WHERE username = ?
+        """
+        params = (datetime.now(), username)
+    else:
+        update_query = """
+        UPDATE USER_API 
+        SET Date_Derniere_Connexion = ?, hashed_password = ? 
+        WHERE username = ?
+        """
+        params = (datetime.now(), new_hashed_password, username)
+    with db.get_cursor() as cursor:
+        cursor.execute(update_query, params)
+
+def update_password(username: str, hashed_password: str):
+    update_query = """
+    UPDATE USER_API 
+    SET hashed_password = ? 
+    WHERE username = ?
+    """
+    with db.get_cursor() as cursor:
+        cursor.execute(update_query, (hashed_password, username))
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def decode_token_claims(token: str) -> Tuple[str, Optional[str]]:
+    """Vérifie localement la signature et l'expiration du JWT et renvoie (sujet, empreinte du mot de passe)."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _credentials_exception()
+    username = payload.get("sub")
+    if not username:
+        raise _credentials_exception()
+    return username, payload.get("pwd")
+
+def decode_access_token(token: str) -> str:
+    """Vérifie localement la signature et l'expiration du JWT et renvoie son sujet."""
+    return decode_token_claims(token)[0]
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """Dépendance FastAPI : utilisateur du token, résolu via le cache puis la base."""
+    # Phase "auth" : vérification du JWT ; la lecture de USER_API est comptée en "db"
+    with timed("auth"):
+        username, fingerprint = decode_token_claims(token)
+    return await _resolve_user(username, fingerprint)
+
+def _matches(user: User, fingerprint: Optional[str]) -> bool:
+    # Tokens émis avant l'ajout du claim "pwd" : acceptés jusqu'à leur expiration
+    return fingerprint is None or password_fingerprint(user.hashed_password) == fingerprint
+
+async def _resolve_user(username: str, fingerprint: Optional[str] = None) -> User:
+    user = user_cache.get(username)
+    if user is not None and _matches(user, fingerprint):
+        return user
+
+    # Absent du cache, ou cache d'un autre worker antérieur au changement de mot de passe
+    try:
+        user = await run_in_db(get_user, username)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while processing your request"
+        )
+    if user is None:
+        raise _credentials_exception()
+    user_cache.set(username, user)
+    if not _matches(user, fingerprint):
+        # Token émis avant le dernier changement de mot de passe
+        raise _credentials_exception()
+    return user
+
+def invalidate_user(username: str):
+    """Retire un utilisateur du cache (changement de mot de passe, etc.)."""
+    user_cache.pop(username)
@@ -0,0 +1,190 @@
+# cache.py
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+import orjson
+from responses import dumps
+
+
+class TTLCache:
+    """
+    Cache en mémoire thread-safe, borné en taille (éviction LRU) et en durée (TTL).
+
+    - maxsize : nombre maximal d'entrées
+    - ttl : durée de validité d'une entrée en secondes (None = pas d'expiration)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._timer():
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+            self._misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = self._timer() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+class VersionMarker:
+    """
+    Marqueur de version des données, relu au plus une fois toutes les `interval` secondes.
+
+    `load` est une fonction sans argument renvoyant une valeur qui change lorsque
+    les données sous-jacentes changent (ex. MAX(Date_scrap) après un scraping).
+    Les fonctions `on_change` sont appelées quand la valeur lue diffère de la précédente.
+    """
+
+    def __init__(self, load, interval: float = 60.0, timer=time.monotonic):
+        self._load = load
+        self.interval = interval
+        self._timer = timer
+        self._value = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def on_change(self, callback):
+        self._listeners.append(callback)
+        return callback
+
+    def current(self) -> str:
+        with self._lock:
+            now = self._timer()
+            if self._checked_at is not None and now - self._checked_at < self.interval:
+                return self._value
+            value = str(self._load())
+            changed = self._checked_at is not None and value != self._value
+            self._value = value
+            self._checked_at = now
+        if changed:
+            for callback in self._listeners:
+                callback(value)
+        return value
+
+    def invalidate(self):
+        """Force une relecture au prochain appel."""
+        with self._lock:
+            self._checked_at = None
+
+
+class SqliteCache:
+    """
+    Cache partagé sur disque (SQLite) entre plusieurs processus d'une même machine.
+
+    Chaque entrée est associée à une version : une entrée d'une autre version est ignorée
+    et les anciennes versions sont purgées à l'écriture, comme les entrées expirées.
+    Au-delà de `maxsize` entrées, les plus anciennes (stored_at) sont supprimées.
+    """
+
+    def __init__(self, path: str, ttl: float = None, maxsize: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS cache (
+                        key TEXT PRIMARY KEY,
+                        version TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        stored_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_stored_at ON cache (stored_at)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str, version: str):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT payload, stored_at FROM cache WHERE key = ? AND version = ?",
+                (key, version)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return orjson.loads(row[0])
+
+    def set(self, key: str, version: str, value):
+        # Même sérialisation que les réponses (Decimal -> nombre, dates ISO 8601)
+        payload = dumps(value).decode("utf-8")
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM cache WHERE version != ?", (version,))
+                if self.ttl:
+                    conn.execute("DELETE FROM cache WHERE stored_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, version, payload, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, version, payload, now)
+                )
+                # Borne la taille du fichier : seules les maxsize entrées les plus récentes restent
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,)
+                )
+        finally:
+            conn.close()
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM cache")
+        finally:
+            conn.close()
@@ -1,12 +1,307 @@
 # db_connection.py
 import os
+import re
+import time
+import logging
+import threading
 import pyodbc
 from dotenv import load_dotenv
 from contextlib import contextmanager
+from metrics import record_phase, db_slow_queries_total
 
 # SÉCURITÉ : Chargement des variables d'environnement depuis .env
 load_dotenv()
 
+slow_query_logger = logging.getLogger("api.slow_query")
+
+
+class PoolTimeoutError(Exception):
+    """Levée quand aucune connexion n'a pu être obtenue du pool dans le délai imparti."""
+
+
+class _PooledConnection:
+    """Connexion pyodbc accompagnée des horodatages utiles au pool."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Pool de connexions pyodbc thread-safe.
+
+    - min_size : nombre de connexions conservées même lorsqu'elles sont inactives
+    - max_size : nombre maximal de connexions ouvertes simultanément
+    - timeout : attente maximale (secondes) pour obtenir une connexion
+    - idle_timeout : durée d'inactivité au-delà de laquelle une connexion est fermée
+    - max_lifetime : durée de vie maximale d'une connexion avant recyclage
+    - pre_ping : vérifie la connexion (SELECT 1) avant de la réutiliser
+    - errors : exceptions du pilote signalant une connexion inutilisable
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0,
+                 idle_timeout=300.0, max_lifetime=1800.0, pre_ping=True, errors=(pyodbc.Error,)):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size (0 <= min_size <= max_size, max_size >= 1)")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+        self.errors = errors
+
+        self._idle = []  # pile LIFO : la connexion la plus récente est réutilisée en premier
+        self._in_use = 0
+        self._waiting = 0
+        self._lock = threading.Condition()
+
+        # Métriques
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._failed_pings = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    @property
+    def size(self):
+        return len(self._idle) + self._in_use
+
+    def _open(self):
+        pooled = _PooledConnection(self._connect())
+        with self._lock:
+            self._created += 1
+        return pooled
+
+    def _close(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._closed += 1
+
+    def _is_expired(self, pooled, now):
+        return bool(self.max_lifetime) and now - pooled.created_at > self.max_lifetime
+
+    def _is_healthy(self, pooled):
+        if not self.pre_ping:
+            return True
+        try:
+            pooled.conn.execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            # Toute erreur (pilote ou autre) : la connexion est fermée par l'appelant
+            # et son emplacement libéré, sans quoi in_use ne redescendrait jamais
+            with self._lock:
+                self._failed_pings += 1
+            return False
+
+    def _evict_idle(self, now):
+        """Retire (sans les fermer) les connexions inactives trop longtemps ou trop anciennes. Verrou requis."""
+        evicted = []
+        keep = []
+        # Les moins récemment utilisées sont en bas de la pile : on conserve au moins min_size connexions
+        for pooled in self._idle:
+            too_idle = bool(self.idle_timeout) and now - pooled.last_used_at > self.idle_timeout
+            if self._is_expired(pooled, now) or (too_idle and len(self._idle) - len(evicted) > self.min_size):
+                evicted.append(pooled)
+            else:
+                keep.append(pooled)
+        self._idle = keep
+        return evicted
+
+    def acquire(self):
+        """Emprunte une connexion au pool (en crée une si nécessaire)."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            pooled = None
+            with self._lock:
+                stale = self._evict_idle(time.monotonic())
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._in_use += 1
+                    action = "reuse"
+                elif self.size < self.max_size:
+                    self._in_use += 1
+                    action = "create"
+                else:
+                    action = "wait"
+
+            # Les connexions expirées sont fermées hors verrou
+            for expired in stale:
+                self._close(expired)
+
+            if action == "wait":
+                with self._lock:
+                    if self._idle or self.size < self.max_size:
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self.timeout}s"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._lock.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                continue
+
+            if action == "create":
+                try:
+                    pooled = self._open()
+                except Exception:
+                    self._discard_slot()
+                    raise
+            elif not self._is_healthy(pooled):
+                self._close(pooled)
+                self._discard_slot()
+                continue
+
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._checkouts += 1
+                self._checkout_time_total += elapsed
+                self._checkout_time_max = max(self._checkout_time_max, elapsed)
+            return pooled
+
+    def _discard_slot(self):
+        with self._lock:
+            self._in_use -= 1
+            self._lock.notify()
+
+    def release(self, pooled, discard=False):
+        """Rend une connexion au pool, ou la ferme si elle est invalide ou trop ancienne."""
+        now = time.monotonic()
+        if discard or self._is_expired(pooled, now):
+            self._close(pooled)
+            self._discard_slot()
+            return
+        pooled.last_used_at = now
+        with self._lock:
+            self._in_use -= 1
+            self._idle.append(pooled)
+            self._lock.notify()
+
+    def warm_up(self):
+        """Ouvre des connexions jusqu'à atteindre min_size (à appeler au démarrage)."""
+        opened = []
+        try:
+            while True:
+                with self._lock:
+                    if self.size + len(opened) >= self.min_size:
+                        break
+                opened.append(self._open())
+        finally:
+            with self._lock:
+                self._idle.extend(opened)
+                self._lock.notify_all()
+
+    def close(self):
+        """Ferme toutes les connexions inactives du pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._close(pooled)
+
+    def reset_after_fork(self):
+        """
+        À appeler dans un processus fils juste après fork() : oublie, sans les fermer,
+        les connexions héritées du parent (leur socket est partagé avec lui) et
+        recrée le verrou, qui a pu être copié dans l'état verrouillé.
+        """
+        self._lock = threading.Condition()
+        self._idle = []
+        self._in_use = 0
+        self._waiting = 0
+
+    def stats(self):
+        """Métriques instantanées du pool."""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "created": self._created,
+                "closed": self._closed,
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "failed_pings": self._failed_pings,
+                "checkout_latency_avg_ms": (self._checkout_time_total / checkouts * 1000) if checkouts else 0.0,
+                "checkout_latency_max_ms": self._checkout_time_max * 1000,
+            }
+
+
+class _TimedCursor:
+    """
+    Curseur pyodbc instrumenté : journalise les requêtes plus lentes que `threshold`
+    secondes avec le texte SQL, sans la valeur des paramètres.
+    """
+
+    def __init__(self, cursor, threshold: float):
+        self._cursor = cursor
+        self._threshold = threshold
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, *params):
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *params)
+        finally:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self._threshold:
+                db_slow_queries_total.inc()
+                count = len(params[0]) if len(params) == 1 and isinstance(params[0], (list, tuple)) else len(params)
+                slow_query_logger.warning(
+                    "Slow query (%.1f ms, %d redacted parameters): %s",
+                    elapsed * 1000, count, re.sub(r"\s+", " ", str(sql)).strip()
+                )
+        return self
+
+
+class SqlServerBackend:
+    """
+    Backend par défaut (DB_BACKEND=mssql) : SQL Server via pyodbc, requêtes exécutées telles quelles.
+
+    Un backend fournit connect(), wrap_cursor() (curseur présentant l'interface pyodbc),
+    table_exists() et les exceptions de son pilote ; voir database/postgresql.py pour PostgreSQL.
+    """
+
+    name = "mssql"
+    errors = (pyodbc.Error,)
+    integrity_errors = (pyodbc.IntegrityError,)
+
+    def __init__(self, connection_string: str):
+        self.connection_string = connection_string
+
+    def connect(self):
+        return pyodbc.connect(self.connection_string)
+
+    def wrap_cursor(self, cursor):
+        return cursor
+
+    def table_exists(self, cursor, name: str) -> bool:
+        cursor.execute("SELECT CASE WHEN OBJECT_ID(?, 'U') IS NULL THEN 0 ELSE 1 END", (name,))
+        return bool(cursor.fetchone()[0])
+
+
 class DatabaseConnection:
     def __init__(self):
         # SÉCURITÉ : Utilisation de variables d'environnement pour les informations sensibles
@@ -15,7 +310,7 @@ class DatabaseConnection:
         self.username = os.getenv('DB_USERNAME')
         self.password = os.getenv('DB_PASSWORD')
         self.driver = '{ODBC Driver 17 for SQL Server}'
-        
+
         # SÉCURITÉ : Construction sécurisée de la chaîne de connexion
         self.connection_string = (
             f'DRIVER={self.driver};'
@@ -25,23 +320,100 @@ class DatabaseConnection:
             f'PWD={self.password}'
         )
 
+        # Base utilisée par l'API : SQL Server (par défaut) ou PostgreSQL (variables PG_*)
+        self.backend_name = os.getenv('DB_BACKEND', 'mssql').strip().lower()
+        if self.backend_name == 'mssql':
+            self.backend = SqlServerBackend(self.connection_string)
+        elif self.backend_name == 'postgresql':
+            from .postgresql import PostgresBackend
+            self.backend = PostgresBackend.from_env()
+        else:
+            raise ValueError(f"Unsupported DB_BACKEND '{self.backend_name}' (expected mssql or postgresql)")
+
+        # PERFORMANCE : Pool de connexions réutilisables (configurable via .env)
+        self.pool = ConnectionPool(
+            self._connect,
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+            max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+            errors=self.backend.errors,
+        )
+
+        # PERFORMANCE : pool séparé pour les exports en flux, qui gardent leur connexion
+        # pendant tout le téléchargement sans puiser dans celle des autres routes
+        self.export_pool = ConnectionPool(
+            self._connect,
+            min_size=0,
+            max_size=int(os.getenv('EXPORT_MAX_CONCURRENCY', '2')),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+            max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+            errors=self.backend.errors,
+        )
+
+        # Journalisation des requêtes lentes (désactivée si 0)
+        self.slow_query_threshold = float(os.getenv('DB_SLOW_QUERY_MS', '0')) / 1000
+
+        # Tables optionnelles (créées par le pipeline) dont l'existence a été constatée
+        self._existing_tables = set()
+
+    def _connect(self):
+        return self.backend.connect()
+
     @contextmanager
-    def get_cursor(self):
-        # SÉCURITÉ : Gestion automatique des connexions
-        conn = pyodbc.connect(self.connection_string)
+    def get_cursor(self, pool: "ConnectionPool" = None):
+        # Temps passé en base (attente du pool comprise), attribué à la requête HTTP en cours
+        start = time.perf_counter()
+        # PERFORMANCE : Connexion empruntée au pool (par défaut le pool principal)
+        # plutôt qu'ouverte à chaque requête
+        pool = pool or self.pool
+        pooled = pool.acquire()
+        conn = pooled.conn
+        cursor = None
+        discard = False
         try:
-            cursor = conn.cursor()
-            yield cursor
+            cursor = self.backend.wrap_cursor(conn.cursor())
+            yield _TimedCursor(cursor, self.slow_query_threshold) if self.slow_query_threshold > 0 else cursor
             # SÉCURITÉ : Validation explicite des transactions
             conn.commit()
-        except Exception as e:
-            # SÉCURITÉ : Rollback automatique en cas d'erreur
-            conn.rollback()
-            raise e
+        except BaseException:
+            # SÉCURITÉ : Rollback automatique en cas d'erreur ou d'interruption (GeneratorExit
+            # d'un export en flux abandonné par le client) ; la connexion n'est pas remise
+            # dans le pool car son état n'est plus garanti
+            discard = True
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
         finally:
             # SÉCURITÉ : Fermeture garantie des ressources
-            cursor.close()
-            conn.close()
+            if cursor is not None:
+                cursor.close()
+            pool.release(pooled, discard=discard)
+            record_phase("db", time.perf_counter() - start)
+
+    def table_exists(self, name: str) -> bool:
+        """
+        Vrai si la table existe. Seul un résultat positif est mémorisé : une table
+        créée plus tard par le pipeline est vue sans redémarrer l'API.
+        """
+        if name in self._existing_tables:
+            return True
+        with self.get_cursor() as cursor:
+            exists = self.backend.table_exists(cursor, name)
+        if exists:
+            self._existing_tables.add(name)
+        return exists
+
+    def close(self):
+        """Ferme les connexions des pools (arrêt de l'application)."""
+        self.pool.close()
+        self.export_pool.close()
 
 # SÉCURITÉ : Instance unique de connexion
 db = DatabaseConnection()
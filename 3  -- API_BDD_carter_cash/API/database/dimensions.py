@@ -1,8 +1,14 @@
 from .db_connection import db
+from .dimensions_index import dimensions_index, normalize_key
+from models import DIMENSIONS_BATCH_MAX
 from fastapi import HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 import re
 
+# 3 paramètres par véhicule : 500 véhicules par requête restent sous la limite
+# de 2100 paramètres de SQL Server
+BATCH_CHUNK_SIZE = 500
+
 def validate_dimensions_params(marque: str, modele: str, annee: int) -> bool:
     """Valide les paramètres d'entrée pour éviter les caractères non autorisés."""
     # Autoriser uniquement les lettres, chiffres, espaces et certains caractères spéciaux
@@ -28,6 +34,11 @@ def get_dimensions_by_params(marque: str, modele: str, annee: int) -> List[Dict[
             detail="Invalid input parameters"
         )
 
+    # PERFORMANCE : réponse depuis l'index en mémoire lorsqu'il est chargé
+    results = dimensions_index.lookup(marque, modele, annee)
+    if results is not None:
+        return results
+
     # Requête SQL sécurisée avec des paramètres
     query = """
     SELECT marque, modele, annee, finition, largeur, hauteur, diametre
@@ -43,3 +54,84 @@ def get_dimensions_by_params(marque: str, modele: str, annee: int) -> List[Dict[
             return results
         except Exception as e:
             raise HTTPException(status_code=500, detail="Database error")
+
+def _normalized_sql(column: str) -> str:
+    """Équivalent SQL de normalize_key : minuscules, espaces de bord retirés et espaces multiples réduits."""
+    collapsed = f"REPLACE(REPLACE(REPLACE(LTRIM(RTRIM({column})), ' ', '<>'), '><', ''), '<>', ' ')"
+    return f"LOWER({collapsed})"
+
+def _lookup_many(keys: List[Tuple[str, str, int]]) -> Dict[Tuple[str, str, int], List[Dict[str, Any]]]:
+    """Dimensions de plusieurs véhicules (clés normalisées) : index mémoire, sinon une requête ensembliste."""
+    if dimensions_index.loaded:
+        return {key: dimensions_index.lookup(*key) for key in keys}
+
+    found = {key: [] for key in keys}
+    if not keys:
+        return found
+    values = ", ".join("(?, ?, ?)" for _ in keys)
+    query = f"""
+    SELECT d.marque, d.modele, d.annee, d.finition, d.largeur, d.hauteur, d.diametre
+    FROM (VALUES {values}) AS v (marque, modele, annee)
+    JOIN DimensionsParModel AS d
+      ON {_normalized_sql("d.Marque")} = v.marque
+     AND {_normalized_sql("d.Modele")} = v.modele
+     AND d.Annee = v.annee
+    """
+    params = [value for key in keys for value in key]
+
+    with db.get_cursor() as cursor:
+        try:
+            cursor.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            for row in cursor.fetchall():
+                record = dict(zip(columns, row))
+                key = normalize_key(record["marque"], record["modele"], record["annee"])
+                if key in found:
+                    found[key].append(record)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail="Database error")
+    return found
+
+def _resolve_chunk(vehicles: List[Tuple[str, str, int]], offset: int) -> List[Dict[str, Any]]:
+    results = []
+    positions = {}
+    for index, (marque, modele, annee) in enumerate(vehicles, start=offset):
+        marque, modele = marque.strip(), modele.strip()
+        item = {"index": index, "marque": marque, "modele": modele, "annee": annee}
+        results.append(item)
+        # Mêmes règles que get_dimensions_by_params ; une entrée invalide n'empêche pas les autres
+        if not validate_dimensions_params(marque, modele, annee):
+            item.update(success=False, error="Invalid input parameters")
+            continue
+        positions.setdefault(normalize_key(marque, modele, annee), []).append(item)
+
+    found = _lookup_many(list(positions))
+    for key, items in positions.items():
+        for item in items:
+            item.update(success=True, count=len(found[key]), data=found[key])
+    return results
+
+def iter_dimensions_batch(
+    vehicles: List[Tuple[str, str, int]],
+    chunk_size: int = BATCH_CHUNK_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Dimensions d'une liste de véhicules, par lots de chunk_size : une seule requête
+    par lot (ou aucune si l'index mémoire est chargé). Chaque résultat rappelle
+    la position (`index`) et les valeurs du véhicule demandé.
+    La taille du lot est vérifiée immédiatement, la résolution au fil de l'itération.
+    """
+    if len(vehicles) > DIMENSIONS_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many vehicles (max {DIMENSIONS_BATCH_MAX})"
+        )
+
+    def generate():
+        for start in range(0, len(vehicles), chunk_size):
+            yield _resolve_chunk(vehicles[start:start + chunk_size], start)
+
+    return generate()
+
+def get_dimensions_batch(vehicles: List[Tuple[str, str, int]]) -> List[Dict[str, Any]]:
+    return [item for chunk in iter_dimensions_batch(vehicles) for item in chunk]
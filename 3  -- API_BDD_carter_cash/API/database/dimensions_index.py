@@ -0,0 +1,127 @@
+# dimensions_index.py
+import os
+import sys
+import time
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from .db_connection import db
+from .executor import run_in_db
+
+COLUMNS = ("marque", "modele", "annee", "finition", "largeur", "hauteur", "diametre")
+
+
+def normalize_key(marque: str, modele: str, annee: int) -> Tuple[str, str, int]:
+    """Clé insensible à la casse et aux espaces multiples (équivalent de LOWER(...) = LOWER(?))."""
+    return (" ".join(marque.split()).lower(), " ".join(modele.split()).lower(), int(annee))
+
+
+def load_rows():
+    query = """
+    SELECT marque, modele, annee, finition, largeur, hauteur, diametre
+    FROM DimensionsParModel
+    """
+    with db.get_cursor() as cursor:
+        cursor.execute(query)
+        return cursor.fetchall()
+
+
+# Somme de contrôle du contenu : change aussi quand l'ETL modifie des lignes
+# sans changer leur nombre ni le plus grand identifiant
+VERSION_QUERIES = {
+    "mssql": "SELECT COUNT(*), CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM DimensionsParModel",
+    "postgresql": "SELECT COUNT(*), SUM(hashtext(d::text)::bigint) FROM DimensionsParModel AS d",
+}
+
+
+def load_version() -> str:
+    """Marqueur qui change à chaque rechargement de la table par l'ETL."""
+    with db.get_cursor() as cursor:
+        cursor.execute(VERSION_QUERIES[db.backend.name])
+        row = cursor.fetchone()
+    return f"{row[0]}:{row[1]}"
+
+
+class DimensionsIndex:
+    """
+    Copie en mémoire de DimensionsParModel indexée par (marque, modèle, année) normalisés.
+
+    La table n'est modifiée que par 2_ETL_DL_to_BDD.py : elle est chargée au démarrage
+    puis rechargée uniquement si son marqueur de version change.
+    """
+
+    def __init__(self, load_rows=load_rows, load_version=load_version):
+        self._load_rows = load_rows
+        self._load_version = load_version
+        self._entries: Dict[Tuple[str, str, int], Tuple[tuple, ...]] = {}
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Recharge l'index si la table a changé. Renvoie True si l'index a été reconstruit."""
+        with self._lock:
+            version = self._load_version()
+            if not force and version == self.version:
+                return False
+
+            entries = {}
+            count = 0
+            for row in self._load_rows():
+                marque, modele = sys.intern(str(row[0])), sys.intern(str(row[1]))
+                record = (marque, modele, row[2], row[3], row[4], row[5], row[6])
+                key = normalize_key(marque, modele, row[2])
+                entries.setdefault(key, []).append(record)
+                count += 1
+
+            # Remplacement atomique : les lectures en cours voient l'ancien ou le nouvel index
+            self._entries = {key: tuple(records) for key, records in entries.items()}
+            self.rows = count
+            self.version = version
+            self.loaded_at = time.time()
+            return True
+
+    def lookup(self, marque: str, modele: str, annee: int) -> Optional[List[Dict[str, Any]]]:
+        """Dimensions du véhicule, ou None si l'index n'est pas encore chargé."""
+        if not self.loaded:
+            return None
+        records = self._entries.get(normalize_key(marque, modele, annee), ())
+        return [dict(zip(COLUMNS, record)) for record in records]
+
+    def vehicles(self) -> Dict[Tuple[str, str], List[int]]:
+        """Couples (marque, modèle) distincts et leurs années disponibles."""
+        vehicles = {}
+        for records in self._entries.values():
+            marque, modele, annee = records[0][0], records[0][1], records[0][2]
+            vehicles.setdefault((marque, modele), []).append(annee)
+        return vehicles
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "version": self.version,
+            "rows": self.rows,
+            "keys": len(self._entries),
+            "loaded_at": self.loaded_at,
+        }
+
+
+DIMENSIONS_INDEX_ENABLED = os.getenv('DIMENSIONS_INDEX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DIMENSIONS_INDEX_REFRESH_SECONDS = float(os.getenv('DIMENSIONS_INDEX_REFRESH_SECONDS', '600'))
+
+dimensions_index = DimensionsIndex()
+
+
+async def refresh_periodically(index: DimensionsIndex, interval: float):
+    """Tâche de fond : vérifie le marqueur de version toutes les `interval` secondes."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_db(index.refresh)
+        except Exception as e:
+            print(f"WARNING: Dimensions index refresh failed: {e}")
@@ -0,0 +1,191 @@
+# executor.py
+import os
+import time
+import asyncio
+import weakref
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from fastapi import HTTPException
+
+from .db_connection import db
+
+
+class BoundedExecutor:
+    """
+    Exécuteur borné pour les appels bloquants (pyodbc, bcrypt) afin de libérer la boucle d'événements.
+
+    - max_workers : threads exécutant les appels
+    - max_pending : appels en cours + en file d'attente au-delà desquels la requête
+      est rejetée immédiatement (HTTP 503) plutôt que de s'accumuler
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._pending = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._wait_time_total = 0.0
+        self._run_time_total = 0.0
+        self._run_time_max = 0.0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-worker"
+                    )
+        return self._executor
+
+    def _timed_call(self, func, submitted_at):
+        started_at = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            return func()
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._wait_time_total += started_at - submitted_at
+                self._run_time_total += elapsed
+                self._run_time_max = max(self._run_time_max, elapsed)
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is busy, please retry later",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    async def _submit(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Contexte de la requête (mesures par phase) propagé au thread
+        context = contextvars.copy_context()
+        call = partial(context.run, self._timed_call, partial(func, *args, **kwargs), time.perf_counter())
+        return await loop.run_in_executor(self._get_executor(), call)
+
+    async def run(self, func, *args, **kwargs):
+        """Exécute func(*args, **kwargs) dans l'exécuteur et attend son résultat."""
+        self._reserve()
+        try:
+            return await self._submit(func, *args, **kwargs)
+        finally:
+            self._release()
+
+    def open_stream(self, iterator):
+        """
+        Réserve une place pour tout un flux (HTTP 503 immédiat si max_pending flux sont
+        déjà ouverts) et renvoie un générateur asynchrone consommant `iterator` sur les
+        threads de cet exécuteur. La place est rendue à la fin ou à la fermeture du flux.
+        """
+        self._reserve()
+        state = {"open": True}
+
+        def release():
+            if state.pop("open", False):
+                self._release()
+
+        stream = _consume(iterator, self._submit, release)
+        # Flux jamais parcouru (client parti avant le premier envoi) : son bloc finally
+        # ne s'exécute pas, la place est rendue à la destruction du générateur
+        weakref.finalize(stream, release)
+        return stream
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "max_pending": self.max_pending,
+                "rejected": self._rejected,
+                "completed": completed,
+                "wait_avg_ms": (self._wait_time_total / completed * 1000) if completed else 0.0,
+                "run_avg_ms": (self._run_time_total / completed * 1000) if completed else 0.0,
+                "run_max_ms": self._run_time_max * 1000,
+            }
+
+
+# PERFORMANCE : autant de threads que de connexions dans le pool
+db_executor = BoundedExecutor(
+    "db",
+    max_workers=int(os.getenv('DB_EXECUTOR_WORKERS', str(db.pool.max_size))),
+    max_pending=int(os.getenv('DB_EXECUTOR_MAX_PENDING', '100')),
+)
+
+
+async def run_in_db(func, *args, **kwargs):
+    """Exécute une fonction d'accès aux données sans bloquer la boucle d'événements."""
+    return await db_executor.run(func, *args, **kwargs)
+
+
+async def _consume(iterator, submit, on_close=None):
+    """Consomme un itérateur bloquant (curseur pyodbc) morceau par morceau via `submit`."""
+    sentinel = object()
+    step = None
+    try:
+        while True:
+            # shield : une déconnexion du client n'abandonne pas l'appel en cours sur son thread
+            step = asyncio.ensure_future(submit(next, iterator, sentinel))
+            chunk = await asyncio.shield(step)
+            if chunk is sentinel:
+                break
+            yield chunk
+    finally:
+        # Libère le curseur et la connexion même si le client se déconnecte : le générateur
+        # est fermé sur un thread de l'exécuteur (rollback bloquant), une fois l'appel
+        # précédent terminé
+        try:
+            if step is not None and not step.done():
+                await asyncio.wait([step])
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    await submit(close)
+                except HTTPException:
+                    # Exécuteur saturé : fermeture directe plutôt que de garder la connexion
+                    close()
+        finally:
+            if on_close is not None:
+                on_close()
+
+
+def iterate_in_db(iterator):
+    """Consomme un itérateur bloquant (curseur pyodbc) morceau par morceau via l'exécuteur."""
+    return _consume(iterator, run_in_db)
+
+
+# Exports en flux : chacun garde un thread et une connexion (pool db.export_pool)
+# jusqu'à la fin du téléchargement ; au-delà de EXPORT_MAX_CONCURRENCY exports
+# simultanés, les suivants sont rejetés (HTTP 503) au lieu d'occuper db_executor
+export_executor = BoundedExecutor(
+    "export",
+    max_workers=db.export_pool.max_size,
+    max_pending=db.export_pool.max_size,
+)
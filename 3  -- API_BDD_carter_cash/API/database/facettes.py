@@ -0,0 +1,185 @@
+# facettes.py
+from .db_connection import db
+from .singleflight import SingleFlight
+from fastapi import HTTPException
+from typing import List, Dict, Any, Optional, Tuple
+import re
+
+# PERFORMANCE : la recherche à facettes lit Produit_Recherche, modèle de lecture
+# dénormalisé (Produit + Caracteristiques + Dimensions du dernier scraping)
+# reconstruit par le pipeline Dagster (7_read_model_recherche.py) : aucune jointure
+# par requête, et un index columnstore pour les filtres et les comptages.
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+MAX_VALUES_PER_FILTER = 20
+
+# Filtres à valeurs multiples (IN) : paramètre -> colonne
+LIST_FILTERS = {
+    "marque": "Marque",
+    "saisonalite": "Saisonalite",
+    "type_vehicule": "Type_Vehicule",
+    "runflat": "Runflat",
+    "consommation": "Consommation",
+    "indice_pluie": "Indice_Pluie",
+    "vitesse": "Vitesse",
+}
+
+# Filtres numériques : paramètre -> (colonne, opérateur)
+NUMERIC_FILTERS = {
+    "prix_min": ("Prix", ">="),
+    "prix_max": ("Prix", "<="),
+    "charge_min": ("Charge", ">="),
+    "largeur": ("Largeur", "="),
+    "hauteur": ("Hauteur", "="),
+    "diametre": ("Diametre", "="),
+}
+
+# Colonnes dont les valeurs sont comptées dans la réponse
+FACET_COLUMNS = (
+    "Marque", "Saisonalite", "Type_Vehicule", "Runflat", "Consommation",
+    "Indice_Pluie", "Vitesse", "Diametre", "Largeur", "Hauteur",
+)
+
+RESULT_COLUMNS = (
+    "ID_Produit", "URL_Produit", "Prix", "Descriptif", "Marque", "Note", "Date_scrap",
+    "Saisonalite", "Type_Vehicule", "Runflat", "Consommation", "Indice_Pluie", "Bruit",
+    "Largeur", "Hauteur", "Diametre", "Charge", "Vitesse",
+)
+
+# Recherches identiques simultanées regroupées en une seule requête SQL
+facet_flight = SingleFlight()
+
+SORT_ORDERS = {
+    None: "ID_Produit",
+    "prix": "Prix ASC, ID_Produit",
+    "prix_desc": "Prix DESC, ID_Produit",
+}
+
+
+def validate_facet_value(value: str) -> bool:
+    """Valeur de filtre textuelle : lettres (accentuées), chiffres, espaces, tirets et points."""
+    return 0 < len(value) <= 50 and bool(re.match(r'^[\w\s\-.]+$', value))
+
+
+def build_where(filters: Dict[str, Any]) -> Tuple[str, list]:
+    """
+    Clause WHERE paramétrée à partir des filtres fournis (les valeurs None sont ignorées).
+    Lève une HTTPException 400 pour un filtre inconnu ou une valeur invalide.
+    """
+    conditions = []
+    params = []
+    for name, value in filters.items():
+        if value is None or value == []:
+            continue
+        if name in LIST_FILTERS:
+            values = [value] if isinstance(value, str) else list(value)
+            values = [str(v).strip() for v in values]
+            if len(values) > MAX_VALUES_PER_FILTER or not all(validate_facet_value(v) for v in values):
+                raise HTTPException(status_code=400, detail=f"Invalid value for filter '{name}'")
+            placeholders = ", ".join("?" for _ in values)
+            conditions.append(f"{LIST_FILTERS[name]} IN ({placeholders})")
+            params.extend(values)
+        elif name in NUMERIC_FILTERS:
+            column, operator = NUMERIC_FILTERS[name]
+            if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                raise HTTPException(status_code=400, detail=f"Invalid value for filter '{name}'")
+            conditions.append(f"{column} {operator} ?")
+            params.append(value)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown filter '{name}'")
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+
+def parse_facets(rows) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    """
+    Lignes de GROUP BY GROUPING SETS -> (total, facettes).
+
+    Chaque ligne contient les colonnes de FACET_COLUMNS, leurs indicateurs GROUPING()
+    puis le COUNT(*) ; l'ensemble vide () donne le total.
+    """
+    total = 0
+    facets = {column: [] for column in FACET_COLUMNS}
+    size = len(FACET_COLUMNS)
+    for row in rows:
+        values, grouping, count = row[:size], row[size:2 * size], row[2 * size]
+        if all(grouping):
+            total = count
+            continue
+        column_index = list(grouping).index(0)
+        value = values[column_index]
+        if value is None:
+            continue
+        facets[FACET_COLUMNS[column_index]].append({"valeur": value, "count": count})
+    for values in facets.values():
+        values.sort(key=lambda item: (-item["count"], str(item["valeur"])))
+    return total, facets
+
+
+def search_products_faceted(
+    filters: Dict[str, Any],
+    sort: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
+    offset: int = 0,
+    with_facets: bool = True
+) -> Dict[str, Any]:
+    """
+    Recherche multi-critères dans Produit_Recherche.
+
+    Renvoie une page de produits et, si with_facets, le nombre de produits
+    correspondant aux filtres pour chaque valeur des colonnes de FACET_COLUMNS.
+    """
+    if sort not in SORT_ORDERS or not (1 <= limit <= MAX_LIMIT) or offset < 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid sort, limit or offset parameter"
+        )
+    # Produit_Recherche est créée par 7_read_model_recherche.py (pipeline SQL Server) :
+    # absente, par exemple sur une copie PostgreSQL, la recherche répond 503
+    if not db.table_exists("Produit_Recherche"):
+        raise HTTPException(
+            status_code=503,
+            detail="Faceted search is not available on this database"
+        )
+    where, params = build_where(filters)
+
+    query = f"""
+    SELECT {", ".join(RESULT_COLUMNS)}
+    FROM Produit_Recherche
+    {where}
+    ORDER BY {SORT_ORDERS[sort]}
+    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+    """
+
+    # Toutes les facettes et le total en un seul passage sur la table
+    grouping_sets = ", ".join(f"({column})" for column in FACET_COLUMNS)
+    facets_query = f"""
+    SELECT {", ".join(FACET_COLUMNS)},
+           {", ".join(f"GROUPING({column})" for column in FACET_COLUMNS)},
+           COUNT(*)
+    FROM Produit_Recherche
+    {where}
+    GROUP BY GROUPING SETS ({grouping_sets}, ())
+    """
+
+    with db.get_cursor() as cursor:
+        try:
+            cursor.execute(query, (*params, offset, limit))
+            columns = [column[0] for column in cursor.description]
+            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+            response = {
+                "count": len(results),
+                "offset": offset,
+                "data": results,
+            }
+            if with_facets:
+                cursor.execute(facets_query, params)
+                total, facets = parse_facets(cursor.fetchall())
+                response["total"] = total
+                response["facettes"] = facets
+            return response
+        except Exception as e:
+            raise HTTPException(status_code=500, detail="Database error")
@@ -0,0 +1,139 @@
+# historique.py
+from .db_connection import db
+from .cache import TTLCache
+from .search import validate_marque, normalize_marque, data_version
+from fastapi import HTTPException
+from typing import List, Dict, Any, Optional
+from datetime import date
+import os
+
+# Regroupement des relevés de prix par période (début de période renvoyé)
+BUCKETS = {
+    "jour": "Date_scrap",
+    # Lundi de la semaine : le 01/01/1900 est un lundi (indépendant de SET DATEFIRST)
+    "semaine": "CAST(DATEADD(DAY, (DATEDIFF(DAY, '19000101', Date_scrap) / 7) * 7, '19000101') AS DATE)",
+    "mois": "DATEFROMPARTS(YEAR(Date_scrap), MONTH(Date_scrap), 1)",
+}
+
+# Mêmes périodes pour DB_BACKEND=postgresql (DATE_TRUNC : semaines commençant le lundi)
+BUCKETS_POSTGRESQL = {
+    "jour": "Date_scrap",
+    "semaine": "CAST(DATE_TRUNC('week', Date_scrap) AS DATE)",
+    "mois": "CAST(DATE_TRUNC('month', Date_scrap) AS DATE)",
+}
+
+MAX_URL_LENGTH = 500
+
+# PERFORMANCE : l'historique ne change qu'à chaque scraping ; les séries sont mises
+# en cache et invalidées avec le même marqueur de version que /search
+history_cache = TTLCache(
+    maxsize=int(os.getenv('HISTORY_CACHE_SIZE', '256')),
+    ttl=float(os.getenv('HISTORY_CACHE_TTL', '3600'))
+)
+
+@data_version.on_change
+def _clear_history_cache(version: str):
+    history_cache.clear()
+
+def validate_url(url: str) -> bool:
+    return (
+        0 < len(url) <= MAX_URL_LENGTH
+        and url.startswith(("http://", "https://"))
+        and not any(c.isspace() for c in url)
+    )
+
+def _validate_period(granularite: str, date_debut: Optional[date], date_fin: Optional[date]):
+    if granularite not in BUCKETS:
+        raise HTTPException(status_code=400, detail="Invalid granularity (jour, semaine or mois)")
+    if date_debut and date_fin and date_debut > date_fin:
+        raise HTTPException(status_code=400, detail="date_debut must be before date_fin")
+
+def _fetch_series(where: str, params: list, joins: str, granularite: str) -> List[Dict[str, Any]]:
+    """Min / moyenne / max et nombre de relevés par période, en une seule requête groupée."""
+    bucket = (BUCKETS_POSTGRESQL if db.backend.name == "postgresql" else BUCKETS)[granularite]
+    query = f"""
+    SELECT {bucket} AS Periode,
+           MIN(p.Prix) AS Prix_min,
+           AVG(CAST(p.Prix AS FLOAT)) AS Prix_moyen,
+           MAX(p.Prix) AS Prix_max,
+           COUNT(*) AS Nb_releves
+    FROM Produit AS p
+    {joins}
+    {where}
+    GROUP BY {bucket}
+    ORDER BY Periode
+    """
+    with db.get_cursor() as cursor:
+        try:
+            cursor.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            series = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            raise HTTPException(status_code=500, detail="Database error")
+    for point in series:
+        if point["Prix_moyen"] is not None:
+            point["Prix_moyen"] = round(point["Prix_moyen"], 2)
+    return series
+
+def _date_conditions(date_debut: Optional[date], date_fin: Optional[date]):
+    conditions, params = [], []
+    if date_debut:
+        conditions.append("p.Date_scrap >= ?")
+        params.append(date_debut)
+    if date_fin:
+        conditions.append("p.Date_scrap <= ?")
+        params.append(date_fin)
+    return conditions, params
+
+def _cached(key: str, load):
+    version = data_version.current()
+    entry = history_cache.get(key)
+    if entry is None or entry[0] != version:
+        entry = (version, load())
+        history_cache.set(key, entry)
+    return entry[1]
+
+def get_price_history_for_url(
+    url: str,
+    granularite: str = "jour",
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """Évolution du prix d'un produit (URL_Produit) au fil des scrapings."""
+    if not validate_url(url):
+        raise HTTPException(status_code=400, detail="Invalid product URL")
+    _validate_period(granularite, date_debut, date_fin)
+
+    conditions, params = _date_conditions(date_debut, date_fin)
+    where = "WHERE " + " AND ".join(["p.URL_Produit = ?"] + conditions)
+    key = f"url|{url}|{granularite}|{date_debut}|{date_fin}"
+    return _cached(key, lambda: _fetch_series(where, [url] + params, "", granularite))
+
+def get_price_history_for_brand(
+    marque: str,
+    largeur: Optional[int] = None,
+    hauteur: Optional[int] = None,
+    diametre: Optional[int] = None,
+    granularite: str = "semaine",
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """Évolution des prix d'une marque, éventuellement restreinte à une taille de pneu."""
+    if not validate_marque(marque):
+        raise HTTPException(status_code=400, detail="Invalid or suspicious brand name detected")
+    _validate_period(granularite, date_debut, date_fin)
+
+    conditions, params = ["p.Marque = ?"], [marque]
+    joins = ""
+    size = {"d.Largeur": largeur, "d.Hauteur": hauteur, "d.Diametre": diametre}
+    if any(value is not None for value in size.values()):
+        joins = "JOIN Dimensions AS d ON d.ID_Produit = p.ID_Produit"
+        for column, value in size.items():
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+    date_conditions, date_params = _date_conditions(date_debut, date_fin)
+    where = "WHERE " + " AND ".join(conditions + date_conditions)
+
+    key = f"marque|{normalize_marque(marque)}|{largeur}|{hauteur}|{diametre}|{granularite}|{date_debut}|{date_fin}"
+    return _cached(key, lambda: _fetch_series(where, params + date_params, joins, granularite))
@@ -0,0 +1,88 @@
+# marques.py
+import threading
+import time
+from typing import List, Optional, FrozenSet, Dict, Any
+from .db_connection import db
+
+
+def load_brands() -> List[str]:
+    query = """
+    SELECT DISTINCT Marque
+    FROM Produit
+    WHERE Marque IS NOT NULL
+    """
+    with db.get_cursor() as cursor:
+        cursor.execute(query)
+        return [row[0] for row in cursor.fetchall()]
+
+
+class BrandList:
+    """
+    Liste des marques présentes dans Produit, gardée en mémoire.
+
+    Chargée au démarrage (avant le fork des workers en production) pour la version
+    des données en cours, puis rechargée dès que le marqueur de version des produits
+    diffère de celle-ci. Tant qu'elle n'est pas chargée, toute marque est considérée
+    comme connue et la base tranche.
+    """
+
+    def __init__(self, load=load_brands):
+        self._load = load
+        self._names: List[str] = []
+        self._normalized: Optional[FrozenSet[str]] = None
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._normalized is not None
+
+    def _reload(self, version: Optional[str]):
+        names = sorted({" ".join(str(name).split()) for name in self._load()} - {""})
+        # Remplacement atomique : les lectures en cours voient l'ancienne ou la nouvelle liste
+        self._names = names
+        self._normalized = frozenset(name.lower() for name in names)
+        self.version = version
+        self.loaded_at = time.time()
+
+    def refresh(self, version: Optional[str] = None):
+        """Recharge la liste ; `version` est le marqueur des données lu juste avant."""
+        with self._lock:
+            self._reload(version)
+
+    def sync(self, version: str) -> bool:
+        """Recharge la liste si elle a été chargée pour une autre version. Renvoie True si rechargée."""
+        if not self.loaded or self.version == version:
+            return False
+        with self._lock:
+            if not self.loaded or self.version == version:
+                return False
+            self._reload(version)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._names = []
+            self._normalized = None
+            self.version = None
+            self.loaded_at = None
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def may_exist(self, normalized_marque: str) -> bool:
+        """False uniquement si la liste est chargée et ne contient pas la marque (déjà normalisée)."""
+        normalized = self._normalized
+        return normalized is None or normalized_marque in normalized
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "brands": len(self._names),
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+        }
+
+
+brand_list = BrandList()
@@ -0,0 +1,65 @@
+# offres.py
+from .db_connection import db
+from .dimensions import validate_dimensions_params
+from fastapi import HTTPException
+from typing import List, Dict, Any, Optional
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+SORT_ORDERS = {
+    None: "p.ID_Produit",
+    "prix": "p.Prix ASC, p.ID_Produit",
+    "prix_desc": "p.Prix DESC, p.ID_Produit",
+}
+
+def get_offers_for_vehicle(
+    marque: str,
+    modele: str,
+    annee: int,
+    sort: Optional[str] = None,
+    latest_only: bool = True,
+    limit: int = DEFAULT_LIMIT
+) -> List[Dict[str, Any]]:
+    """
+    Produits dont les dimensions (Largeur, Hauteur, Diametre) correspondent à
+    celles du véhicule dans DimensionsParModel, en une seule requête ensembliste.
+    """
+    if not validate_dimensions_params(marque, modele, annee):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid input parameters"
+        )
+    if sort not in SORT_ORDERS or not (1 <= limit <= MAX_LIMIT):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid sort or limit parameter"
+        )
+
+    # Égalité simple (collation insensible à la casse) pour pouvoir utiliser
+    # l'index IX_DimensionsParModel_Vehicule, contrairement à LOWER(colonne)
+    latest_filter = "WHERE p.Date_scrap = (SELECT MAX(Date_scrap) FROM Produit)" if latest_only else ""
+    query = f"""
+    SELECT TOP (?) p.ID_Produit, p.URL_Produit, p.Prix, p.Info_generale,
+           p.Descriptif, p.Note, p.Marque, p.Date_scrap,
+           d.Largeur, d.Hauteur, d.Diametre, d.Charge, d.Vitesse
+    FROM (
+        SELECT DISTINCT Largeur, Hauteur, Diametre
+        FROM DimensionsParModel
+        WHERE Marque = ? AND Modele = ? AND Annee = ?
+    ) AS m
+    JOIN Dimensions AS d
+      ON d.Largeur = m.Largeur AND d.Hauteur = m.Hauteur AND d.Diametre = m.Diametre
+    JOIN Produit AS p
+      ON p.ID_Produit = d.ID_Produit
+    {latest_filter}
+    ORDER BY {SORT_ORDERS[sort]}
+    """
+
+    with db.get_cursor() as cursor:
+        try:
+            cursor.execute(query, (limit, marque.strip(), modele.strip(), annee))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            raise HTTPException(status_code=500, detail="Database error")
@@ -0,0 +1,214 @@
+# postgresql.py
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+# Tables et colonnes du schéma, créées entre guillemets dans PostgreSQL (casse conservée
+# par azure_sql_to_postgre_local.ipynb / local_to_cloud.ipynb) : "Produit"."ID_Produit"
+SCHEMA_IDENTIFIERS = (
+    # Tables
+    "Produit", "Caracteristiques", "Dimensions", "DimensionsParModel", "USER_API",
+    "Offre_Courante", "Produit_Recherche",
+    # Produit
+    "ID_Produit", "URL_Produit", "Prix", "Info_generale", "Descriptif", "Note", "Date_scrap", "Marque",
+    # Caracteristiques
+    "ID_Caracteristique", "Consommation", "Indice_Pluie", "Bruit", "Saisonalite", "Type_Vehicule", "Runflat",
+    # Dimensions
+    "ID_Dimension", "Largeur", "Hauteur", "Diametre", "Charge", "Vitesse",
+    # DimensionsParModel
+    "ID_DimensionModel", "Modele", "Annee", "Finition",
+    # USER_API
+    "ID_USER_API", "username", "email", "full_name", "hashed_password",
+    "Date_Création", "Date_Derniere_Connexion",
+    # Offre_Courante
+    "Prix_precedent", "Date_premiere_vue", "Date_derniere_vue",
+)
+IDENTIFIERS = {name.lower(): name for name in SCHEMA_IDENTIFIERS}
+
+# Mots qui suivent AS sans être des alias : CAST(x AS FLOAT)
+SQL_TYPES = {
+    "DATE", "DATETIME", "FLOAT", "REAL", "INT", "INTEGER", "BIGINT", "SMALLINT",
+    "DECIMAL", "NUMERIC", "VARCHAR", "NVARCHAR", "CHAR", "TEXT", "BIT",
+}
+
+_TOKENS = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|\?|%|[^\W\d]\w*")
+_ALIASES = re.compile(r"\bAS\s+([^\W\d]\w*)", re.IGNORECASE)
+_TOP = re.compile(r"^\s*SELECT\s+TOP\s*\(\s*\?\s*\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def translate_query(sql: str) -> Tuple[str, bool, Tuple[Tuple[str, str], ...]]:
+    """
+    Requête écrite pour SQL Server (pyodbc) -> requête PostgreSQL (psycopg).
+
+    - paramètres `?` -> `%s` (et `%` littéral -> `%%`) ;
+    - identifiants du schéma entre guillemets avec leur casse d'origine, alias (AS x)
+      entre guillemets tels qu'écrits : PostgreSQL met sinon en minuscules les noms
+      non protégés ;
+    - `SELECT TOP (?) ...` -> `SELECT ... LIMIT %s` (le premier paramètre passe en dernier).
+
+    Renvoie (requête, top_en_fin, renommages) ; les renommages redonnent aux colonnes
+    du résultat le nom écrit dans la requête (ex. "Marque" sélectionné comme `marque`),
+    comme SQL Server.
+    """
+    match = _TOP.match(sql)
+    if match:
+        sql = "SELECT" + sql[match.end():]
+
+    stripped = _TOKENS.sub(lambda m: " " if m.group(0)[0] in "'\"-" else m.group(0), sql)
+    if re.search(r"\bTOP\b", stripped, re.IGNORECASE):
+        raise ValueError("TOP is only supported as the first clause of the query")
+    aliases = {
+        alias.lower(): alias for alias in _ALIASES.findall(stripped) if alias.upper() not in SQL_TYPES
+    }
+
+    written: Dict[str, str] = {}
+    previous = None
+
+    def replace(match):
+        nonlocal previous
+        token = match.group(0)
+        word, previous = previous, None
+        if token == "?":
+            return "%s"
+        if token == "%":
+            return "%%"
+        if token[0] in "'\"-":
+            # psycopg cherche les paramètres jusque dans les chaînes littérales
+            return token.replace("%", "%%")
+        previous = token.upper()
+        lowered = token.lower()
+        if lowered in aliases and (word == "AS" or lowered not in IDENTIFIERS):
+            return f'"{aliases[lowered]}"'
+        if lowered in IDENTIFIERS:
+            name = IDENTIFIERS[lowered]
+            written.setdefault(name, token)
+            return f'"{name}"'
+        return token
+
+    sql = _TOKENS.sub(replace, sql)
+    if match:
+        sql = sql.rstrip().rstrip(";") + "\nLIMIT %s"
+    renames = tuple((name, as_written) for name, as_written in written.items() if name != as_written)
+    return sql, bool(match), renames
+
+
+class Row(tuple):
+    """Ligne de résultat accessible par position ou par nom de colonne, comme pyodbc.Row."""
+    __slots__ = ()
+    _columns: Dict[str, int] = {}
+
+    def __getattr__(self, name):
+        try:
+            return self[self._columns[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+@lru_cache(maxsize=256)
+def _row_type(names: Tuple[str, ...]):
+    return type("Row", (Row,), {"__slots__": (), "_columns": {name: i for i, name in enumerate(names)}})
+
+
+class PostgresCursor:
+    """Curseur psycopg présentant l'interface pyodbc utilisée par les modules de database/."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._renames = {}
+        self._row_type = Row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return (self._row_type(row) for row in self._cursor)
+
+    def execute(self, sql, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        query, top_last, renames = translate_query(sql)
+        params = list(params)
+        if top_last:
+            params.append(params.pop(0))
+        self._cursor.execute(query, params)
+        self._renames = dict(renames)
+        if self._cursor.description is not None:
+            self._row_type = _row_type(tuple(column[0] for column in self.description))
+        return self
+
+    @property
+    def description(self):
+        description = self._cursor.description
+        if description is None:
+            return None
+        return [(self._renames.get(column[0], column[0]),) + tuple(column)[1:] for column in description]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._row_type(row)
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        return [self._row_type(row) for row in rows]
+
+    def fetchall(self):
+        return [self._row_type(row) for row in self._cursor.fetchall()]
+
+
+class PostgresBackend:
+    """
+    Backend PostgreSQL (DB_BACKEND=postgresql) : pilote natif psycopg 3 (libpq).
+
+    Les requêtes exécutées au moins `prepare_threshold` fois sur une connexion sont
+    préparées côté serveur (plan réutilisé, seuls les paramètres sont envoyés) ;
+    PG_PREPARE_THRESHOLD=none désactive la préparation (ex. derrière PgBouncer en mode transaction).
+
+    Les comparaisons de marques, modèles et noms d'utilisateur reposent sur la collation
+    insensible à la casse de SQL Server : sql/indexes_postgresql.sql passe ces colonnes
+    en CITEXT pour conserver le même comportement sans modifier les requêtes.
+    """
+
+    name = "postgresql"
+
+    def __init__(self, params: dict, prepare_threshold=5, prepared_max=256):
+        import psycopg
+        self._psycopg = psycopg
+        self.params = params
+        self.prepare_threshold = prepare_threshold
+        self.prepared_max = prepared_max
+        self.errors = (psycopg.Error,)
+        self.integrity_errors = (psycopg.IntegrityError,)
+
+    @classmethod
+    def from_env(cls):
+        threshold = os.getenv('PG_PREPARE_THRESHOLD', '5').strip().lower()
+        return cls(
+            {
+                "host": os.getenv('PG_HOST', 'localhost'),
+                "port": int(os.getenv('PG_PORT', '5432')),
+                "dbname": os.getenv('PG_DATABASE'),
+                "user": os.getenv('PG_USER'),
+                "password": os.getenv('PG_PASSWORD'),
+                "sslmode": os.getenv('PG_SSLMODE', 'prefer'),
+                "connect_timeout": int(os.getenv('PG_CONNECT_TIMEOUT', '10')),
+                "application_name": os.getenv('PG_APPLICATION_NAME', 'api_carter_cash'),
+            },
+            prepare_threshold=None if threshold in ('', 'none') else int(threshold),
+            prepared_max=int(os.getenv('PG_PREPARED_MAX', '256')),
+        )
+
+    def connect(self):
+        conn = self._psycopg.connect(**self.params)
+        conn.prepare_threshold = self.prepare_threshold
+        conn.prepared_max = self.prepared_max
+        return conn
+
+    def wrap_cursor(self, cursor):
+        return PostgresCursor(cursor)
+
+    def table_exists(self, cursor, name: str) -> bool:
+        # Nom entre guillemets : tables créées avec leur casse
+        cursor.execute("SELECT CASE WHEN to_regclass(?) IS NULL THEN 0 ELSE 1 END", ('"' + name + '"',))
+        return bool(cursor.fetchone()[0])
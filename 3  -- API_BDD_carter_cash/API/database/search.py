@@ -1,9 +1,101 @@
 # search.py
 from .db_connection import db
+from .cache import TTLCache, VersionMarker, SqliteCache
+from .singleflight import SingleFlight
+from .marques import brand_list
+from responses import dumps
 from fastapi import HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional, Iterator
+import csv
+import hashlib
+import io
+import os
 import re
+
+# PERFORMANCE : les produits ne changent qu'à chaque exécution du pipeline Dagster.
+# Les réponses sont mises en cache par marque et invalidées dès que le marqueur
+# de version (dernier Date_scrap / dernier ID_Produit) change.
+SEARCH_CACHE_MAX_AGE = int(os.getenv('SEARCH_CACHE_MAX_AGE', '300'))
+
+# Pagination par curseur (keyset sur ID_Produit)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+search_cache = TTLCache(
+    maxsize=int(os.getenv('SEARCH_CACHE_SIZE', '256')),
+    ttl=float(os.getenv('SEARCH_CACHE_TTL', '3600'))
+)
+
+# Cache partagé optionnel entre les workers d'une même machine
+shared_search_cache = (
+    SqliteCache(
+        os.getenv('SEARCH_CACHE_PATH'),
+        ttl=search_cache.ttl,
+        maxsize=int(os.getenv('SEARCH_CACHE_SHARED_SIZE', '10000'))
+    )
+    if os.getenv('SEARCH_CACHE_PATH') else None
+)
+
+# Recherches identiques simultanées regroupées en une seule requête SQL
+search_flight = SingleFlight()
+
+def load_data_version() -> str:
+    """
+    Marqueur qui change à chaque nouveau scraping ou insertion dans Produit,
+    et à chaque mise à jour de Offre_Courante en fin de pipeline.
+    """
+    with db.get_cursor() as cursor:
+        # Offre_Courante n'existe qu'après le premier passage de 8_offre_courante.py :
+        # sans elle, le marqueur ne dépend que de Produit (pas d'erreur 500 sur /search)
+        has_offers = db.backend.table_exists(cursor, "Offre_Courante")
+        offers = "(SELECT MAX(Date_derniere_vue) FROM Offre_Courante)" if has_offers else "NULL"
+        cursor.execute(f"SELECT MAX(Date_scrap), MAX(ID_Produit), {offers} FROM Produit")
+        row = cursor.fetchone()
+    return ":".join(str(value) for value in row)
+
+data_version = VersionMarker(
+    load_data_version,
+    interval=float(os.getenv('SEARCH_CACHE_CHECK_INTERVAL', '60'))
+)
+
+@data_version.on_change
+def _clear_search_cache(version: str):
+    search_cache.clear()
+
+@data_version.on_change
+def _reload_brand_list(version: str):
+    # Appelée aussi avant chaque recherche : la première lecture du marqueur ne
+    # déclenche pas on_change, et la liste peut dater du préchargement par le maître
+    try:
+        brand_list.sync(version)
+    except Exception as e:
+        # Sans liste à jour, aucune marque n'est écartée avant la base
+        brand_list.clear()
+        print(f"WARNING: Brand list reload failed: {e}")
+
+def require_current_offers():
+    """
+    Offre_Courante est créée par 8_offre_courante.py (pipeline SQL Server) : tant qu'elle
+    est absente, par exemple sur une copie PostgreSQL, latest_only répond 503.
+    """
+    if not db.table_exists("Offre_Courante"):
+        raise HTTPException(
+            status_code=503,
+            detail="Current offers are not available on this database"
+        )
+
+def normalize_marque(marque: str) -> str:
+    return " ".join(marque.split()).lower()
 # search.py
+PRODUCT_COLUMNS = "ID_Produit, URL_Produit, Prix, Info_generale, Descriptif, Note, Marque, Date_scrap"
+
+# Offre_Courante (maintenue par le pipeline Dagster, 8_offre_courante.py) : mêmes
+# champs que Produit, plus le prix précédent et la date de première apparition
+CURRENT_OFFER_COLUMNS = (
+    "ID_Produit, URL_Produit, Prix, Info_generale, Descriptif, Note, Marque, "
+    "Date_derniere_vue AS Date_scrap, Prix_precedent, Date_premiere_vue"
+)
+
 def validate_marque(marque: str) -> bool:
     """Valide que la marque ne contient que des caractères autorisés"""
     # Liste de mots-clés SQL interdits
@@ -20,7 +112,26 @@ def validate_marque(marque: str) -> bool:
     pattern = r'^[a-zA-Z0-9\s\-_.]+$'
     return bool(re.match(pattern, marque))
 
-def get_data_from_db(marque: str) -> List[Dict[str, Any]]:
+def get_data_from_db(
+    marque: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    latest_only: bool = False,
+    with_total: bool = False,
+    columnar: bool = False
+) -> Dict[str, Any]:
+    """
+    Page de produits d'une marque, triée par ID_Produit.
+
+    - limit : taille de la page (1 à MAX_PAGE_SIZE)
+    - after : dernier ID_Produit de la page précédente (`next_after` de la réponse)
+    - latest_only : uniquement les offres du dernier scraping de la marque, lues dans
+      Offre_Courante (une ligne par URL, sans parcourir l'historique)
+    - with_total : ajoute le nombre total de produits (requête COUNT supplémentaire)
+    - columnar : `columns` + `rows` (listes de valeurs) au lieu d'un objet par produit,
+      plus compact et sans construction d'un dict par ligne ; désactivé par défaut
+      pour ne pas changer le format `data` attendu par les clients existants
+    """
     # Validation renforcée des entrées
     if not validate_marque(marque):
         raise HTTPException(
@@ -38,25 +149,214 @@ def get_data_from_db(marque: str) -> List[Dict[str, Any]]:
             detail="Suspicious input detected"
         )
 
-    query = """
-    SELECT ID_Produit, URL_Produit, Prix, Info_generale, 
-           Descriptif, Note, Marque, Date_scrap
-    FROM Produit 
-    WHERE Marque = ?
+    if not (1 <= limit <= MAX_PAGE_SIZE) or (after is not None and after < 0):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid pagination parameters"
+        )
+
+    # Filtre commun aux requêtes de page et de comptage
+    params = [marque]
+    if latest_only:
+        require_current_offers()
+        # PERFORMANCE : offres courantes (une ligne par URL) plutôt que l'historique de Produit
+        columns = CURRENT_OFFER_COLUMNS
+        table = "Offre_Courante"
+        where = (
+            "WHERE Marque = ? AND Date_derniere_vue = "
+            "(SELECT MAX(Date_derniere_vue) FROM Offre_Courante WHERE Marque = ?)"
+        )
+        params.append(marque)
+    else:
+        columns = PRODUCT_COLUMNS
+        table = "Produit"
+        where = "WHERE Marque = ?"
+
+    # Une ligne de plus que demandé pour savoir s'il existe une page suivante
+    query = f"""
+    SELECT TOP (?) {columns}
+    FROM {table} 
+    {where} AND ID_Produit > ?
+    ORDER BY ID_Produit
     """
     
     with db.get_cursor() as cursor:
         try:
-            cursor.execute(query, (marque,))
+            cursor.execute(query, (limit + 1, *params, after or 0))
             columns = [column[0] for column in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            return {
+            rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            response = {
                 "success": True,
-                "count": len(results),
-                "data": results
+                "count": len(rows),
+                # ID_Produit est la première colonne sélectionnée
+                "next_after": rows[-1][0] if has_more else None
             }
+            if columnar:
+                response["columns"] = columns
+                response["rows"] = [tuple(row) for row in rows]
+            else:
+                response["data"] = [dict(zip(columns, row)) for row in rows]
+            if with_total:
+                cursor.execute(f"SELECT COUNT(*) FROM {table} {where}", params)
+                response["total"] = cursor.fetchone()[0]
+            return response
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail="An error occurred while processing your request"
             )
+
+def _empty_page(latest_only: bool, with_total: bool, columnar: bool) -> Dict[str, Any]:
+    """Réponse de get_data_from_db pour une marque sans produit."""
+    response = {"success": True, "count": 0, "next_after": None}
+    if columnar:
+        columns = CURRENT_OFFER_COLUMNS if latest_only else PRODUCT_COLUMNS
+        response["columns"] = [column.strip().split(" AS ")[-1] for column in columns.split(",")]
+        response["rows"] = []
+    else:
+        response["data"] = []
+    if with_total:
+        response["total"] = 0
+    return response
+
+def make_etag(version: str, key: str) -> str:
+    digest = hashlib.sha1(f"{version}|{key}".encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def _get_cache_entry(
+    marque: str,
+    limit: int,
+    after: Optional[int],
+    latest_only: bool,
+    with_total: bool,
+    columnar: bool
+) -> Tuple[tuple, str]:
+    """Entrée (version, résultat, corps JSON) du cache et clé associée."""
+    if not validate_marque(marque):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid or suspicious brand name detected"
+        )
+
+    key = f"{normalize_marque(marque)}|{limit}|{after or 0}|{int(latest_only)}|{int(with_total)}|{int(columnar)}"
+    version = data_version.current()
+
+    # Marque absente du catalogue (liste chargée pour cette version des données) :
+    # page vide sans requête SQL ni entrée de cache
+    _reload_brand_list(version)
+    if not brand_list.may_exist(normalize_marque(marque)):
+        payload = _empty_page(latest_only, with_total, columnar)
+        return (version, payload, dumps(payload)), key
+
+    entry = search_cache.get(key)
+    if entry is None or entry[0] != version:
+        payload = shared_search_cache.get(key, version) if shared_search_cache else None
+        if payload is None:
+            payload = get_data_from_db(marque, limit, after, latest_only, with_total, columnar)
+            if shared_search_cache:
+                shared_search_cache.set(key, version, payload)
+        # PERFORMANCE : le corps JSON est sérialisé une seule fois puis resservi tel quel
+        entry = (version, payload, dumps(payload))
+        search_cache.set(key, entry)
+    return entry, key
+
+def get_cached_data(
+    marque: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    latest_only: bool = False,
+    with_total: bool = False,
+    columnar: bool = False
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Résultat de get_data_from_db servi depuis le cache lorsque les données n'ont pas changé.
+    Renvoie le résultat et son ETag.
+    """
+    entry, key = _get_cache_entry(marque, limit, after, latest_only, with_total, columnar)
+    return entry[1], make_etag(entry[0], key)
+
+def get_cached_json(
+    marque: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    latest_only: bool = False,
+    with_total: bool = False,
+    columnar: bool = False
+) -> Tuple[bytes, str]:
+    """Comme get_cached_data, mais renvoie le corps JSON déjà sérialisé (orjson)."""
+    entry, key = _get_cache_entry(marque, limit, after, latest_only, with_total, columnar)
+    return entry[2], make_etag(entry[0], key)
+
+EXPORT_COLUMNS = [
+    "ID_Produit", "URL_Produit", "Prix", "Info_generale",
+    "Descriptif", "Note", "Marque", "Date_scrap"
+]
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+def _encode_ndjson(columns, rows) -> bytes:
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+def _encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+def export_products(
+    marque: Optional[str] = None,
+    fmt: str = "ndjson",
+    latest_only: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Export du catalogue en flux (NDJSON ou CSV) lu par lots avec fetchmany :
+    la mémoire utilisée ne dépend pas du nombre de lignes.
+    La validation est faite immédiatement, la lecture au fil de l'itération.
+    """
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    if marque is not None and not validate_marque(marque):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid or suspicious brand name detected"
+        )
+
+    conditions = []
+    params = []
+    if marque is not None:
+        conditions.append("Marque = ?")
+        params.append(marque)
+    if latest_only:
+        columns = ", ".join(EXPORT_COLUMNS).replace("Date_scrap", "Date_derniere_vue AS Date_scrap")
+        table = "Offre_Courante"
+        # Dernier scraping de chaque marque, comme /search?latest_only=true
+        conditions.append(
+            "Date_derniere_vue = (SELECT MAX(o.Date_derniere_vue) FROM Offre_Courante AS o "
+            "WHERE o.Marque = Offre_Courante.Marque)"
+        )
+    else:
+        columns = ", ".join(EXPORT_COLUMNS)
+        table = "Produit"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    query = f"""
+    SELECT {columns}
+    FROM {table}
+    {where}
+    ORDER BY ID_Produit
+    """
+
+    def generate():
+        if fmt == "csv":
+            yield _encode_csv([EXPORT_COLUMNS])
+        # Connexion du pool réservé aux exports, gardée pendant tout le téléchargement
+        with db.get_cursor(pool=db.export_pool) as cursor:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield _encode_csv(rows) if fmt == "csv" else _encode_ndjson(EXPORT_COLUMNS, rows)
+
+    return generate()
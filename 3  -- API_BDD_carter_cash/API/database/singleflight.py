@@ -0,0 +1,49 @@
+# singleflight.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Regroupe les appels simultanés portant sur la même clé : le premier lance le
+    travail, les suivants attendent son résultat (ou son exception) au lieu de
+    relancer la même requête SQL.
+
+    Le travail s'exécute dans une tâche séparée : la déconnexion d'un client
+    n'annule pas la requête attendue par les autres.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None or task.get_loop() is not asyncio.get_running_loop():
+                task = asyncio.ensure_future(func())
+                self._tasks[key] = task
+                task.add_done_callback(lambda done, key=key: self._forget(key, done))
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        # Exception déjà transmise aux appelants ; évite l'avertissement si tous ont abandonné
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._tasks),
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+            }
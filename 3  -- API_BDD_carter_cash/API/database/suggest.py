@@ -0,0 +1,156 @@
+# suggest.py
+import re
+import time
+import heapq
+import bisect
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from .dimensions_index import DimensionsIndex, dimensions_index, DIMENSIONS_INDEX_REFRESH_SECONDS
+
+# Chiffres romains fréquents dans les noms de modèles (Clio IV, Golf VII...)
+ROMAN_NUMERALS = {
+    "ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6",
+    "vii": "7", "viii": "8", "ix": "9", "x": "10",
+}
+
+
+def normalize(text: str) -> str:
+    """
+    Forme compacte utilisée pour la comparaison : sans accents ni ponctuation,
+    en minuscules, chiffres romains convertis ("Clio IV" -> "clio4", "C-3" -> "c3").
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    tokens = re.findall(r"[a-z0-9]+", text)
+    return "".join(ROMAN_NUMERALS.get(token, token) for token in tokens)
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SuggestIndex:
+    """
+    Index de recherche approximative (trigrammes) et par préfixe sur les couples
+    (Marque, Modele) de DimensionsParModel.
+    """
+
+    def __init__(self, vehicles: Dict[Tuple[str, str], Iterable[int]]):
+        self.candidates = []           # (marque, modele, années)
+        self._model_keys = []          # modèle normalisé
+        self._full_keys = []           # marque + modèle normalisés
+        self._brand_keys = []          # marque normalisée
+        self._gram_counts = []         # (trigrammes du modèle, trigrammes marque + modèle)
+        self._trigrams = defaultdict(list)
+        for (marque, modele), years in sorted(vehicles.items()):
+            candidate_id = len(self.candidates)
+            self.candidates.append((marque, modele, sorted(set(years))))
+            model_key = normalize(modele)
+            full_key = normalize(f"{marque} {modele}")
+            self._model_keys.append(model_key)
+            self._full_keys.append(full_key)
+            self._brand_keys.append(normalize(marque))
+            model_grams, full_grams = trigrams(model_key), trigrams(full_key)
+            self._gram_counts.append((len(model_grams), len(full_grams)))
+            for gram in model_grams | full_grams:
+                self._trigrams[gram].append(candidate_id)
+
+        # Listes triées pour la recherche par préfixe (bisect)
+        self._model_prefix = sorted((key, i) for i, key in enumerate(self._model_keys))
+        self._full_prefix = sorted((key, i) for i, key in enumerate(self._full_keys))
+
+    def __len__(self):
+        return len(self.candidates)
+
+    @staticmethod
+    def _prefix_matches(entries, prefix: str) -> List[int]:
+        start = bisect.bisect_left(entries, (prefix,))
+        matches = []
+        for key, candidate_id in entries[start:]:
+            if not key.startswith(prefix):
+                break
+            matches.append(candidate_id)
+        return matches
+
+    def search(self, query: str, limit: int = 10, marque: Optional[str] = None) -> List[Dict[str, Any]]:
+        key = normalize(query)
+        if not key:
+            return []
+        brand_key = normalize(marque) if marque else None
+
+        scores = {}
+
+        # Similarité de Dice sur les trigrammes (fautes de frappe, ponctuation) ;
+        # les candidats partageant trop peu de trigrammes sont ignorés
+        query_grams = trigrams(key)
+        shared = Counter(chain.from_iterable(self._trigrams.get(gram, ()) for gram in query_grams))
+        min_shared = max(1, len(query_grams) // 3)
+        for candidate_id, count in shared.items():
+            if count < min_shared:
+                continue
+            model_count, full_count = self._gram_counts[candidate_id]
+            best = 2 * count / (len(query_grams) + min(model_count, full_count))
+            scores[candidate_id] = min(best, 1.0)
+
+        # Bonus pour les préfixes (autocomplétion) et les correspondances exactes
+        for candidate_id in self._prefix_matches(self._model_prefix, key) + self._prefix_matches(self._full_prefix, key):
+            exact = key in (self._model_keys[candidate_id], self._full_keys[candidate_id])
+            scores[candidate_id] = max(scores.get(candidate_id, 0.0), 1.0) + (1.0 if exact else 0.5)
+
+        if brand_key:
+            scores = {
+                candidate_id: score for candidate_id, score in scores.items()
+                if self._brand_keys[candidate_id] == brand_key
+            }
+
+        best = heapq.nlargest(
+            limit, scores.items(),
+            key=lambda item: (item[1], -item[0])
+        )
+        results = [(score,) + self.candidates[candidate_id] for candidate_id, score in best]
+        return [
+            {"marque": marque_name, "modele": modele, "annees": years, "score": round(score, 3)}
+            for score, marque_name, modele, years in results[:limit]
+        ]
+
+
+_suggest_index: Optional[SuggestIndex] = None
+_suggest_version: Optional[str] = None
+_lock = threading.Lock()
+
+# Copie propre aux suggestions quand l'index partagé est désactivé ou pas encore chargé :
+# la charger ne fait pas basculer /dimensions sur l'index en mémoire
+_own_index = DimensionsIndex()
+_own_checked_at = 0.0
+
+
+def _vehicles_index() -> DimensionsIndex:
+    """Index partagé s'il est chargé, sinon copie propre vérifiée au plus toutes les DIMENSIONS_INDEX_REFRESH_SECONDS."""
+    global _own_checked_at
+    if dimensions_index.loaded:
+        return dimensions_index
+    if not _own_index.loaded or time.monotonic() - _own_checked_at > DIMENSIONS_INDEX_REFRESH_SECONDS:
+        _own_index.refresh()
+        _own_checked_at = time.monotonic()
+    return _own_index
+
+
+def get_suggest_index() -> SuggestIndex:
+    """Index de suggestions, reconstruit quand l'index des dimensions change de version."""
+    global _suggest_index, _suggest_version
+    index = _vehicles_index()
+    if _suggest_version != index.version:
+        with _lock:
+            if _suggest_version != index.version:
+                version = index.version
+                _suggest_index = SuggestIndex(index.vehicles())
+                _suggest_version = version
+    return _suggest_index
+
+
+def suggest_vehicles(query: str, limit: int = 10, marque: Optional[str] = None) -> List[Dict[str, Any]]:
+    return get_suggest_index().search(query, limit=limit, marque=marque)
@@ -0,0 +1,46 @@
+# gunicorn.conf.py
+# Mode production : plusieurs workers uvicorn derrière le maître gunicorn.
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# Rechargement sans coupure : kill -HUP <pid du maître> (nouveaux workers démarrés,
+# anciens arrêtés après avoir terminé leurs requêtes, dans la limite de graceful_timeout).
+# Avec preload_app, le code n'est pas relu par HUP : redémarrer le maître pour déployer.
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Un worker par cœur : le travail CPU (JWT, sérialisation, index en mémoire) est
+# réparti entre processus, les attentes SQL restent dans l'exécuteur de chaque worker
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Application importée et données en lecture seule chargées une seule fois dans le
+# maître, puis partagées en copy-on-write par les workers (voir when_ready)
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recyclage périodique des workers (fuites mémoire), décalé pour ne pas les redémarrer ensemble
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+
+
+def when_ready(server):
+    # Maître, après l'import de l'application et avant le premier fork
+    if preload_app:
+        from main import preload_shared_state
+        preload_shared_state()
+        server.log.info("Shared state preloaded before forking workers")
+
+
+def post_fork(server, worker):
+    # Les connexions pyodbc et verrous hérités du maître ne sont pas utilisables dans le fils
+    from database.db_connection import db
+    db.pool.reset_after_fork()
+    db.export_pool.reset_after_fork()
@@ -1,24 +1,164 @@
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
-from routers import search_router, auth_router, dimensions_router
+import os
+import gc
+import hmac
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import RedirectResponse, PlainTextResponse
+from responses import FastJSONResponse
+from metrics import REGISTRY, MetricsMiddleware
+from routers import (
+    search_router, auth_router, dimensions_router, offres_router, facettes_router, historique_router,
+    health_router
+)
+from database.db_connection import db
+from database.executor import db_executor, export_executor, run_in_db
+from database.auth import hash_executor, user_cache, oauth2_scheme, get_current_user
+from database.search import search_cache, search_flight, data_version
+from database.facettes import facet_flight
+from database.historique import history_cache
+from database.marques import brand_list
+from database.dimensions_index import (
+    dimensions_index, refresh_periodically,
+    DIMENSIONS_INDEX_ENABLED, DIMENSIONS_INDEX_REFRESH_SECONDS
+)
+
+
+def load_shared_state():
+    """Charge les données en lecture seule : index DimensionsParModel et liste des marques."""
+    if DIMENSIONS_INDEX_ENABLED:
+        try:
+            # Relit seulement le marqueur de version si l'index a été préchargé
+            dimensions_index.refresh()
+        except Exception as e:
+            print(f"WARNING: Dimensions index load failed, falling back to SQL: {e}")
+    if not brand_list.loaded:
+        try:
+            # Marqueur lu avant la liste : une marque ajoutée entre les deux déclenche un rechargement
+            brand_list.refresh(data_version.current())
+        except Exception as e:
+            print(f"WARNING: Brand list load failed, unknown brands will hit the database: {e}")
+
+
+def preload_shared_state():
+    """
+    Appelée une fois dans le processus maître de gunicorn, avant le fork des workers
+    (voir gunicorn.conf.py) : les données chargées sont partagées en copy-on-write
+    au lieu d'être chargées et stockées une fois par worker.
+    """
+    load_shared_state()
+    # Les connexions ouvertes pour le chargement ne doivent pas être héritées
+    db.close()
+    # Objets préchargés exclus du ramasse-miettes : ses passages n'écrivent plus
+    # dans leurs pages, qui restent partagées entre les workers
+    gc.freeze()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ouverture des connexions minimales du pool au démarrage
+    try:
+        db.pool.warm_up()
+    except Exception as e:
+        print(f"WARNING: Database pool warm-up failed: {e}")
+
+    # Chargement de l'index DimensionsParModel (s'il n'a pas été préchargé) puis rafraîchissement périodique
+    await run_in_db(load_shared_state)
+    refresh_task = None
+    if DIMENSIONS_INDEX_ENABLED:
+        refresh_task = asyncio.create_task(
+            refresh_periodically(dimensions_index, DIMENSIONS_INDEX_REFRESH_SECONDS)
+        )
+    yield
+    if refresh_task is not None:
+        refresh_task.cancel()
+    # Arrêt de l'exécuteur puis fermeture des connexions du pool
+    db_executor.shutdown()
+    export_executor.shutdown()
+    hash_executor.shutdown()
+    db.close()
+
 
 app = FastAPI(
     title="API Carter Cash",
     description="API pour la recherche de pneus et dimensions par véhicules",
     version="1.0.0",
-    docs_url="/"  # Ceci déplace la documentation Swagger à la racine
+    docs_url="/",  # Ceci déplace la documentation Swagger à la racine
+    lifespan=lifespan,
+    # PERFORMANCE : sérialisation orjson pour toutes les réponses JSON
+    default_response_class=FastJSONResponse
 )
 
+# Compression gzip des réponses au-delà de GZIP_MINIMUM_SIZE octets (si le client l'accepte) ;
+# le niveau 6 compresse presque autant que le niveau 9 pour un coût CPU bien moindre
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv('GZIP_MINIMUM_SIZE', '1000')),
+    compresslevel=int(os.getenv('GZIP_COMPRESS_LEVEL', '6'))
+)
+
+# Mesures par requête (latence, statuts, temps base / auth / sérialisation), exposées sur /metrics
+app.add_middleware(MetricsMiddleware)
+
+REGISTRY.register_stats("db_pool", "Pool de connexions SQL Server", db.pool.stats)
+REGISTRY.register_stats("export_pool", "Pool de connexions des exports en flux", db.export_pool.stats)
+REGISTRY.register_stats("executor", "Exécuteurs bornés (threads)", db_executor.stats, name="db")
+REGISTRY.register_stats("executor", "Exécuteurs bornés (threads)", hash_executor.stats, name="hash")
+REGISTRY.register_stats("executor", "Exécuteurs bornés (threads)", export_executor.stats, name="export")
+REGISTRY.register_stats("cache", "Caches mémoire", search_cache.stats, name="search")
+REGISTRY.register_stats("cache", "Caches mémoire", history_cache.stats, name="history")
+REGISTRY.register_stats("cache", "Caches mémoire", user_cache.stats, name="user")
+REGISTRY.register_stats("singleflight", "Recherches simultanées regroupées", search_flight.stats, name="search")
+REGISTRY.register_stats("singleflight", "Recherches simultanées regroupées", facet_flight.stats, name="facettes")
+REGISTRY.register_stats("dimensions_index", "Index DimensionsParModel en mémoire", dimensions_index.stats)
+REGISTRY.register_stats("brand_list", "Liste des marques en mémoire", brand_list.stats)
+
 # Inclusion des routeurs
 app.include_router(search_router.router)
 app.include_router(auth_router.router)
 app.include_router(dimensions_router.router)
+app.include_router(offres_router.router)
+app.include_router(facettes_router.router)
+app.include_router(historique_router.router)
+app.include_router(health_router.router)
 
 # Redirection de /docs vers la racine (optionnel si vous voulez garder l'accès via /docs aussi)
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_redirect():
     return RedirectResponse(url="/")
 
+# SÉCURITÉ : jeton dédié au collecteur Prometheus (Authorization: Bearer <METRICS_TOKEN>) ;
+# sans METRICS_TOKEN, /metrics exige un token utilisateur comme les routes protégées
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+async def require_metrics_access(token: str = Depends(oauth2_scheme)):
+    if METRICS_TOKEN:
+        if not hmac.compare_digest(token.encode("utf-8"), METRICS_TOKEN.encode("utf-8")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return
+    await get_current_user(token)
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    """Métriques au format texte Prometheus (jeton METRICS_TOKEN ou token utilisateur)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+
+    parser = argparse.ArgumentParser(
+        description="Lance l'API avec uvicorn (en production : gunicorn -c gunicorn.conf.py main:app)"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="processus uvicorn (sans préchargement partagé)")
+    parser.add_argument("--reload", action="store_true", help="redémarrage à chaque modification (développement)")
+    args = parser.parse_args()
+
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, reload=args.reload)
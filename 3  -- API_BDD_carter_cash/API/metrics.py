@@ -0,0 +1,258 @@
+# metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Temps cumulés par phase (db, auth, serialization) de la requête en cours.
+# Le dict est partagé avec les threads de l'exécuteur (contexte copié), qui l'alimentent.
+_request_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+
+class Counter(_Metric):
+    """Compteur monotone, par combinaison de labels."""
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Valeur instantanée (peut augmenter ou diminuer)."""
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution de durées (secondes) en buckets cumulés, avec somme et nombre."""
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [compteurs par bucket (+Inf en dernier), somme, nombre]
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def _samples(self):
+        with self._lock:
+            values = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in self._values.items())
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class Registry:
+    """
+    Ensemble des métriques exposées sur /metrics (format texte Prometheus).
+
+    Les statistiques déjà calculées ailleurs (pool, exécuteurs, caches) sont lues
+    au moment de l'export via register_stats.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._stats = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, documentation: str, stats: Callable[[], dict], **labels):
+        """Expose chaque valeur numérique de stats() comme une jauge `<prefix>_<clé>`."""
+        with self._lock:
+            self._stats.append((prefix, documentation, stats, labels))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, stats = list(self._metrics), list(self._stats)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        gauges: Dict[str, list] = {}
+        for prefix, documentation, stats_func, labels in stats:
+            label_names, label_values = tuple(labels), tuple(labels.values())
+            for key, value in stats_func().items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                gauges.setdefault(name, [documentation]).append(
+                    f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}"
+                )
+        for name, (documentation, *samples) in gauges.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests_total = REGISTRY.register(Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")
+))
+http_request_duration_seconds = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "route")
+))
+http_requests_in_flight = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requêtes HTTP en cours de traitement"
+))
+http_request_phase_seconds = REGISTRY.register(Histogram(
+    "http_request_phase_seconds", "Temps passé par requête en base, authentification et sérialisation",
+    ("route", "phase")
+))
+db_slow_queries_total = REGISTRY.register(Counter(
+    "db_slow_queries_total", "Requêtes SQL plus lentes que DB_SLOW_QUERY_MS"
+))
+
+PHASES = ("db", "auth", "serialization")
+
+
+def record_phase(phase: str, seconds: float):
+    """Ajoute une durée à la phase indiquée de la requête en cours (ignoré hors requête)."""
+    phases = _request_phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str):
+    """Mesure le bloc et l'attribue à une phase de la requête en cours."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : latence par route, requêtes en cours, codes de statut
+    et temps par phase (db / auth / serialization) de chaque requête.
+    """
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        phases: Dict[str, float] = {}
+        token = _request_phases.set(phases)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            _request_phases.reset(token)
+
+            # Gabarit de la route (/search/{marque}) plutôt que le chemin, pour borner les séries
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests_total.inc(method=method, route=route_path, status=str(status["code"]))
+            http_request_duration_seconds.observe(elapsed, method=method, route=route_path)
+            for phase in PHASES:
+                if phase in phases:
+                    http_request_phase_seconds.observe(phases[phase], route=route_path, phase=phase)
@@ -1,5 +1,14 @@
 from pydantic import BaseModel, EmailStr
 from pydantic import BaseModel, EmailStr, Field
+from typing import List
+from dotenv import load_dotenv
+import os
+
+# Variables d'environnement lues ici avant tout import du package database
+load_dotenv()
+
+# Nombre maximal de véhicules par appel à /dimensions_for_modele_car/batch
+DIMENSIONS_BATCH_MAX = int(os.getenv('DIMENSIONS_BATCH_MAX', '1000'))
 
 
 class Produit(BaseModel):
@@ -28,6 +37,17 @@ class User(UserBase):
     class Config:
         orm_mode = True
         
+class Vehicule(BaseModel):
+    marque: str = Field(..., min_length=1, max_length=50)
+    modele: str = Field(..., min_length=1, max_length=50)
+    annee: int
+
+
+class VehiculeBatch(BaseModel):
+    # Taille vérifiée à la validation, avant de construire chaque Vehicule
+    vehicules: List[Vehicule] = Field(..., max_length=DIMENSIONS_BATCH_MAX)
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,89 @@
+# rate_limit.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from database.auth import get_current_user
+from metrics import REGISTRY, Counter
+from models import User
+
+rate_limited_total = REGISTRY.register(Counter(
+    "http_rate_limited_total", "Requêtes rejetées par la limitation de débit (HTTP 429)", ("limit",)
+))
+
+
+def parse_rate(value: str) -> Optional[Tuple[int, float]]:
+    """
+    "120/60" -> 120 requêtes par 60 secondes (rafale maximale de 120).
+    "0" ou "" désactive la limite.
+    """
+    value = value.strip()
+    if value in ("", "0"):
+        return None
+    requests, _, period = value.partition("/")
+    requests, period = int(requests), float(period or 1)
+    if requests <= 0 or period <= 0:
+        raise ValueError(f"Invalid rate limit '{value}' (expected <requests>/<seconds>)")
+    return requests, period
+
+
+class RateLimiter:
+    """
+    Limiteur à seau de jetons, un seau par clé (sujet du JWT).
+
+    Le seau contient au plus `capacity` jetons et se remplit de capacity / period
+    jetons par seconde ; chaque requête consomme un jeton. Les seaux inactifs les
+    plus anciens sont oubliés au-delà de `max_keys` clés.
+    """
+
+    def __init__(self, capacity: int, period: float, max_keys: int = 10000, timer=time.monotonic):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        self._timer = timer
+        self._buckets = OrderedDict()  # clé -> (jetons, horodatage)
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> Tuple[bool, float]:
+        """Consomme un jeton. Renvoie (autorisé, secondes avant le prochain jeton)."""
+        now = self._timer()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (1 - tokens) / self.rate
+        return allowed, retry_after
+
+
+def rate_limit(name: str, default: str):
+    """
+    Dépendance FastAPI limitant le débit par utilisateur authentifié.
+    La limite est lue dans RATE_LIMIT_<NAME> (ex. RATE_LIMIT_SEARCH=120/60).
+    """
+    rate = parse_rate(os.getenv(f"RATE_LIMIT_{name.upper()}", default))
+
+    async def dependency(current_user: User = Depends(get_current_user)):
+        limiter = dependency.limiter
+        if limiter is None:
+            return
+        key = current_user.username if current_user is not None else "anonymous"
+        allowed, retry_after = limiter.hit(key)
+        if not allowed:
+            rate_limited_total.inc(limit=name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+    dependency.limiter = RateLimiter(*rate) if rate else None
+    return dependency
@@ -0,0 +1,30 @@
+# responses.py
+import decimal
+import orjson
+from fastapi.responses import ORJSONResponse
+from metrics import timed
+
+
+def _default(value):
+    # orjson gère nativement str, int, float, date/datetime ; pyodbc renvoie Decimal pour NUMERIC
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Sérialisation JSON rapide (orjson) utilisée par les réponses et les exports."""
+    with timed("serialization"):
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Réponse JSON sérialisée par orjson.
+
+    Renvoyée directement par les routes à gros volume : FastAPI n'applique alors
+    pas jsonable_encoder, qui parcourt chaque valeur de chaque ligne en Python.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
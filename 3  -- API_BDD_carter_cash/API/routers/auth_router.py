@@ -5,37 +5,43 @@ from typing import Optional
 from datetime import datetime, timedelta
 
 from database.auth import (
-    verify_password, create_user, get_user, create_access_token,
-    ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash
+    create_user, get_user, create_access_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash_async,
+    verify_and_update_password_async,
+    user_exists, update_last_login, update_password,
+    get_current_user, invalidate_user, password_fingerprint
 )
+from database.executor import run_in_db
 from models import UserCreate, Token, PasswordChange, User
-from database.db_connection import db
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = get_user(form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_in_db(get_user, form_data.username)
+    valid, new_hashed_password = (False, None)
+    if user:
+        valid, new_hashed_password = await verify_and_update_password_async(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Mise à jour de la dernière connexion
-    update_query = """
-    UPDATE USER_API 
-    SET Date_Derniere_Connexion = ? 
-    WHERE username = ?
-    """
-    with db.get_cursor() as cursor:
-        cursor.execute(update_query, (datetime.now(), user.username))
+    # Mise à jour de la dernière connexion (et rehachage si le coût bcrypt a augmenté)
+    await run_in_db(update_last_login, user.username, new_hashed_password)
+    if new_hashed_password:
+        invalidate_user(user.username)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Empreinte du hachage en vigueur (un rehachage bcrypt révoque les tokens précédents)
+    hashed_password = new_hashed_password or user.hashed_password
     access_token = create_access_token(
-        data={"sub": user.username},
+        data={"sub": user.username, "pwd": password_fingerprint(hashed_password)},
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -43,24 +49,32 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 @router.post("/register", response_model=UserCreate)
 async def register_new_user(user: UserCreate):
     # Vérification si l'utilisateur existe déjà
-    check_query = "SELECT 1 FROM USER_API WHERE username = ? OR email = ?"
-    with db.get_cursor() as cursor:
-        cursor.execute(check_query, (user.username, user.email))
-        if cursor.fetchone():
-            raise HTTPException(
-                status_code=400,
-                detail="Username or email already registered"
-            )
+    if await run_in_db(user_exists, user.username, user.email):
+        raise HTTPException(
+            status_code=400,
+            detail="Username or email already registered"
+        )
     
-    return create_user(user)
+    hashed_password = await get_password_hash_async(user.password)
+    return await run_in_db(create_user, user, hashed_password)
 
 @router.put("/users/me/password")
 async def change_user_password(
     password_change: PasswordChange,
-    current_user: str = Depends(oauth2_scheme)
+    user: User = Depends(get_current_user)
 ):
-    user = get_user(current_user)
-    if not user or not verify_password(password_change.current_password, user.hashed_password):
+    # Hachage relu en base : le cache d'un autre worker peut dater d'avant un changement
+    user = await run_in_db(get_user, user.username)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    valid, _ = await verify_and_update_password_async(
+        password_change.current_password, user.hashed_password
+    )
+    if not valid:
         raise HTTPException(
             status_code=400,
             detail="Current password is incorrect"
@@ -72,14 +86,8 @@ async def change_user_password(
             detail="New passwords don't match"
         )
 
-    new_hashed_password = get_password_hash(password_change.new_password)
-    update_query = """
-    UPDATE USER_API 
-    SET hashed_password = ? 
-    WHERE username = ?
-    """
-    
-    with db.get_cursor() as cursor:
-        cursor.execute(update_query, (new_hashed_password, current_user))
+    new_hashed_password = await get_password_hash_async(password_change.new_password)
+    await run_in_db(update_password, user.username, new_hashed_password)
+    invalidate_user(user.username)
     
     return {"message": "Password updated successfully"}
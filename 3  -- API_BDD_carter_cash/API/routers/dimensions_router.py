@@ -1,6 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
-from database.dimensions import get_dimensions_by_params
-from database.auth import oauth2_scheme
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from database.dimensions import get_dimensions_by_params, get_dimensions_batch, iter_dimensions_batch
+from database.suggest import suggest_vehicles
+from database.auth import get_current_user
+from models import User, VehiculeBatch
+from database.executor import run_in_db, iterate_in_db
+from responses import dumps
 
 router = APIRouter()
 
@@ -9,7 +15,7 @@ async def get_dimensions(
     marque: str,
     modele: str,
     annee: int,
-    token: str = Depends(oauth2_scheme)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Endpoint pour rechercher les informations dans la table DimensionsParModel.
@@ -25,7 +31,64 @@ async def get_dimensions(
         raise HTTPException(status_code=400, detail="Marque or Modele too long.")
 
     try:
-        results = get_dimensions_by_params(marque, modele, annee)
+        results = await run_in_db(get_dimensions_by_params, marque, modele, annee)
+        return {
+            "success": True,
+            "count": len(results),
+            "data": results
+        }
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request.")
+
+@router.post("/dimensions_for_modele_car/batch")
+async def get_dimensions_batch_endpoint(
+    batch: VehiculeBatch,
+    format: str = Query("json", pattern="^(json|ndjson)$", description="ndjson : une ligne par véhicule, envoyée au fil de l'eau"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Dimensions de pneus de plusieurs véhicules en un seul appel.
+    Les résultats sont dans l'ordre de la requête (`index`), un véhicule invalide
+    est signalé sans faire échouer les autres.
+    """
+    vehicles = [(v.marque, v.modele, v.annee) for v in batch.vehicules]
+
+    if format == "ndjson":
+        chunks = iter_dimensions_batch(vehicles)
+
+        async def lines():
+            async for chunk in iterate_in_db(chunks):
+                yield b"".join(dumps(item) + b"\n" for item in chunk)
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    try:
+        results = await run_in_db(get_dimensions_batch, vehicles)
+        return {
+            "success": True,
+            "count": len(results),
+            "data": results
+        }
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request.")
+
+@router.get("/vehicules/suggestions")
+async def get_vehicle_suggestions(
+    q: str = Query(..., min_length=1, max_length=50, description="Modèle saisi, ex. 'clio iv', 'C-3', 'golf7'"),
+    marque: Optional[str] = Query(None, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Autocomplétion et recherche approximative des couples Marque/Modele de
+    DimensionsParModel, classés par pertinence.
+    """
+    try:
+        results = await run_in_db(suggest_vehicles, q.strip(), limit, marque)
         return {
             "success": True,
             "count": len(results),
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from database.facettes import search_products_faceted, facet_flight, DEFAULT_LIMIT, MAX_LIMIT
+from database.auth import get_current_user
+from database.executor import run_in_db
+from models import User
+from rate_limit import rate_limit
+
+router = APIRouter()
+
+# Limite par utilisateur (RATE_LIMIT_FACETTES)
+facettes_rate_limit = rate_limit("facettes", default="120/60")
+
+@router.get("/produits/recherche", dependencies=[Depends(facettes_rate_limit)])
+async def search_products(
+    prix_min: Optional[int] = Query(None, ge=0),
+    prix_max: Optional[int] = Query(None, ge=0),
+    marque: Optional[List[str]] = Query(None, description="Répétable : ?marque=Michelin&marque=Continental"),
+    saisonalite: Optional[List[str]] = Query(None, description="Ex. Hiver, Eté, 4 saisons"),
+    type_vehicule: Optional[List[str]] = Query(None),
+    runflat: Optional[List[str]] = Query(None),
+    consommation: Optional[List[str]] = Query(None, description="Classe énergétique (étiquette UE)"),
+    indice_pluie: Optional[List[str]] = Query(None, description="Adhérence sur sol mouillé (étiquette UE)"),
+    charge_min: Optional[int] = Query(None, ge=0, description="Indice de charge minimal"),
+    vitesse: Optional[List[str]] = Query(None, description="Indice de vitesse"),
+    largeur: Optional[int] = Query(None, ge=0),
+    hauteur: Optional[int] = Query(None, ge=0),
+    diametre: Optional[int] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, pattern="^(prix|prix_desc)$", description="Tri par prix croissant ou décroissant"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    facettes: bool = Query(True, description="Ajoute le nombre de produits par valeur de filtre"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Recherche de pneus multi-critères (prix, saison, étiquette UE, dimensions...)
+    sur le dernier scraping, avec le décompte des résultats par facette.
+    """
+    if prix_min is not None and prix_max is not None and prix_min > prix_max:
+        raise HTTPException(status_code=400, detail="prix_min must be lower than prix_max.")
+
+    filters = {
+        "prix_min": prix_min,
+        "prix_max": prix_max,
+        "marque": marque,
+        "saisonalite": saisonalite,
+        "type_vehicule": type_vehicule,
+        "runflat": runflat,
+        "consommation": consommation,
+        "indice_pluie": indice_pluie,
+        "charge_min": charge_min,
+        "vitesse": vitesse,
+        "largeur": largeur,
+        "hauteur": hauteur,
+        "diametre": diametre,
+    }
+
+    try:
+        key = (
+            tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in filters.items())),
+            sort, limit, offset, facettes
+        )
+        result = await facet_flight.do(key, lambda: run_in_db(
+            search_products_faceted, filters, sort, limit, offset, facettes
+        ))
+        return {"success": True, **result}
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request.")
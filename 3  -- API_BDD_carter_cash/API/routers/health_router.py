@@ -0,0 +1,56 @@
+# health_router.py
+import asyncio
+import os
+from fastapi import APIRouter
+from database.db_connection import db
+from database.executor import run_in_db
+from database.dimensions_index import dimensions_index, DIMENSIONS_INDEX_ENABLED
+from database.marques import brand_list
+from responses import FastJSONResponse
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+# Délai maximal du test de connexion (emprunt au pool + SELECT 1)
+HEALTH_DB_TIMEOUT = float(os.getenv('HEALTH_DB_TIMEOUT', '2'))
+
+
+def ping_database():
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+@router.get("/live")
+async def liveness():
+    """Le processus répond : la boucle d'événements n'est pas bloquée."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    Le worker peut recevoir du trafic : une connexion du pool répond à SELECT 1
+    et l'index des dimensions est chargé (s'il est activé). Sinon HTTP 503.
+    """
+    checks = {}
+    try:
+        await asyncio.wait_for(run_in_db(ping_database), timeout=HEALTH_DB_TIMEOUT)
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = f"error: {type(e).__name__}"
+
+    if DIMENSIONS_INDEX_ENABLED:
+        checks["dimensions_index"] = "ok" if dimensions_index.loaded else "not loaded"
+    # Facultative : sans elle, les marques inconnues sont simplement vérifiées en base
+    checks["brand_list"] = "ok" if brand_list.loaded else "not loaded"
+
+    ready = checks["database"] == "ok" and checks.get("dimensions_index", "ok") == "ok"
+    pool = db.pool.stats()
+    return FastJSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not ready",
+            "checks": checks,
+            "pool": {name: pool[name] for name in ("size", "idle", "in_use", "waiting")},
+        }
+    )
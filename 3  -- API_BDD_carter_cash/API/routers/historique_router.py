@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from datetime import date
+from database.historique import get_price_history_for_url, get_price_history_for_brand, MAX_URL_LENGTH
+from database.auth import get_current_user
+from database.executor import run_in_db
+from models import User
+
+router = APIRouter()
+
+GRANULARITE_PATTERN = "^(jour|semaine|mois)$"
+
+@router.get("/historique/prix")
+async def price_history_for_url(
+    url: str = Query(..., max_length=MAX_URL_LENGTH, description="URL_Produit du pneu"),
+    granularite: str = Query("jour", pattern=GRANULARITE_PATTERN),
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Série de prix d'un produit (min / moyenne / max par jour, semaine ou mois).
+    """
+    try:
+        series = await run_in_db(get_price_history_for_url, url.strip(), granularite, date_debut, date_fin)
+        return {"success": True, "granularite": granularite, "count": len(series), "data": series}
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request.")
+
+@router.get("/historique/prix/marque/{marque}")
+async def price_history_for_brand(
+    marque: str,
+    largeur: Optional[int] = Query(None, ge=0),
+    hauteur: Optional[int] = Query(None, ge=0),
+    diametre: Optional[int] = Query(None, ge=0),
+    granularite: str = Query("semaine", pattern=GRANULARITE_PATTERN),
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Série de prix d'une marque, éventuellement pour une taille (largeur / hauteur / diamètre).
+    """
+    marque = marque.strip()
+    if not marque or len(marque) > 50:
+        raise HTTPException(status_code=400, detail="Invalid brand name")
+
+    try:
+        series = await run_in_db(
+            get_price_history_for_brand, marque, largeur, hauteur, diametre,
+            granularite, date_debut, date_fin
+        )
+        return {"success": True, "granularite": granularite, "count": len(series), "data": series}
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request.")
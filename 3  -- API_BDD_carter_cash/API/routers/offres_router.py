@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from database.offres import get_offers_for_vehicle, DEFAULT_LIMIT, MAX_LIMIT
+from database.auth import get_current_user
+from database.executor import run_in_db
+from models import User
+
+router = APIRouter()
+
+@router.get("/offres_for_modele_car")
+async def get_offers(
+    marque: str,
+    modele: str,
+    annee: int,
+    sort: Optional[str] = Query(None, pattern="^(prix|prix_desc)$", description="Tri par prix croissant ou décroissant"),
+    latest_only: bool = Query(True, description="Uniquement le dernier scraping"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Endpoint renvoyant directement les pneus compatibles avec un véhicule
+    (dimensions de DimensionsParModel jointes aux produits).
+    """
+    # Nettoyage de base des entrées
+    marque = marque.strip()
+    modele = modele.strip()
+
+    # Vérifications des entrées utilisateur
+    if not marque or not modele or not annee:
+        raise HTTPException(status_code=400, detail="All parameters (marque, modele, annee) are required.")
+    if len(marque) > 50 or len(modele) > 50:
+        raise HTTPException(status_code=400, detail="Marque or Modele too long.")
+
+    try:
+        results = await run_in_db(get_offers_for_vehicle, marque, modele, annee, sort, latest_only, limit)
+        return {
+            "success": True,
+            "count": len(results),
+            "data": results
+        }
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred while processing your request.")
@@ -1,15 +1,40 @@
 # search_router.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from database.search import get_data_from_db
-from database.auth import oauth2_scheme
+from database.search import (
+    get_cached_json, SEARCH_CACHE_MAX_AGE, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE,
+    export_products, normalize_marque, search_flight, require_current_offers
+)
+from database.marques import brand_list
+from database.executor import run_in_db, export_executor
+from database.auth import get_current_user
+from models import User
+from rate_limit import rate_limit
 
 router = APIRouter()
+
+# Limites par utilisateur (RATE_LIMIT_SEARCH, RATE_LIMIT_EXPORT)
+search_rate_limit = rate_limit("search", default="120/60")
+export_rate_limit = rate_limit("export", default="10/60")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
 # search_router.py
-@router.get("/search/{marque}")
+@router.get("/search/{marque}", dependencies=[Depends(search_rate_limit)])
 async def read_data(
     marque: str,
-    token: str = Depends(oauth2_scheme)
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, ge=0, description="next_after de la page précédente"),
+    latest_only: bool = Query(False, description="Uniquement le dernier scraping"),
+    with_total: bool = Query(False, description="Ajoute le nombre total de résultats"),
+    columnar: bool = Query(False, description="Format compact : `columns` + `rows` au lieu de `data`"),
+    current_user: User = Depends(get_current_user)
 ):
     # Nettoyage de base des entrées
     marque = marque.strip()
@@ -28,7 +53,70 @@ async def read_data(
         )
 
     try:
-        return get_data_from_db(marque)
+        # Rafale de recherches identiques (cache froid) : une seule requête SQL
+        key = (normalize_marque(marque), limit, after or 0, latest_only, with_total, columnar)
+        body, etag = await search_flight.do(key, lambda: run_in_db(
+            get_cached_json, marque, limit, after, latest_only, with_total, columnar
+        ))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while processing your request"
+        )
+
+    # Cache HTTP : le client renvoie l'ETag reçu et obtient un 304 sans corps
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={SEARCH_CACHE_MAX_AGE}"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    # PERFORMANCE : corps JSON déjà sérialisé (orjson) renvoyé tel quel
+    return Response(content=body, media_type="application/json", headers=cache_headers)
+
+@router.get("/export/produits", dependencies=[Depends(export_rate_limit)])
+async def export_data(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    marque: Optional[str] = Query(None, max_length=50),
+    latest_only: bool = Query(False, description="Uniquement le dernier scraping"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export en flux de tout le catalogue (ou d'une marque) en NDJSON ou CSV.
+    Les premières lignes sont envoyées dès qu'elles sont lues en base.
+    """
+    if marque is not None:
+        marque = marque.strip() or None
+
+    chunks = export_products(marque, format, latest_only)
+    if latest_only:
+        # Vérifié avant l'envoi des en-têtes : un 503 plutôt qu'un flux interrompu
+        await run_in_db(require_current_offers)
+    # Exécuteur et connexions réservés aux exports : 503 si EXPORT_MAX_CONCURRENCY
+    # exports sont déjà en cours, sans ralentir /search ni /token
+    stream = export_executor.open_stream(chunks)
+    if format == "csv":
+        return StreamingResponse(
+            stream,
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="produits.csv"'}
+        )
+    return StreamingResponse(stream, media_type="application/x-ndjson")
+
+@router.get("/marques")
+async def list_brands(current_user: User = Depends(get_current_user)):
+    """
+    Marques disponibles dans le catalogue, servies depuis la liste en mémoire
+    (chargée au démarrage, rechargée après chaque nouveau scraping).
+    """
+    try:
+        if not brand_list.loaded:
+            await run_in_db(brand_list.refresh)
+        names = brand_list.names()
+        return {"success": True, "count": len(names), "data": names}
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -0,0 +1,38 @@
+-- Index recommandés pour les requêtes de l'API (SQL Server)
+
+-- /search/{marque} : pagination par curseur sur ID_Produit pour une marque
+CREATE NONCLUSTERED INDEX IX_Produit_Marque_ID
+    ON Produit (Marque, ID_Produit)
+    INCLUDE (URL_Produit, Prix, Info_generale, Descriptif, Note, Date_scrap);
+
+-- /search/{marque}?latest_only=true : dernier scraping d'une marque
+CREATE NONCLUSTERED INDEX IX_Produit_Marque_Date
+    ON Produit (Marque, Date_scrap, ID_Produit);
+
+-- /offres_for_modele_car : dimensions d'un véhicule
+CREATE NONCLUSTERED INDEX IX_DimensionsParModel_Vehicule
+    ON DimensionsParModel (Marque, Modele, Annee)
+    INCLUDE (Largeur, Hauteur, Diametre);
+
+-- /offres_for_modele_car : produits d'une taille de pneu
+CREATE NONCLUSTERED INDEX IX_Dimensions_Taille
+    ON Dimensions (Largeur, Hauteur, Diametre)
+    INCLUDE (ID_Produit, Charge, Vitesse);
+
+-- Filtre sur le dernier scraping
+CREATE NONCLUSTERED INDEX IX_Produit_Date_scrap
+    ON Produit (Date_scrap)
+    INCLUDE (Prix);
+
+-- /produits/recherche : la table Produit_Recherche et son index columnstore
+-- (NCCI_Produit_Recherche) sont créés par le pipeline Dagster
+-- (2.2 dagster/Script_projet/7_read_model_recherche.py)
+
+-- /search/{marque}?latest_only=true et /export/produits?latest_only=true : la table
+-- Offre_Courante et son index IX_Offre_Courante_Marque_Date sont créés par le pipeline
+-- Dagster (2.2 dagster/Script_projet/8_offre_courante.py)
+
+-- /historique/prix : relevés de prix d'une URL dans le temps
+CREATE NONCLUSTERED INDEX IX_Produit_URL_Date
+    ON Produit (URL_Produit, Date_scrap)
+    INCLUDE (Prix);
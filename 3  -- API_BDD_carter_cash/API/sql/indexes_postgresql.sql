@@ -0,0 +1,64 @@
+-- Index recommandés pour les requêtes de l'API (PostgreSQL, DB_BACKEND=postgresql)
+-- Tables et colonnes créées entre guillemets (casse conservée), comme dans local_to_cloud.ipynb
+
+-- SQL Server compare Marque, Modele et username sans tenir compte de la casse (collation
+-- CI) : CITEXT reproduit ce comportement et garde les index utilisables par `=`
+CREATE EXTENSION IF NOT EXISTS citext;
+
+ALTER TABLE "Produit" ALTER COLUMN "Marque" TYPE CITEXT;
+ALTER TABLE "DimensionsParModel" ALTER COLUMN "Marque" TYPE CITEXT;
+ALTER TABLE "DimensionsParModel" ALTER COLUMN "Modele" TYPE CITEXT;
+ALTER TABLE "USER_API" ALTER COLUMN "username" TYPE CITEXT;
+
+-- /search/{marque} : pagination par curseur sur ID_Produit pour une marque
+CREATE INDEX IF NOT EXISTS "IX_Produit_Marque_ID"
+    ON "Produit" ("Marque", "ID_Produit")
+    INCLUDE ("URL_Produit", "Prix", "Info_generale", "Descriptif", "Note", "Date_scrap");
+
+-- /search/{marque}?latest_only=true : dernier scraping d'une marque
+CREATE INDEX IF NOT EXISTS "IX_Produit_Marque_Date"
+    ON "Produit" ("Marque", "Date_scrap", "ID_Produit");
+
+-- Offre_Courante et Produit_Recherche sont créées par les étapes 7 et 8 du pipeline Dagster
+-- (SQL Server) et absentes d'une copie issue des notebooks : elles ne sont modifiées que si
+-- elles ont été copiées (sinon /search?latest_only=true et /produits/recherche répondent 503)
+DO $$
+BEGIN
+    IF to_regclass('"Offre_Courante"') IS NOT NULL THEN
+        ALTER TABLE "Offre_Courante" ALTER COLUMN "Marque" TYPE CITEXT;
+        -- /search/{marque}?latest_only=true : offres courantes d'une marque
+        CREATE INDEX IF NOT EXISTS "IX_Offre_Courante_Marque_Date"
+            ON "Offre_Courante" ("Marque", "Date_derniere_vue", "ID_Produit");
+    END IF;
+    IF to_regclass('"Produit_Recherche"') IS NOT NULL THEN
+        ALTER TABLE "Produit_Recherche" ALTER COLUMN "Marque" TYPE CITEXT;
+    END IF;
+END
+$$;
+
+-- /offres_for_modele_car et /dimensions_for_modele_car : dimensions d'un véhicule
+CREATE INDEX IF NOT EXISTS "IX_DimensionsParModel_Vehicule"
+    ON "DimensionsParModel" ("Marque", "Modele", "Annee")
+    INCLUDE ("Largeur", "Hauteur", "Diametre");
+
+-- /dimensions_for_modele_car (hors index en mémoire) : LOWER(marque) = LOWER(?)
+CREATE INDEX IF NOT EXISTS "IX_DimensionsParModel_Vehicule_Lower"
+    ON "DimensionsParModel" (LOWER("Marque"), LOWER("Modele"), "Annee");
+
+-- /offres_for_modele_car : produits d'une taille de pneu
+CREATE INDEX IF NOT EXISTS "IX_Dimensions_Taille"
+    ON "Dimensions" ("Largeur", "Hauteur", "Diametre")
+    INCLUDE ("ID_Produit", "Charge", "Vitesse");
+
+-- Filtre sur le dernier scraping
+CREATE INDEX IF NOT EXISTS "IX_Produit_Date_scrap"
+    ON "Produit" ("Date_scrap")
+    INCLUDE ("Prix");
+
+-- /historique/prix : relevés de prix d'une URL dans le temps
+CREATE INDEX IF NOT EXISTS "IX_Produit_URL_Date"
+    ON "Produit" ("URL_Produit", "Date_scrap")
+    INCLUDE ("Prix");
+
+-- Statistiques à jour pour le planificateur après le chargement des données
+ANALYZE;
@@ -3,6 +3,8 @@ from fastapi.testclient import TestClient
 from main import app
 from database.db_connection import DatabaseConnection
 from unittest.mock import MagicMock, patch
+from datetime import timedelta
+from database.auth import create_access_token, user_cache
 
 @pytest.fixture
 def test_client():
@@ -17,4 +19,11 @@ def mock_db():
 
 @pytest.fixture
 def test_token():
-    return "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.example_test_token"
+    # Token signé valide : la signature et l'expiration sont vérifiées par l'API
+    return create_access_token({"sub": "testuser"}, expires_delta=timedelta(minutes=30))
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
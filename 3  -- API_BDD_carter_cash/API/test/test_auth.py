@@ -6,7 +6,11 @@ from fastapi import HTTPException, status
 from jose import jwt, JWTError
 from database.auth import (
     get_password_hash, verify_password, create_access_token, 
-    get_user, create_user, SECRET_KEY, ALGORITHM
+    get_user, create_user, SECRET_KEY, ALGORITHM,
+    verify_and_update_password, get_password_hash_async,
+    verify_and_update_password_async, hash_executor, BCRYPT_ROUNDS,
+    decode_access_token, get_current_user, invalidate_user, user_cache,
+    password_fingerprint
 )
 from models import User, UserCreate, PasswordChange
 from datetime import timedelta, datetime
@@ -29,6 +33,36 @@ def test_password_hashing():
     empty_hashed = get_password_hash(empty_password)
     assert verify_password(empty_password, empty_hashed)
 
+def test_rehash_on_outdated_cost():
+    from passlib.context import CryptContext
+    # Hachage produit avec un coût inférieur à la configuration actuelle
+    old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    old_hash = old_context.hash("test_password")
+
+    valid, new_hash = verify_and_update_password("test_password", old_hash)
+    assert valid
+    assert new_hash is not None
+    assert f"${BCRYPT_ROUNDS:02d}$" in new_hash
+    assert verify_password("test_password", new_hash)
+
+    # Un hachage au coût courant n'est pas recalculé
+    valid, new_hash = verify_and_update_password("test_password", get_password_hash("test_password"))
+    assert valid
+    assert new_hash is None
+
+    # Mauvais mot de passe
+    assert verify_and_update_password("wrong_password", old_hash) == (False, None)
+
+def test_password_hashing_async():
+    import asyncio
+
+    async def scenario():
+        hashed = await get_password_hash_async("test_password")
+        return await verify_and_update_password_async("test_password", hashed)
+
+    assert asyncio.run(scenario()) == (True, None)
+    assert hash_executor.stats()["completed"] >= 2
+
 def test_token_creation():
     # Test cas standard
     data = {"sub": "test_user"}
@@ -53,6 +87,76 @@ def test_token_creation():
     assert complex_payload["roles"] == ["admin", "user"]
     assert complex_payload["email"] == "test@example.com"
 
+def test_decode_access_token():
+    token = create_access_token({"sub": "test_user"}, expires_delta=timedelta(minutes=5))
+    assert decode_access_token(token) == "test_user"
+
+    # Token expiré
+    expired = create_access_token({"sub": "test_user"}, expires_delta=timedelta(minutes=-1))
+    with pytest.raises(HTTPException) as excinfo:
+        decode_access_token(expired)
+    assert excinfo.value.status_code == 401
+
+    # Signature invalide
+    forged = jwt.encode({"sub": "test_user"}, "another_secret", algorithm=ALGORITHM)
+    with pytest.raises(HTTPException):
+        decode_access_token(forged)
+
+    # Token sans sujet
+    with pytest.raises(HTTPException):
+        decode_access_token(create_access_token({"role": "admin"}))
+
+@patch('database.auth.get_user')
+def test_get_current_user_uses_cache(mock_get_user):
+    import asyncio
+    user = User(
+        username="testuser",
+        email="test@example.com",
+        full_name="Test User",
+        hashed_password="hashedpassword123"
+    )
+    mock_get_user.return_value = user
+    token = create_access_token({"sub": "testuser"})
+
+    # Premier appel : lecture en base, les suivants sont servis par le cache
+    assert asyncio.run(get_current_user(token)) == user
+    assert asyncio.run(get_current_user(token)) == user
+    mock_get_user.assert_called_once_with("testuser")
+
+    # Invalidation (changement de mot de passe) : nouvelle lecture en base
+    invalidate_user("testuser")
+    asyncio.run(get_current_user(token))
+    assert mock_get_user.call_count == 2
+
+    # Utilisateur supprimé
+    user_cache.clear()
+    mock_get_user.return_value = None
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(get_current_user(token))
+    assert excinfo.value.status_code == 401
+
+@patch('database.auth.get_user')
+def test_get_current_user_checks_password_fingerprint(mock_get_user):
+    import asyncio
+    old = User(username="testuser", email="test@example.com", full_name="Test User", hashed_password="old_hash")
+    new = old.model_copy(update={"hashed_password": "new_hash"})
+    old_token = create_access_token({"sub": "testuser", "pwd": password_fingerprint("old_hash")})
+    new_token = create_access_token({"sub": "testuser", "pwd": password_fingerprint("new_hash")})
+
+    # Cache d'un worker rempli avant le changement de mot de passe
+    mock_get_user.return_value = old
+    assert asyncio.run(get_current_user(old_token)) == old
+
+    # Mot de passe changé sur un autre worker : le nouveau token force la relecture
+    mock_get_user.return_value = new
+    assert asyncio.run(get_current_user(new_token)) == new
+    assert mock_get_user.call_count == 2
+
+    # L'ancien token est refusé
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(get_current_user(old_token))
+    assert excinfo.value.status_code == 401
+
 @patch('database.auth.db.get_cursor')
 def test_get_user(mock_get_cursor):
     # Setup du mock
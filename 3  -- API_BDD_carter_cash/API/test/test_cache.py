@@ -0,0 +1,111 @@
+import time
+import sqlite3
+import pytest
+from unittest.mock import patch
+from database.cache import TTLCache, VersionMarker, SqliteCache
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_get_set_and_pop():
+    cache = TTLCache(maxsize=10)
+    assert cache.get("Michelin") is None
+    cache.set("Michelin", [1, 2, 3])
+    assert cache.get("Michelin") == [1, 2, 3]
+    assert cache.pop("Michelin") == [1, 2, 3]
+    assert cache.get("Michelin", "absent") == "absent"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+def test_cache_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "a" devient la plus récemment utilisée
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_ttl_expiration():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=60, timer=timer)
+    cache.set("a", 1)
+
+    timer.now = 59
+    assert cache.get("a") == 1
+    timer.now = 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_version_marker_throttles_and_notifies():
+    timer = FakeTimer()
+    versions = iter(["2025-01-01:10", "2025-01-02:20"])
+    loads = []
+
+    def load():
+        loads.append(1)
+        return next(versions)
+
+    marker = VersionMarker(load, interval=60, timer=timer)
+    changes = []
+    marker.on_change(changes.append)
+
+    assert marker.current() == "2025-01-01:10"
+    timer.now = 30
+    assert marker.current() == "2025-01-01:10"
+    assert len(loads) == 1
+
+    timer.now = 61
+    assert marker.current() == "2025-01-02:20"
+    assert changes == ["2025-01-02:20"]
+
+def test_sqlite_cache_is_versioned(tmp_path):
+    cache = SqliteCache(str(tmp_path / "cache.db"))
+    cache.set("michelin", "v1", {"count": 2})
+    assert cache.get("michelin", "v1") == {"count": 2}
+    assert cache.get("michelin", "v2") is None
+
+    # Une écriture d'une nouvelle version purge les anciennes
+    cache.set("continental", "v2", {"count": 1})
+    assert cache.get("michelin", "v1") is None
+
+    # Un second processus/worker voit les mêmes entrées
+    other = SqliteCache(str(tmp_path / "cache.db"))
+    assert other.get("continental", "v2") == {"count": 1}
+
+def test_sqlite_cache_serializes_like_responses(tmp_path):
+    import datetime
+    from decimal import Decimal
+    cache = SqliteCache(str(tmp_path / "cache.db"))
+    cache.set("michelin", "v1", {"Prix": Decimal("89.90"), "Date_scrap": datetime.date(2025, 2, 1)})
+    # Mêmes valeurs que la réponse non mise en cache : nombre et date ISO 8601
+    assert cache.get("michelin", "v1") == {"Prix": 89.9, "Date_scrap": "2025-02-01"}
+
+def test_sqlite_cache_is_bounded(tmp_path):
+    cache = SqliteCache(str(tmp_path / "cache.db"), ttl=3600, maxsize=2)
+    now = time.time()
+    for after in range(4):
+        with patch('database.cache.time.time', return_value=now + after):
+            cache.set(f"michelin|100|{after}", "v1", {"after": after})
+    # Seules les deux pages les plus récentes sont conservées
+    assert cache.get("michelin|100|0", "v1") is None
+    assert cache.get("michelin|100|1", "v1") is None
+    assert cache.get("michelin|100|3", "v1") == {"after": 3}
+
+    # Entrées expirées purgées à l'écriture suivante
+    with patch('database.cache.time.time', return_value=now + 7200):
+        cache.set("continental|100|0", "v1", {"after": 0})
+    conn = sqlite3.connect(str(tmp_path / "cache.db"))
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 1
+    finally:
+        conn.close()
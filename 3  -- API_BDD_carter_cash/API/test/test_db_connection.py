@@ -2,7 +2,7 @@ import pytest
 import os
 import pyodbc
 from unittest.mock import patch, MagicMock
-from database.db_connection import DatabaseConnection
+from database.db_connection import DatabaseConnection, ConnectionPool, PoolTimeoutError
 from contextlib import contextmanager
 
 def test_db_connection_initialization():
@@ -79,7 +79,14 @@ def test_get_cursor_success(mock_connect):
     mock_conn.cursor.assert_called_once()
     mock_conn.commit.assert_called_once()
     mock_cursor.close.assert_called_once()
-    mock_conn.close.assert_called_once()
+    # La connexion est rendue au pool au lieu d'être fermée
+    mock_conn.close.assert_not_called()
+    assert db.pool.stats()["idle"] == 1
+
+    # Un second curseur réutilise la même connexion
+    with db.get_cursor():
+        pass
+    mock_connect.assert_called_once()
 
 @patch('pyodbc.connect')
 def test_get_cursor_with_exception(mock_connect):
@@ -105,6 +112,28 @@ def test_get_cursor_with_exception(mock_connect):
     mock_cursor.close.assert_called_once()
     mock_conn.close.assert_called_once()
 
+@patch('pyodbc.connect')
+def test_get_cursor_discards_connection_on_generator_exit(mock_connect):
+    mock_conn = MagicMock()
+    mock_connect.return_value = mock_conn
+
+    # Export en flux abandonné par le client : le générateur est fermé en plein parcours
+    db = DatabaseConnection()
+
+    def stream():
+        with db.get_cursor() as cursor:
+            while True:
+                yield cursor.fetchmany(10)
+
+    chunks = stream()
+    next(chunks)
+    chunks.close()
+
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
+    mock_conn.close.assert_called_once()
+    assert db.pool.stats()["in_use"] == 0
+
 @pytest.mark.integration
 @patch('pyodbc.connect')
 def test_real_database_query(mock_connect):
@@ -127,3 +156,88 @@ def test_real_database_query(mock_connect):
     mock_connect.assert_called_once()
     mock_cursor.execute.assert_called_once_with("SELECT 1")
     mock_cursor.fetchone.assert_called_once()
+
+
+def test_pool_max_size_and_timeout():
+    pool = ConnectionPool(MagicMock, min_size=0, max_size=2, timeout=0.05)
+    first = pool.acquire()
+    second = pool.acquire()
+
+    # Pool saturé : l'emprunt suivant échoue après le délai
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats["in_use"] == 2
+    assert stats["timeouts"] == 1
+
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(second, discard=True)
+    second.conn.close.assert_called_once()
+    assert pool.stats()["size"] == 1
+
+
+def test_pool_idle_eviction_and_max_lifetime():
+    pool = ConnectionPool(MagicMock, min_size=1, max_size=3, idle_timeout=10, max_lifetime=100)
+    a, b = pool.acquire(), pool.acquire()
+    pool.release(a)
+    pool.release(b)
+
+    # Les deux connexions sont inactives depuis trop longtemps : on n'en garde que min_size
+    a.last_used_at -= 60
+    b.last_used_at -= 60
+    reused = pool.acquire()
+    assert pool.stats()["closed"] == 1
+    pool.release(reused)
+
+    # Une connexion trop ancienne est recyclée au prochain emprunt
+    reused.created_at -= 1000
+    conn = pool.acquire()
+    assert conn is not reused
+    reused.conn.close.assert_called_once()
+    pool.release(conn)
+    assert pool.stats()["size"] == 1
+
+
+def test_pool_pre_ping_discards_broken_connection():
+    pool = ConnectionPool(MagicMock, min_size=0, max_size=2)
+    broken = pool.acquire()
+    pool.release(broken)
+    broken.conn.execute.side_effect = pyodbc.Error("connection lost")
+
+    fresh = pool.acquire()
+    assert fresh is not broken
+    broken.conn.close.assert_called_once()
+    stats = pool.stats()
+    assert stats["failed_pings"] == 1
+    assert stats["created"] == 2
+    assert stats["checkouts"] == 2
+
+
+def test_pool_pre_ping_discards_on_any_error():
+    pool = ConnectionPool(MagicMock, min_size=0, max_size=1)
+    broken = pool.acquire()
+    pool.release(broken)
+    # Erreur hors pilote : l'emplacement est libéré, le pool n'est pas bloqué
+    broken.conn.execute.side_effect = RuntimeError("unexpected")
+
+    fresh = pool.acquire()
+    assert fresh is not broken
+    broken.conn.close.assert_called_once()
+    assert pool.stats()["in_use"] == 1
+    pool.release(fresh)
+    assert pool.stats()["in_use"] == 0
+
+def test_pool_reset_after_fork_forgets_inherited_connections():
+    pool = ConnectionPool(MagicMock, min_size=0, max_size=2)
+    inherited = pool.acquire()
+    pool.release(inherited)
+    pool.acquire()
+
+    pool.reset_after_fork()
+
+    # Connexions du parent oubliées sans être fermées (socket partagé avec lui)
+    inherited.conn.close.assert_not_called()
+    assert pool.stats()["size"] == 0
+    assert pool.acquire() is not inherited
@@ -1,5 +1,18 @@
 import pytest
-from database.dimensions import validate_dimensions_params, get_dimensions_by_params
+from unittest.mock import patch, MagicMock
+from fastapi import HTTPException
+from database.dimensions import (
+    validate_dimensions_params, get_dimensions_by_params, get_dimensions_batch, iter_dimensions_batch,
+    DIMENSIONS_BATCH_MAX
+)
+from database.auth import get_current_user
+from database.dimensions_index import DimensionsIndex, load_version
+
+ROWS = [
+    ("Dacia", "Sandero", 2019, "1.0 SCe 75", 185, 65, 15),
+    ("Dacia", "Sandero", 2019, "1.0 TCe 90", 195, 55, 16),
+    ("Renault", "Clio IV", 2015, "1.5 dCi 90", 195, 55, 16),
+]
 
 def test_validate_dimensions_params():
     # Test valides
@@ -48,3 +61,142 @@ def test_specific_sandero_dimensions(test_client, test_token):
             assert isinstance(dim["largeur"], (int, str))
             assert isinstance(dim["hauteur"], (int, str))
             assert isinstance(dim["diametre"], (int, str))
+
+
+def test_dimensions_index_lookup_and_refresh():
+    versions = iter(["3:3", "3:3", "4:4"])
+    rows = list(ROWS)
+    loads = []
+
+    def load_rows():
+        loads.append(1)
+        return rows
+
+    index = DimensionsIndex(load_rows=load_rows, load_version=lambda: next(versions))
+    assert index.lookup("Dacia", "Sandero", 2019) is None  # pas encore chargé
+
+    assert index.refresh() is True
+    results = index.lookup("  dacia ", "SANDERO", 2019)
+    assert len(results) == 2
+    assert results[0] == {
+        "marque": "Dacia", "modele": "Sandero", "annee": 2019,
+        "finition": "1.0 SCe 75", "largeur": 185, "hauteur": 65, "diametre": 15
+    }
+    assert index.lookup("Renault", "clio  iv", 2015)[0]["diametre"] == 16
+    assert index.lookup("Dacia", "Sandero", 2020) == []
+
+    # Marqueur inchangé : pas de rechargement
+    assert index.refresh() is False
+    assert len(loads) == 1
+
+    # Nouvelle version de la table
+    rows.append(("Dacia", "Sandero", 2020, "1.0 TCe 100", 195, 55, 16))
+    assert index.refresh() is True
+    assert len(index.lookup("Dacia", "Sandero", 2020)) == 1
+    assert index.stats()["rows"] == 4
+
+def test_get_dimensions_uses_index():
+    index = DimensionsIndex(load_rows=lambda: ROWS, load_version=lambda: "3:3")
+    index.refresh()
+    with patch('database.dimensions.dimensions_index', index), \
+         patch('database.dimensions.db.get_cursor') as mock_get_cursor:
+        results = get_dimensions_by_params("Dacia", "Sandero", 2019)
+        assert len(results) == 2
+        mock_get_cursor.assert_not_called()
+
+def test_get_dimensions_falls_back_to_sql():
+    with patch('database.dimensions.dimensions_index', DimensionsIndex()), \
+         patch('database.dimensions.db.get_cursor') as mock_get_cursor:
+        mock_cursor = MagicMock()
+        mock_cursor.description = [(column,) for column in ("marque", "modele", "annee")]
+        mock_cursor.fetchall.return_value = [("Dacia", "Sandero", 2019)]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        results = get_dimensions_by_params("Dacia", "Sandero", 2019)
+        assert results == [{"marque": "Dacia", "modele": "Sandero", "annee": 2019}]
+
+def test_dimensions_batch_uses_index():
+    index = DimensionsIndex(load_rows=lambda: ROWS, load_version=lambda: "3:3")
+    index.refresh()
+    with patch('database.dimensions.dimensions_index', index), \
+         patch('database.dimensions.db.get_cursor') as mock_get_cursor:
+        results = get_dimensions_batch([
+            ("Dacia", "Sandero", 2019),
+            ("Renault;", "Clio", 2015),
+            ("renault", "clio iv", 2015),
+            ("Dacia", "Sandero", 1800),
+        ])
+        mock_get_cursor.assert_not_called()
+
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert results[0]["success"] and results[0]["count"] == 2
+    assert results[1] == {"index": 1, "marque": "Renault;", "modele": "Clio", "annee": 2015,
+                          "success": False, "error": "Invalid input parameters"}
+    assert results[2]["data"][0]["modele"] == "Clio IV"
+    assert not results[3]["success"]
+
+def test_dimensions_batch_set_based_sql():
+    with patch('database.dimensions.dimensions_index', DimensionsIndex()), \
+         patch('database.dimensions.db.get_cursor') as mock_get_cursor:
+        mock_cursor = MagicMock()
+        mock_cursor.description = [(column,) for column in ("marque", "modele", "annee", "largeur")]
+        mock_cursor.fetchall.return_value = [("Dacia", "Sandero", 2019, 185), ("Dacia", "Sandero", 2019, 195)]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        vehicles = [("Dacia", "Sandero", 2019), ("DACIA", "sandero", 2019), ("Dacia", "Logan", 2019)]
+        chunks = list(iter_dimensions_batch(vehicles, chunk_size=2))
+
+    # Une requête par lot, véhicules identiques dédoublonnés dans le lot
+    assert mock_cursor.execute.call_count == 2
+    query, params = mock_cursor.execute.call_args_list[0][0]
+    assert "FROM (VALUES (?, ?, ?)) AS v" in query
+    assert "LOWER(REPLACE(" in query
+    assert params == ["dacia", "sandero", 2019]
+    results = chunks[0] + chunks[1]
+    assert results[0]["count"] == 2 and results[1]["count"] == 2
+    assert results[2]["index"] == 2
+
+def test_dimensions_batch_hard_cap():
+    with patch('database.dimensions.DIMENSIONS_BATCH_MAX', 2):
+        with pytest.raises(HTTPException) as exc_info:
+            iter_dimensions_batch([("Dacia", "Sandero", 2019)] * 3)
+    assert exc_info.value.status_code == 413
+
+def test_dimensions_batch_endpoint(test_client):
+    index = DimensionsIndex(load_rows=lambda: ROWS, load_version=lambda: "3:3")
+    index.refresh()
+    body = {"vehicules": [
+        {"marque": "Dacia", "modele": "Sandero", "annee": 2019},
+        {"marque": "Renault", "modele": "Clio IV", "annee": 2015},
+    ]}
+    response = test_client.post("/dimensions_for_modele_car/batch", json=body)
+    assert response.status_code == 401
+
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        with patch('database.dimensions.dimensions_index', index):
+            response = test_client.post("/dimensions_for_modele_car/batch", json=body)
+            assert response.status_code == 200
+            assert [item["count"] for item in response.json()["data"]] == [2, 1]
+
+            response = test_client.post("/dimensions_for_modele_car/batch", params={"format": "ndjson"}, json=body)
+            assert response.headers["content-type"] == "application/x-ndjson"
+            lines = response.text.splitlines()
+            assert len(lines) == 2
+            assert '"index":1' in lines[1]
+
+            # Lot trop grand : rejeté à la validation du corps
+            too_many = {"vehicules": body["vehicules"][:1] * (DIMENSIONS_BATCH_MAX + 1)}
+            response = test_client.post("/dimensions_for_modele_car/batch", json=too_many)
+            assert response.status_code == 422
+    finally:
+        test_client.app.dependency_overrides.clear()
+
+
+def test_dimensions_index_version_uses_checksum():
+    with patch('database.dimensions_index.db') as mock_db:
+        mock_db.backend.name = "mssql"
+        mock_cursor = mock_db.get_cursor.return_value.__enter__.return_value
+        mock_cursor.fetchone.return_value = (3, -1234)
+        assert load_version() == "3:-1234"
+        assert "CHECKSUM_AGG(BINARY_CHECKSUM(*))" in mock_cursor.execute.call_args[0][0]
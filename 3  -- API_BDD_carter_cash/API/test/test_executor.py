@@ -0,0 +1,99 @@
+import pytest
+import time
+import asyncio
+import threading
+from fastapi import HTTPException
+from database.executor import BoundedExecutor, iterate_in_db
+
+def slow_query(delay=0.1):
+    # Simule un appel pyodbc bloquant
+    time.sleep(delay)
+    return delay
+
+def test_run_returns_result():
+    executor = BoundedExecutor("test", max_workers=2, max_pending=10)
+    try:
+        assert asyncio.run(executor.run(slow_query, delay=0.01)) == 0.01
+        assert executor.stats()["pending"] == 0
+    finally:
+        executor.shutdown()
+
+def test_concurrent_calls_do_not_block_event_loop():
+    executor = BoundedExecutor("test", max_workers=10, max_pending=100)
+
+    async def scenario():
+        start = time.perf_counter()
+        results = await asyncio.gather(*[executor.run(slow_query) for _ in range(10)])
+        return results, time.perf_counter() - start
+
+    try:
+        results, elapsed = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    # 10 requêtes de 100 ms exécutées en parallèle : bien moins que 1 s en série
+    assert len(results) == 10
+    assert elapsed < 0.5
+
+def test_backpressure_rejects_when_queue_full():
+    executor = BoundedExecutor("test", max_workers=1, max_pending=2)
+
+    async def scenario():
+        return await asyncio.gather(
+            *[executor.run(slow_query, delay=0.05) for _ in range(4)],
+            return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 2
+    assert all(r.status_code == 503 for r in rejected)
+    assert executor.stats()["rejected"] == 2
+
+def test_iterate_in_db_closes_generator_on_db_thread():
+    closed_in = []
+
+    def chunks():
+        try:
+            while True:
+                yield b"x"
+        finally:
+            closed_in.append(threading.current_thread().name)
+
+    async def scenario():
+        stream = iterate_in_db(chunks())
+        assert await stream.__anext__() == b"x"
+        # Client déconnecté : le flux est fermé avant la fin
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert len(closed_in) == 1
+    assert closed_in[0].startswith("db-worker")
+
+def test_open_stream_caps_concurrent_streams():
+    import gc
+    executor = BoundedExecutor("export", max_workers=1, max_pending=1)
+
+    async def scenario():
+        stream = executor.open_stream(iter([b"a", b"b"]))
+        # Un flux déjà ouvert : le suivant est rejeté avant d'envoyer quoi que ce soit
+        with pytest.raises(HTTPException) as excinfo:
+            executor.open_stream(iter([b"c"]))
+        assert excinfo.value.status_code == 503
+        assert [chunk async for chunk in stream] == [b"a", b"b"]
+        assert executor.stats()["pending"] == 0
+
+        # Flux jamais parcouru (client parti avant le premier envoi) : place rendue
+        executor.open_stream(iter([b"d"]))
+        gc.collect()
+        assert executor.stats()["pending"] == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert executor.stats()["rejected"] == 1
@@ -0,0 +1,124 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi import HTTPException
+from database.facettes import (
+    search_products_faceted, build_where, parse_facets, FACET_COLUMNS
+)
+from database.auth import get_current_user
+
+def facet_row(column, value, count):
+    """Ligne GROUPING SETS simulée pour la facette `column`."""
+    values = [value if c == column else None for c in FACET_COLUMNS]
+    grouping = [0 if c == column else 1 for c in FACET_COLUMNS]
+    return tuple(values + grouping + [count])
+
+TOTAL_ROW = tuple([None] * len(FACET_COLUMNS) + [1] * len(FACET_COLUMNS) + [3])
+
+@pytest.fixture
+def mock_facettes_cursor():
+    with patch('database.facettes.db.get_cursor') as mock_get_cursor, \
+         patch('database.facettes.db.table_exists', return_value=True):
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("ID_Produit",), ("Prix",), ("Saisonalite",)]
+        mock_cursor.fetchall.side_effect = [
+            [(1, 89, "Hiver"), (2, 95, "Hiver")],
+            [
+                facet_row("Saisonalite", "Hiver", 3),
+                facet_row("Consommation", "B", 1),
+                facet_row("Consommation", "A", 2),
+                facet_row("Runflat", None, 3),
+                TOTAL_ROW,
+            ],
+        ]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+        yield mock_cursor
+
+def test_build_where():
+    where, params = build_where({
+        "prix_max": 199,
+        "saisonalite": ["Hiver"],
+        "diametre": 17,
+        "consommation": ["A", "B"],
+        "vitesse": None,
+    })
+    assert where == "WHERE Prix <= ? AND Saisonalite IN (?) AND Diametre = ? AND Consommation IN (?, ?)"
+    assert params == [199, "Hiver", 17, "A", "B"]
+    assert build_where({"marque": None}) == ("", [])
+
+def test_build_where_rejects_invalid_values():
+    with pytest.raises(HTTPException):
+        build_where({"saisonalite": ["Hiver'; DROP TABLE Produit--"]})
+    with pytest.raises(HTTPException):
+        build_where({"prix_min": -1})
+    with pytest.raises(HTTPException):
+        build_where({"ID_Produit": 1})
+
+def test_parse_facets():
+    total, facets = parse_facets([
+        facet_row("Consommation", "B", 1),
+        facet_row("Consommation", "A", 2),
+        facet_row("Diametre", 17, 3),
+        TOTAL_ROW,
+    ])
+    assert total == 3
+    assert facets["Consommation"] == [{"valeur": "A", "count": 2}, {"valeur": "B", "count": 1}]
+    assert facets["Diametre"] == [{"valeur": 17, "count": 3}]
+    assert facets["Marque"] == []
+
+def test_faceted_search_reads_the_read_model(mock_facettes_cursor):
+    result = search_products_faceted(
+        {"prix_max": 199, "saisonalite": ["Hiver"], "consommation": ["A", "B"]},
+        sort="prix", limit=10
+    )
+    assert [r["ID_Produit"] for r in result["data"]] == [1, 2]
+    assert result["total"] == 3
+    assert result["facettes"]["Saisonalite"] == [{"valeur": "Hiver", "count": 3}]
+    assert result["facettes"]["Runflat"] == []
+
+    # Page puis facettes : deux requêtes sur Produit_Recherche, sans jointure
+    (query, params), (facets_query, facets_params) = [
+        call[0] for call in mock_facettes_cursor.execute.call_args_list
+    ]
+    assert "FROM Produit_Recherche" in query and "JOIN" not in query
+    assert "ORDER BY Prix ASC" in query
+    assert params == (199, "Hiver", "A", "B", 0, 10)
+    assert "GROUPING SETS" in facets_query and "JOIN" not in facets_query
+    assert facets_params == [199, "Hiver", "A", "B"]
+
+def test_faceted_search_without_facets(mock_facettes_cursor):
+    result = search_products_faceted({}, with_facets=False)
+    assert "facettes" not in result
+    mock_facettes_cursor.execute.assert_called_once()
+
+def test_faceted_search_invalid_parameters(mock_facettes_cursor):
+    with pytest.raises(HTTPException):
+        search_products_faceted({}, sort="random")
+    with pytest.raises(HTTPException):
+        search_products_faceted({}, limit=0)
+    mock_facettes_cursor.execute.assert_not_called()
+
+def test_faceted_search_endpoint(test_client, mock_facettes_cursor):
+    params = {"saisonalite": "Hiver", "consommation": ["A", "B"], "diametre": 17}
+    response = test_client.get("/produits/recherche", params=params)
+    assert response.status_code == 401
+
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        response = test_client.get("/produits/recherche", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 2
+        assert body["total"] == 3
+        assert body["facettes"]["Consommation"][0] == {"valeur": "A", "count": 2}
+
+        response = test_client.get("/produits/recherche", params={"prix_min": 200, "prix_max": 100})
+        assert response.status_code == 400
+    finally:
+        test_client.app.dependency_overrides.clear()
+
+def test_faceted_search_without_read_model():
+    # Copie PostgreSQL sans Produit_Recherche : indisponible plutôt qu'une erreur 500
+    with patch('database.facettes.db.table_exists', return_value=False):
+        with pytest.raises(HTTPException) as exc_info:
+            search_products_faceted({"marque": "Michelin"})
+    assert exc_info.value.status_code == 503
@@ -0,0 +1,53 @@
+from unittest.mock import patch, MagicMock
+from database.dimensions_index import dimensions_index
+from database.marques import BrandList
+from database.auth import get_current_user
+from models import User
+
+def test_liveness(test_client):
+    response = test_client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+def test_readiness(test_client):
+    with patch('routers.health_router.db.get_cursor') as mock_get_cursor, \
+         patch.object(dimensions_index, "version", "1:1"):
+        response = test_client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["checks"]["database"] == "ok"
+        mock_get_cursor.return_value.__enter__.return_value.execute.assert_called_once_with("SELECT 1")
+
+        # Base injoignable : le worker est retiré du trafic
+        mock_get_cursor.side_effect = Exception("connection refused")
+        response = test_client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"]["database"] == "error: Exception"
+
+def test_readiness_requires_dimensions_index(test_client):
+    with patch('routers.health_router.db.get_cursor'), \
+         patch('routers.health_router.DIMENSIONS_INDEX_ENABLED', True), \
+         patch.object(dimensions_index, "version", None):
+        response = test_client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"]["dimensions_index"] == "not loaded"
+
+def test_brand_list():
+    brands = BrandList(load=lambda: ["Michelin", "Good  Year", "michelin ", ""])
+    # Non chargée : aucune marque n'est écartée
+    assert brands.may_exist("inconnue")
+    brands.refresh()
+    assert brands.names() == ["Good Year", "Michelin", "michelin"]
+    assert brands.may_exist("good year")
+    assert not brands.may_exist("inconnue")
+
+def test_brands_endpoint(test_client):
+    user = User(username="testuser", email="test@example.com", full_name="Test", hashed_password="x")
+    brands = BrandList(load=lambda: ["Michelin", "Continental"])
+    with patch('routers.search_router.brand_list', brands):
+        test_client.app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            response = test_client.get("/marques")
+        finally:
+            test_client.app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "count": 2, "data": ["Continental", "Michelin"]}
@@ -0,0 +1,91 @@
+import pytest
+from datetime import date
+from unittest.mock import patch, MagicMock
+from fastapi import HTTPException
+from database.historique import (
+    get_price_history_for_url, get_price_history_for_brand, history_cache
+)
+from database.search import data_version
+from database.auth import get_current_user
+
+URL = "https://www.carter-cash.com/pneus/michelin-primacy-4-205-55-r16"
+
+@pytest.fixture
+def mock_history_cursor():
+    history_cache.clear()
+    data_version.invalidate()
+    with patch('database.historique.db.get_cursor') as mock_get_cursor:
+        mock_cursor = MagicMock()
+        # Marqueur de version (fetchone) puis série de prix (fetchall)
+        mock_cursor.fetchone.return_value = ("2025-02-01", 100, "2025-02-01")
+        mock_cursor.description = [("Periode",), ("Prix_min",), ("Prix_moyen",), ("Prix_max",), ("Nb_releves",)]
+        mock_cursor.fetchall.return_value = [
+            (date(2025, 1, 6), 80, 84.333333, 89, 3),
+            (date(2025, 1, 13), 79, 79.0, 79, 1),
+        ]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+        yield mock_cursor
+    history_cache.clear()
+    data_version.invalidate()
+
+def test_history_for_url_single_grouped_query(mock_history_cursor):
+    series = get_price_history_for_url(URL, "semaine", date_debut=date(2025, 1, 1))
+    assert series[0]["Prix_moyen"] == 84.33
+    assert series[1]["Nb_releves"] == 1
+
+    # Une seule requête groupée pour toute la série (après la lecture du marqueur de version)
+    assert mock_history_cursor.fetchall.call_count == 1
+    query, params = mock_history_cursor.execute.call_args[0]
+    assert "GROUP BY" in query
+    assert "MIN(p.Prix)" in query and "MAX(p.Prix)" in query
+    assert "DATEADD(DAY" in query
+    assert params == [URL, date(2025, 1, 1)]
+
+    # Même série : servie par le cache tant que les données n'ont pas changé
+    get_price_history_for_url(URL, "semaine", date_debut=date(2025, 1, 1))
+    assert mock_history_cursor.fetchall.call_count == 1
+
+def test_history_for_brand_and_size(mock_history_cursor):
+    get_price_history_for_brand("Michelin", largeur=205, hauteur=55, diametre=16, granularite="mois")
+    query, params = mock_history_cursor.execute.call_args[0]
+    assert "JOIN Dimensions" in query
+    assert "DATEFROMPARTS" in query
+    assert params == ["Michelin", 205, 55, 16]
+
+    # Sans taille : pas de jointure
+    get_price_history_for_brand("Michelin", granularite="jour")
+    query, params = mock_history_cursor.execute.call_args[0]
+    assert "JOIN" not in query
+    assert params == ["Michelin"]
+
+def test_history_invalid_parameters(mock_history_cursor):
+    with pytest.raises(HTTPException):
+        get_price_history_for_url("javascript:alert(1)")
+    with pytest.raises(HTTPException):
+        get_price_history_for_url(URL, "annee")
+    with pytest.raises(HTTPException):
+        get_price_history_for_url(URL, date_debut=date(2025, 2, 1), date_fin=date(2025, 1, 1))
+    with pytest.raises(HTTPException):
+        get_price_history_for_brand("DROP TABLE")
+    mock_history_cursor.execute.assert_not_called()
+
+def test_history_endpoints(test_client, mock_history_cursor):
+    response = test_client.get("/historique/prix", params={"url": URL})
+    assert response.status_code == 401
+
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        response = test_client.get("/historique/prix", params={"url": URL, "granularite": "semaine"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 2
+        assert body["data"][0]["Periode"] == "2025-01-06"
+
+        response = test_client.get("/historique/prix/marque/Michelin", params={"diametre": 16})
+        assert response.status_code == 200
+        assert response.json()["granularite"] == "semaine"
+
+        response = test_client.get("/historique/prix", params={"url": URL, "granularite": "annee"})
+        assert response.status_code == 422
+    finally:
+        test_client.app.dependency_overrides.clear()
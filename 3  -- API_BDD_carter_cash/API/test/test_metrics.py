@@ -0,0 +1,78 @@
+import logging
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+from metrics import Counter, Histogram, Registry, http_request_phase_seconds, http_requests_total
+from database.db_connection import DatabaseConnection
+from database.auth import get_current_user
+
+def test_counter_and_histogram_render():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requêtes", ("route",)))
+    latency = registry.register(Histogram("latency_seconds", "Latence", ("route",), buckets=(0.1, 1.0)))
+    requests.inc(route="/search/{marque}")
+    requests.inc(route="/search/{marque}")
+    latency.observe(0.05, route="/search/{marque}")
+    latency.observe(0.5, route="/search/{marque}")
+    registry.register_stats("pool", "Pool", lambda: {"in_use": 3, "loaded": True, "version": "x"})
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/search/{marque}"} 2' in text
+    assert 'latency_seconds_bucket{route="/search/{marque}",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/search/{marque}",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{route="/search/{marque}"} 2' in text
+    assert "pool_in_use 3" in text
+    assert "pool_loaded 1" in text
+    assert "pool_version" not in text
+
+    with pytest.raises(ValueError):
+        requests.inc(status="200")
+
+def test_slow_query_logging_redacts_parameters(caplog):
+    with patch.dict(os.environ, {'DB_SLOW_QUERY_MS': '0.001'}), \
+         patch('pyodbc.connect') as mock_connect:
+        mock_conn = MagicMock()
+        mock_connect.return_value = mock_conn
+        db = DatabaseConnection()
+        with caplog.at_level(logging.WARNING, logger="api.slow_query"):
+            with db.get_cursor() as cursor:
+                cursor.execute("SELECT *\n  FROM USER_API WHERE username = ?", ("secret-user",))
+                cursor.fetchone()
+
+    mock_conn.cursor.return_value.execute.assert_called_once()
+    mock_conn.cursor.return_value.fetchone.assert_called_once()
+    assert "SELECT * FROM USER_API WHERE username = ?" in caplog.text
+    assert "1 redacted parameters" in caplog.text
+    assert "secret-user" not in caplog.text
+
+def test_metrics_middleware_records_route_and_phases(test_client):
+    with patch('database.search.db.get_cursor') as mock_get_cursor:
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = ("2025-03-01", 1, "2025-03-01")
+        mock_cursor.description = [("ID_Produit",), ("Marque",)]
+        mock_cursor.fetchall.return_value = [(1, "Pirelli")]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        test_client.app.dependency_overrides[get_current_user] = lambda: None
+        try:
+            before = http_requests_total.value(method="GET", route="/search/{marque}", status="200")
+            serialization_before = http_request_phase_seconds.count(route="/search/{marque}", phase="serialization")
+            response = test_client.get("/search/Pirelli")
+            assert response.status_code == 200
+        finally:
+            test_client.app.dependency_overrides.clear()
+
+    assert http_requests_total.value(method="GET", route="/search/{marque}", status="200") == before + 1
+    assert http_request_phase_seconds.count(route="/search/{marque}", phase="serialization") == serialization_before + 1
+
+    # /metrics n'est pas public : jeton dédié du collecteur
+    assert test_client.get("/metrics").status_code == 401
+    with patch('main.METRICS_TOKEN', 'scraper-secret'):
+        assert test_client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        response = test_client.get("/metrics", headers={"Authorization": "Bearer scraper-secret"})
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/search/{marque}"}' in response.text
+    assert "http_requests_in_flight 0" in response.text
+    assert 'executor_completed{name="db"}' in response.text
+    assert "db_pool_in_use" in response.text
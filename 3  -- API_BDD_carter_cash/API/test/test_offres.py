@@ -0,0 +1,52 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi import HTTPException
+from database.offres import get_offers_for_vehicle
+from database.auth import get_current_user
+
+@pytest.fixture
+def mock_offres_cursor():
+    with patch('database.offres.db.get_cursor') as mock_get_cursor:
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("ID_Produit",), ("Prix",), ("Largeur",), ("Hauteur",), ("Diametre",)]
+        mock_cursor.fetchall.return_value = [(1, 65, 185, 65, 15), (2, 72, 185, 65, 15)]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+        yield mock_cursor
+
+def test_offers_single_set_based_query(mock_offres_cursor):
+    results = get_offers_for_vehicle("Dacia", "Sandero", 2019, sort="prix", limit=50)
+    assert [r["ID_Produit"] for r in results] == [1, 2]
+
+    # Une seule requête : dimensions du véhicule jointes aux produits
+    mock_offres_cursor.execute.assert_called_once()
+    query, params = mock_offres_cursor.execute.call_args[0]
+    assert "FROM DimensionsParModel" in query
+    assert "JOIN Dimensions" in query
+    assert "JOIN Produit" in query
+    assert "ORDER BY p.Prix ASC" in query
+    assert "MAX(Date_scrap)" in query
+    assert params == (50, "Dacia", "Sandero", 2019)
+
+    get_offers_for_vehicle("Dacia", "Sandero", 2019, latest_only=False)
+    query = mock_offres_cursor.execute.call_args[0][0]
+    assert "MAX(Date_scrap)" not in query
+
+def test_offers_invalid_parameters(mock_offres_cursor):
+    with pytest.raises(HTTPException):
+        get_offers_for_vehicle("Dacia;", "Sandero", 2019)
+    with pytest.raises(HTTPException):
+        get_offers_for_vehicle("Dacia", "Sandero", 2019, sort="random")
+    mock_offres_cursor.execute.assert_not_called()
+
+def test_offers_endpoint(test_client, mock_offres_cursor):
+    params = {"marque": "Dacia", "modele": "Sandero", "annee": 2019, "sort": "prix"}
+    response = test_client.get("/offres_for_modele_car", params=params)
+    assert response.status_code == 401
+
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        response = test_client.get("/offres_for_modele_car", params=params)
+        assert response.status_code == 200
+        assert response.json()["count"] == 2
+    finally:
+        test_client.app.dependency_overrides.clear()
@@ -0,0 +1,115 @@
+import os
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+from database.db_connection import DatabaseConnection, SqlServerBackend
+from database.postgresql import translate_query, PostgresCursor, PostgresBackend
+
+
+def test_translate_placeholders_and_identifiers():
+    sql, top_last, renames = translate_query("SELECT Marque, Prix FROM Produit WHERE Marque = ? AND Prix < ?")
+    assert sql == 'SELECT "Marque", "Prix" FROM "Produit" WHERE "Marque" = %s AND "Prix" < %s'
+    assert top_last is False
+    assert renames == ()
+
+
+def test_translate_top_to_limit():
+    sql, top_last, _ = translate_query("SELECT TOP (?) ID_Produit FROM Produit WHERE Marque = ? ORDER BY ID_Produit")
+    assert sql.startswith('SELECT "ID_Produit" FROM "Produit"')
+    assert sql.endswith('ORDER BY "ID_Produit"\nLIMIT %s')
+    assert top_last is True
+
+    with pytest.raises(ValueError):
+        translate_query("SELECT * FROM (SELECT TOP (?) Prix FROM Produit) AS t")
+
+
+def test_translate_aliases_and_renames():
+    sql, _, renames = translate_query(
+        "SELECT marque, MIN(p.Prix) AS Prix_min, CAST(p.Prix AS FLOAT) AS moyenne "
+        "FROM DimensionsParModel AS m JOIN Produit AS p ON p.Marque = m.marque ORDER BY Prix_min"
+    )
+    assert 'MIN("p"."Prix") AS "Prix_min"' in sql
+    assert 'CAST("p"."Prix" AS FLOAT) AS "moyenne"' in sql
+    assert 'ORDER BY "Prix_min"' in sql
+    # Alias de tables entre guillemets partout où ils sont utilisés, types laissés tels quels
+    assert 'AS "m" JOIN "Produit" AS "p" ON "p"."Marque" = "m"."Marque"' in sql
+    # La colonne est renvoyée sous le nom écrit dans la requête, comme avec SQL Server
+    assert renames == (("Marque", "marque"),)
+
+
+def test_translate_escapes_percent_and_keeps_literals():
+    sql, _, _ = translate_query("SELECT 'Produit ?%' AS libelle, Prix % 2 FROM Produit -- Marque ?")
+    assert sql == "SELECT 'Produit ?%%' AS \"libelle\", \"Prix\" %% 2 FROM \"Produit\" -- Marque ?"
+
+
+def test_cursor_reorders_params_and_exposes_rows():
+    raw = MagicMock()
+    raw.description = [("ID_Produit", None), ("Marque", None)]
+    raw.fetchall.return_value = [(1, "Michelin"), (2, "Michelin")]
+    cursor = PostgresCursor(raw)
+
+    cursor.execute("SELECT TOP (?) ID_Produit, marque FROM Produit WHERE Marque = ?", (10, "Michelin"))
+
+    raw.execute.assert_called_once()
+    assert raw.execute.call_args[0][1] == ["Michelin", 10]
+    assert [column[0] for column in cursor.description] == ["ID_Produit", "marque"]
+    rows = cursor.fetchall()
+    assert rows[0].marque == "Michelin" and rows[1].ID_Produit == 2
+    assert tuple(rows[0]) == (1, "Michelin")
+
+    raw.fetchone.return_value = None
+    assert cursor.fetchone() is None
+
+
+def test_cursor_accepts_positional_params():
+    raw = MagicMock()
+    raw.description = None
+    cursor = PostgresCursor(raw)
+    cursor.execute("UPDATE USER_API SET Date_Derniere_Connexion = ? WHERE username = ?", "2025-01-01", "bob")
+    assert raw.execute.call_args[0][1] == ["2025-01-01", "bob"]
+    assert cursor.description is None
+
+
+def test_backend_defaults_to_sql_server():
+    with patch.dict(os.environ, {'DB_BACKEND': ''}, clear=False):
+        os.environ.pop('DB_BACKEND')
+        db = DatabaseConnection()
+    assert isinstance(db.backend, SqlServerBackend)
+    assert db.backend.name == "mssql"
+
+
+def test_backend_postgresql_from_env():
+    psycopg = MagicMock()
+    psycopg.Error = type("Error", (Exception,), {})
+    psycopg.IntegrityError = type("IntegrityError", (psycopg.Error,), {})
+    env = {'DB_BACKEND': 'PostgreSQL', 'PG_HOST': 'pg', 'PG_DATABASE': 'carter', 'PG_PREPARE_THRESHOLD': 'none'}
+    with patch.dict(sys.modules, {'psycopg': psycopg}), patch.dict(os.environ, env):
+        db = DatabaseConnection()
+        assert isinstance(db.backend, PostgresBackend)
+        assert db.backend.params["host"] == "pg" and db.backend.params["dbname"] == "carter"
+        assert db.pool.errors == (psycopg.Error,)
+
+        conn = db.backend.connect()
+    psycopg.connect.assert_called_once()
+    assert conn.prepare_threshold is None
+    assert conn.prepared_max == 256
+
+
+def test_backend_unknown_raises():
+    with patch.dict(os.environ, {'DB_BACKEND': 'sqlite'}):
+        with pytest.raises(ValueError):
+            DatabaseConnection()
+
+
+def test_backend_table_exists_quotes_name():
+    psycopg = MagicMock()
+    psycopg.Error = type("Error", (Exception,), {})
+    with patch.dict(sys.modules, {'psycopg': psycopg}):
+        backend = PostgresBackend({})
+    raw = MagicMock()
+    raw.description = [("exists", None)]
+    raw.fetchone.return_value = (0,)
+    assert backend.table_exists(PostgresCursor(raw), "Offre_Courante") is False
+    query, params = raw.execute.call_args[0]
+    assert "to_regclass(%s)" in query
+    assert params == ['"Offre_Courante"']
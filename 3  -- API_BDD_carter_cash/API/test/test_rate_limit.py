@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import patch
+from rate_limit import RateLimiter, parse_rate
+from routers.search_router import search_rate_limit
+from database.auth import get_current_user
+from models import User
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_parse_rate():
+    assert parse_rate("120/60") == (120, 60.0)
+    assert parse_rate("5") == (5, 1.0)
+    assert parse_rate("0") is None
+    assert parse_rate("") is None
+    with pytest.raises(ValueError):
+        parse_rate("-1/60")
+
+def test_token_bucket_per_key():
+    timer = FakeTimer()
+    limiter = RateLimiter(capacity=2, period=10, timer=timer)
+
+    # Rafale de 2 autorisée, puis rejet jusqu'au prochain jeton (5 s)
+    assert limiter.hit("alice")[0]
+    assert limiter.hit("alice")[0]
+    allowed, retry_after = limiter.hit("alice")
+    assert not allowed
+    assert retry_after == pytest.approx(5.0)
+
+    # Seau indépendant par utilisateur
+    assert limiter.hit("bob")[0]
+
+    timer.now = 5.0
+    assert limiter.hit("alice")[0]
+    assert not limiter.hit("alice")[0]
+
+def test_least_recent_keys_are_forgotten():
+    limiter = RateLimiter(capacity=1, period=60, max_keys=2, timer=FakeTimer())
+    limiter.hit("a")
+    limiter.hit("b")
+    limiter.hit("c")
+    # "a" oublié : son seau repart plein
+    assert limiter.hit("a")[0]
+
+def test_search_endpoint_returns_429(test_client):
+    user = User(username="burst", email="burst@example.com", full_name="Burst", hashed_password="x")
+
+    async def fake_run(*args, **kwargs):
+        return b'{"success":true}', 'W/"etag"'
+
+    with patch.object(search_rate_limit, "limiter", RateLimiter(capacity=1, period=60)), \
+         patch('routers.search_router.run_in_db', side_effect=fake_run):
+        test_client.app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            assert test_client.get("/search/Michelin").status_code == 200
+            response = test_client.get("/search/Michelin")
+            assert response.status_code == 429
+            assert response.headers["Retry-After"] == "60"
+        finally:
+            test_client.app.dependency_overrides.clear()
@@ -1,5 +1,12 @@
 import pytest
-from database.search import validate_marque, get_data_from_db
+from unittest.mock import patch, MagicMock
+from fastapi import HTTPException
+from database.search import (
+    validate_marque, get_data_from_db, get_cached_data, search_cache, data_version,
+    load_data_version
+)
+from database.auth import get_current_user
+from database.marques import BrandList
 
 def test_validate_marque():
     # Test valides
@@ -29,3 +36,182 @@ def test_search_endpoint(test_client, test_token):
 def test_search_without_auth(test_client):
     response = test_client.get("/search/Michelin")
     assert response.status_code == 401
+
+@pytest.fixture
+def mock_search_cursor():
+    # Réinitialise le cache et le marqueur de version entre les tests
+    search_cache.clear()
+    data_version.invalidate()
+    with patch('database.search.db.get_cursor') as mock_get_cursor, \
+         patch('database.search.db.table_exists', return_value=True):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = ("2025-02-01", 100)
+        mock_cursor.description = [("ID_Produit",), ("Marque",)]
+        mock_cursor.fetchall.return_value = [(1, "Michelin"), (2, "Michelin")]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+        yield mock_cursor
+    search_cache.clear()
+    data_version.invalidate()
+
+def test_search_cache_invalidated_by_new_scrap(mock_search_cursor):
+    result, etag = get_cached_data("Michelin")
+    assert result["count"] == 2
+    # Même marque, casse différente : servie par le cache
+    cached, cached_etag = get_cached_data("michelin")
+    assert cached_etag == etag
+    assert mock_search_cursor.fetchall.call_count == 1
+
+    # Nouveau scraping : le marqueur change et le cache est vidé
+    mock_search_cursor.fetchone.return_value = ("2025-02-02", 250)
+    data_version.invalidate()
+    _, new_etag = get_cached_data("Michelin")
+    assert new_etag != etag
+    assert mock_search_cursor.fetchall.call_count == 2
+
+def test_data_version_without_offre_courante(mock_search_cursor):
+    # Offre_Courante absente : le marqueur ne lit que Produit
+    mock_search_cursor.fetchone.side_effect = [(0,), ("2025-02-01", 100, None)]
+    assert load_data_version() == "2025-02-01:100:None"
+    version_query = mock_search_cursor.execute.call_args_list[-1][0][0]
+    assert "Offre_Courante" not in version_query
+
+    mock_search_cursor.fetchone.side_effect = [(1,), ("2025-02-01", 100, "2025-02-01")]
+    assert load_data_version() == "2025-02-01:100:2025-02-01"
+    version_query = mock_search_cursor.execute.call_args_list[-1][0][0]
+    assert "FROM Offre_Courante" in version_query
+
+def test_search_endpoint_etag(test_client, mock_search_cursor):
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        response = test_client.get("/search/Michelin")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert "max-age" in response.headers["Cache-Control"]
+
+        response = test_client.get("/search/Michelin", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+    finally:
+        test_client.app.dependency_overrides.clear()
+
+def test_search_keyset_pagination(mock_search_cursor):
+    mock_search_cursor.fetchall.return_value = [(10, "Michelin"), (11, "Michelin"), (12, "Michelin")]
+    mock_search_cursor.fetchone.return_value = (42,)
+
+    result = get_data_from_db("Michelin", limit=2, after=9, latest_only=True, with_total=True)
+    assert result["count"] == 2
+    assert result["next_after"] == 11
+    assert result["total"] == 42
+
+    # TOP (limit + 1) puis les paramètres du filtre et le curseur
+    query, params = mock_search_cursor.execute.call_args_list[0][0]
+    assert "TOP (?)" in query
+    assert "ORDER BY ID_Produit" in query
+    assert "FROM Offre_Courante" in query
+    assert "MAX(Date_derniere_vue)" in query
+    assert params == (3, "Michelin", "Michelin", 9)
+    count_query = mock_search_cursor.execute.call_args_list[1][0][0]
+    assert "FROM Offre_Courante" in count_query
+
+    # Dernière page : pas de curseur suivant, pas de COUNT
+    mock_search_cursor.execute.reset_mock()
+    mock_search_cursor.fetchall.return_value = [(12, "Michelin")]
+    result = get_data_from_db("Michelin", limit=2, after=11)
+    assert result["next_after"] is None
+    assert "total" not in result
+    assert mock_search_cursor.execute.call_count == 1
+    assert "FROM Produit" in mock_search_cursor.execute.call_args[0][0]
+
+    with pytest.raises(HTTPException):
+        get_data_from_db("Michelin", limit=0)
+
+def test_export_streams_in_batches(test_client, mock_search_cursor):
+    import json
+    batches = [
+        [(1, "https://a", 80, "", "", "", "Michelin", "2025-02-01")] * 2,
+        [(2, "https://b", 90, "", "", "", "Michelin", "2025-02-01")],
+        []
+    ]
+    mock_search_cursor.fetchmany.side_effect = batches
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        response = test_client.get("/export/produits", params={"marque": "Michelin"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 3
+        assert lines[2]["URL_Produit"] == "https://b"
+        assert mock_search_cursor.fetchmany.call_count == 3
+
+        mock_search_cursor.fetchmany.side_effect = batches
+        response = test_client.get("/export/produits", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.text.splitlines()[0].startswith("ID_Produit,URL_Produit")
+        assert len(response.text.splitlines()) == 4
+
+        response = test_client.get("/export/produits", params={"marque": "DROP TABLE"})
+        assert response.status_code == 400
+    finally:
+        test_client.app.dependency_overrides.clear()
+
+def test_search_columnar_and_compression(test_client, mock_search_cursor):
+    mock_search_cursor.description = [("ID_Produit",), ("Marque",), ("Descriptif",)]
+    mock_search_cursor.fetchall.return_value = [
+        (i, "Michelin", "Pneu Michelin Primacy 4 205/55 R16 91V") for i in range(1, 101)
+    ]
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        response = test_client.get("/search/Michelin", params={"columnar": True, "limit": 50})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["columns"] == ["ID_Produit", "Marque", "Descriptif"]
+        assert body["rows"][0] == [1, "Michelin", "Pneu Michelin Primacy 4 205/55 R16 91V"]
+        assert body["next_after"] == 50
+        assert "data" not in body
+
+        # Réponse volumineuse : compressée si le client accepte gzip
+        response = test_client.get("/search/Michelin", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["count"] == 100
+    finally:
+        test_client.app.dependency_overrides.clear()
+
+def test_unknown_brand_skips_database(mock_search_cursor):
+    # Liste chargée pour la version courante des données ("2025-02-01:100")
+    with patch('database.search.brand_list._normalized', frozenset({"michelin"})), \
+         patch('database.search.brand_list.version', "2025-02-01:100"):
+        result, _ = get_cached_data("Inconnue", with_total=True)
+        assert result == {"success": True, "count": 0, "next_after": None, "data": [], "total": 0}
+        assert mock_search_cursor.fetchall.call_count == 0
+        assert len(search_cache) == 0
+
+        # Marque connue : requête normale
+        result, _ = get_cached_data("MICHELIN")
+        assert result["count"] == 2
+
+def test_brand_added_after_preload_hits_database(mock_search_cursor):
+    # Liste préchargée par le maître gunicorn avant un nouveau scraping
+    catalogue = ["Michelin"]
+    brands = BrandList(load=lambda: list(catalogue))
+    brands.refresh("2025-01-31:90")
+    catalogue.append("Pirelli")
+    with patch('database.search.brand_list', brands):
+        # Première lecture du marqueur ("2025-02-01:100") : la liste est rechargée
+        result, _ = get_cached_data("Pirelli")
+        assert result["count"] == 2
+        assert mock_search_cursor.fetchall.call_count == 1
+        assert brands.version == "2025-02-01:100"
+        assert brands.may_exist("pirelli")
+
+def test_latest_only_without_current_offers(test_client, mock_search_cursor):
+    test_client.app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        with patch('database.search.db.table_exists', return_value=False):
+            response = test_client.get("/search/Michelin", params={"latest_only": True})
+            assert response.status_code == 503
+            response = test_client.get("/export/produits", params={"latest_only": True})
+            assert response.status_code == 503
+            # Sans latest_only, Produit suffit
+            assert test_client.get("/search/Michelin").status_code == 200
+    finally:
+        test_client.app.dependency_overrides.clear()
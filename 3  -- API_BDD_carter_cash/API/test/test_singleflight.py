@@ -0,0 +1,63 @@
+import pytest
+import asyncio
+from database.singleflight import SingleFlight
+
+def test_concurrent_identical_calls_are_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    async def query(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return f"result-{key}"
+
+    async def scenario():
+        return await asyncio.gather(
+            *[flight.do("michelin", lambda: query("michelin")) for _ in range(10)],
+            flight.do("pirelli", lambda: query("pirelli"))
+        )
+
+    results = asyncio.run(scenario())
+    assert results == ["result-michelin"] * 10 + ["result-pirelli"]
+    assert calls == ["michelin", "pirelli"]
+    stats = flight.stats()
+    assert stats == {"in_flight": 0, "leaders": 2, "coalesced": 9}
+
+def test_errors_fan_out_and_are_not_cached():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def scenario():
+        return await asyncio.gather(
+            *[flight.do("k", failing) for _ in range(3)], return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(attempts) == 1
+
+    # Appel suivant : nouvelle tentative
+    with pytest.raises(RuntimeError):
+        asyncio.run(flight.do("k", failing))
+    assert len(attempts) == 2
+
+def test_cancelled_waiter_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("k", query))
+        second = asyncio.ensure_future(flight.do("k", query))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "ok"
@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import patch
+from database.suggest import SuggestIndex, normalize, suggest_vehicles
+from database.dimensions_index import DimensionsIndex
+
+VEHICLES = {
+    ("Renault", "Clio IV"): [2015, 2016],
+    ("Renault", "Clio III"): [2008],
+    ("Citroën", "C3"): [2019],
+    ("Citroën", "C3 Aircross"): [2019],
+    ("Volkswagen", "Golf VII"): [2015],
+    ("Volkswagen", "Golf"): [2000],
+    ("Peugeot", "208"): [2019],
+}
+
+def test_normalize():
+    assert normalize("Clio IV") == "clio4"
+    assert normalize("clio 4") == "clio4"
+    assert normalize("C-3") == "c3"
+    assert normalize("Citroën") == "citroen"
+    assert normalize("Golf VII") == normalize("golf7")
+
+@pytest.mark.parametrize("query,expected", [
+    ("clio iv", ("Renault", "Clio IV")),
+    ("C-3", ("Citroën", "C3")),
+    ("golf7", ("Volkswagen", "Golf VII")),
+    ("clo 4", ("Renault", "Clio IV")),     # faute de frappe
+    ("peug", ("Peugeot", "208")),          # préfixe de la marque
+])
+def test_suggest_ranking(query, expected):
+    index = SuggestIndex(VEHICLES)
+    results = index.search(query, limit=3)
+    assert (results[0]["marque"], results[0]["modele"]) == expected
+
+def test_suggest_brand_filter_and_limit():
+    index = SuggestIndex(VEHICLES)
+    results = index.search("c", limit=10, marque="citroen")
+    assert {r["marque"] for r in results} == {"Citroën"}
+    assert len(index.search("clio", limit=1)) == 1
+    assert index.search("--") == []
+
+def test_suggest_vehicles_follows_dimensions_index():
+    rows = [("Renault", "Clio IV", 2015, "", 195, 55, 16), ("Renault", "Clio IV", 2016, "", 195, 55, 16)]
+    index = DimensionsIndex(load_rows=lambda: rows, load_version=lambda: str(len(rows)))
+    index.refresh()
+    with patch('database.suggest.dimensions_index', index):
+        results = suggest_vehicles("clio iv")
+        assert results[0]["annees"] == [2015, 2016]
+
+        rows.append(("Dacia", "Sandero", 2019, "", 185, 65, 15))
+        index.refresh()
+        assert suggest_vehicles("sandero")[0]["modele"] == "Sandero"
+
+def test_suggest_vehicles_does_not_load_shared_index():
+    # Index partagé désactivé : les suggestions chargent leur propre copie
+    rows = [("Peugeot", "308", 2018, "", 225, 45, 17)]
+    shared = DimensionsIndex(load_rows=lambda: rows, load_version=lambda: "shared")
+    own = DimensionsIndex(load_rows=lambda: rows, load_version=lambda: "own")
+    with patch('database.suggest.dimensions_index', shared), \
+         patch('database.suggest._own_index', own), \
+         patch('database.suggest._own_checked_at', 0.0):
+        assert suggest_vehicles("308")[0]["modele"] == "308"
+        assert not shared.loaded
+        assert own.version == "own"